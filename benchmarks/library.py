@@ -0,0 +1,286 @@
+"""Time the library pipeline on synthetic libraries of increasing size.
+
+For each size a directory tree of sparse video files (a few GB apparent
+size each, no real disk use) is generated in a temp dir, half movies and
+half episodes in Series/Season N folders, and then these phases are timed:
+
+  generate      create the tree
+  scan_cold     first walk (every directory listed, file index written)
+  scan_warm     second walk (unchanged directories served from the index)
+  parse         guess entries from file names (filename_parser)
+  db_insert     add_entries() for the whole catalogue
+  db_read       get_all_movies / get_series_names / get_all_filenames, plus
+                paging through MovieEntry with fetch_page()
+  cache_load    first catalogue.py read (both tables into the cache)
+  cache_read    the same reads again, served from memory
+  match         the Load pass: warm walk filtered by the catalogued set
+  search        a few search_catalogue() queries
+  qt_models     Watch/Data tab models filled offscreen (reload + every fetchMore)
+  sync          walker.sync_library() after adding 10% uncatalogued files and
+                10% catalogue entries with no file: one walk producing the
+                filemap, the new files and the missing entries
+
+Each size runs in its own process so peak RSS (ru_maxrss) is per size. The
+output is JSON with seconds, items per second and peak RSS after each phase.
+With two or more sizes, "scaling" gives each phase's exponent k from a
+least-squares fit of seconds ~ files^k: about 1 is linear, 2 quadratic.
+
+    python benchmarks/library.py [--sizes 1000,10000,100000] [-o results.json]
+    python benchmarks/library.py --sizes 1000000      # slow; several minutes
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# Files per leaf directory; episodes per season
+MOVIES_PER_DIR = 200
+EPISODES_PER_SEASON = 12
+SEASONS_PER_SERIES = 5
+
+
+def peak_rss_mb():
+    # KB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20, 1)
+
+
+def generate(root, count, seed=0):
+    """Create `count` sparse video files under `root`; returns the file paths."""
+    rng = random.Random(seed)
+    paths = []
+    movies = count // 2
+    episodes = count - movies
+
+    for i in range(movies):
+        folder = os.path.join(root, "Movies", f"batch{i // MOVIES_PER_DIR:05d}")
+        if i % MOVIES_PER_DIR == 0:
+            os.makedirs(folder, exist_ok=True)
+        paths.append(os.path.join(folder, f"Movie.Title.{i:07d}.{1950 + i % 70}.1080p.mkv"))
+
+    per_series = EPISODES_PER_SEASON * SEASONS_PER_SERIES
+    for i in range(episodes):
+        series, rest = divmod(i, per_series)
+        season, episode = divmod(rest, EPISODES_PER_SEASON)
+        folder = os.path.join(root, "TV", f"Series {series:05d}", f"Season {season + 1}")
+        if rest % EPISODES_PER_SEASON == 0:
+            os.makedirs(folder, exist_ok=True)
+        paths.append(os.path.join(folder, f"Series.{series:05d}.S{season + 1:02d}E{episode + 1:02d}.mp4"))
+
+    for path in paths:
+        with open(path, "wb") as f:
+            f.truncate(rng.randint(200, 4000) * 2**20)
+    return paths
+
+
+class Timer:
+    def __init__(self):
+        self.phases = {}
+
+    def run(self, name, items, fn):
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        self.phases[name] = {
+            "seconds": round(seconds, 4),
+            "items": items,
+            "per_sec": round(items / seconds, 1) if seconds else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        return result
+
+
+def walk_all(root, keep=None):
+    from scanner import iter_indexed_batches
+
+    found = 0
+    for batch in iter_indexed_batches(root):
+        found += len(batch) if keep is None else sum(1 for name, _ in batch if name in keep)
+    return found
+
+
+def fill_models():
+    from PyQt6.QtCore import QModelIndex
+    from watch_models import MovieListModel, SeriesTreeModel
+    from data_models import catalogue_edit_buffer, movie_table_model, tv_table_model
+
+    movies = MovieListModel(lambda filename: True)
+    movies.reload()
+    while movies.canFetchMore(QModelIndex()):
+        movies.fetchMore(QModelIndex())
+
+    # Episodes are fetched per series as each one is expanded
+    series = SeriesTreeModel(lambda filename: True)
+    series.reload()
+    episodes = 0
+    for row in range(series.rowCount()):
+        parent = series.index(row, 0)
+        while series.canFetchMore(parent):
+            series.fetchMore(parent)
+        episodes += series.rowCount(parent)
+
+    buffer = catalogue_edit_buffer()
+    for table in (movie_table_model(buffer), tv_table_model(buffer)):
+        table.reload()
+        table.row_values(0)
+        table.row_values(max(0, table.rowCount() - 1))  # jump to the end
+    return movies.rowCount() + episodes
+
+
+def run_size(count, workdir):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    import database
+    from filename_parser import parse_batch
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    database.DB_NAME = os.path.join(workdir, "library.db")
+    database.initialize_database()
+    library = os.path.join(workdir, "library")
+    database.add_path(library)
+
+    timer = Timer()
+    paths = timer.run("generate", count, lambda: generate(library, count))
+    timer.run("scan_cold", count, lambda: walk_all(library))
+    timer.run("scan_warm", count, lambda: walk_all(library))
+    parsed = timer.run("parse", count, lambda: parse_batch(paths))
+
+    movies = [(p.filename, p.title) for p in parsed if p.kind == "movie"]
+    tv_entries = [(p.filename, p.title, p.season, p.episode) for p in parsed if p.kind == "tv"]
+    timer.run("db_insert", count, lambda: database.add_entries(movies, tv_entries))
+    del paths, parsed, movies, tv_entries
+
+    def read_all():
+        database.get_all_movies()
+        database.get_series_names()
+        database.get_all_filenames()
+        after = None
+        while True:
+            page = database.fetch_page("MovieEntry", ["filename", "movieName"],
+                                       ["movieName", "filename"], after=after, limit=1000)
+            if len(page) < 1000:
+                break
+            after = (page[-1][1], page[-1][0])
+    timer.run("db_read", count, read_all)
+
+    import catalogue
+
+    def read_cache():
+        catalogue.get_all_movies()
+        catalogue.get_series_names()
+        catalogue.get_all_filenames()
+    timer.run("cache_load", count, read_cache)
+    timer.run("cache_read", count, read_cache)
+
+    catalogued = frozenset(database.get_all_filenames())
+    matched = timer.run("match", count, lambda: walk_all(library, catalogued))
+
+    queries = ["movie title", "series 00001", "s01e02", "titel"]
+    timer.run("search", len(queries),
+              lambda: [database.search_catalogue(q) for q in queries])
+    timer.run("qt_models", count, fill_models)
+
+    from walker import sync_library
+
+    extra = max(1, count // 10)
+    unsorted = os.path.join(library, "Unsorted")
+    os.makedirs(unsorted)
+    for i in range(extra):
+        open(os.path.join(unsorted, f"Unsorted.{i:07d}.mkv"), "wb").close()
+    database.add_entries([(f"Gone.{i:07d}.mkv", f"Gone {i}") for i in range(extra)], [])
+    catalogued = frozenset(database.get_all_filenames())
+    synced = timer.run("sync", count + extra, lambda: sync_library([library], catalogued))
+
+    database.close_connections()
+    app.quit()
+    return {"files": count, "matched": matched, "phases": timer.phases,
+            "sync": {"matched": len(synced.filemap), "new": len(synced.uncatalogued),
+                     "missing": len(synced.missing)},
+            "peak_rss_mb": peak_rss_mb()}
+
+
+def scaling(results):
+    """{phase: k} fitting seconds ~ items^k across sizes (log-log least squares)."""
+    exponents = {}
+    for phase in results[0]["phases"] if results else []:
+        points = [(math.log(r["phases"][phase]["items"]), math.log(r["phases"][phase]["seconds"]))
+                  for r in results
+                  if r["phases"][phase]["seconds"] > 0 and r["phases"][phase]["items"] > 0]
+        xs = {x for x, _ in points}
+        if len(xs) < 2:
+            continue
+        mean_x = sum(x for x, _ in points) / len(points)
+        mean_y = sum(y for _, y in points) / len(points)
+        slope = (sum((x - mean_x) * (y - mean_y) for x, y in points)
+                 / sum((x - mean_x) ** 2 for x, _ in points))
+        exponents[phase] = round(slope, 2)
+    return exponents
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated file counts")
+    parser.add_argument("-o", "--output", help="write JSON here as well as stdout")
+    parser.add_argument("--keep", action="store_true", help="don't delete the temp trees")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_size(args.child, args.workdir)))
+        return
+
+    results = []
+    for count in (int(size) for size in args.sizes.split(",")):
+        workdir = tempfile.mkdtemp(prefix=f"qurupeco-bench-{count}-")
+        try:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", str(count),
+                 "--workdir", workdir],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(out.strip().splitlines()[-1]))
+            print(f"{count} files done", file=sys.stderr)
+        finally:
+            if not args.keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    report = json.dumps({
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "results": results,
+        "scaling": scaling(results),
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Check that the catalogue queries are served by indexes, not by sorting.
+
+Seeds a throwaway database, runs the real database.py helpers with a
+trace callback to capture the SQL they execute, then runs EXPLAIN QUERY
+PLAN on each statement and fails if any of them needs a temp B-tree for
+ORDER BY or GROUP BY.
+
+    python benchmarks/query_plan.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import database
+
+
+def seed(movies=2000, series=50, episodes=40):
+    with database.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO MovieEntry (filename, movieName) VALUES (?, ?);",
+            [(f"movie{i:05d}.mkv", f"Movie {i % 997:04d}") for i in range(movies)]
+        )
+        conn.executemany(
+            "INSERT INTO TVEntry (filename, seriesName, season, episode) VALUES (?, ?, ?, ?);",
+            [(f"s{s:03d}e{e:03d}.mkv", f"Series {s:03d}", e // 10 + 1, e % 10 + 1)
+             for s in range(series) for e in range(episodes)]
+        )
+        conn.execute("ANALYZE;")
+
+
+def capture(calls):
+    """Run each helper and return the SELECT statements it executed."""
+    statements = []
+    conn = database.get_connection()
+    conn.set_trace_callback(statements.append)
+    try:
+        for call in calls:
+            call()
+    finally:
+        conn.set_trace_callback(None)
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+
+def main():
+    database.DB_NAME = os.path.join(tempfile.mkdtemp(), "query_plan.db")
+    database.initialize_database()
+    seed()
+
+    calls = [
+        database.get_all_movies,
+        database.get_all_tv_entries,
+        database.get_series_names,
+        lambda: database.get_tv_entries_for_series("Series 007"),
+        lambda: database.fetch_page("MovieEntry", ["filename", "movieName"],
+                                    ["movieName", "filename"]),
+        lambda: database.fetch_page("MovieEntry", ["filename", "movieName"],
+                                    ["movieName", "filename"],
+                                    after=("Movie 0500", "movie00500.mkv")),
+        lambda: database.fetch_page("TVEntry", ["filename", "seriesName", "season", "episode"],
+                                    ["seriesName", "season", "episode", "filename"],
+                                    after=("Series 010", 2, 3, "s010e012.mkv")),
+        lambda: database.fetch_page("TVEntry", ["filename", "seriesName", "season", "episode"],
+                                    ["seriesName", "season", "episode", "filename"],
+                                    descending=True),
+    ]
+
+    failures = 0
+    conn = database.get_connection()
+    for sql in capture(calls):
+        plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+        sorts = [step for step in plan if "TEMP B-TREE" in step]
+        status = "FAIL" if sorts else "ok"
+        failures += bool(sorts)
+        print(f"[{status}] {' '.join(sql.split())[:90]}")
+        for step in plan:
+            print(f"        {step}")
+
+    database.close_connections()
+    if failures:
+        print(f"{failures} queries sort in a temp B-tree")
+        sys.exit(1)
+    print("All catalogue queries use an index for ordering.")
+
+
+if __name__ == "__main__":
+    main()
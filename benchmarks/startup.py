@@ -0,0 +1,131 @@
+"""Measure how long the main window takes to appear and become usable.
+
+Each run starts a fresh interpreter (so import time counts) against a
+throwaway database seeded with a synthetic catalogue, and records:
+
+  import_ms       importing main.py and its dependencies
+  first_paint_ms  process start → first paint event of the main window
+  interactive_ms  process start → schema checked and Watch tab filled
+
+Both fast-start (default) and eager construction are measured; results
+are printed as JSON so they can be compared between commits.
+
+    python benchmarks/startup.py [--runs 5] [--movies 5000] [--episodes 20000]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def seed(db_path, movies, episodes):
+    import database
+
+    database.DB_NAME = db_path
+    database.initialize_database()
+    database.add_entries(
+        [(f"movie{i:06d}.mkv", f"Movie {i:06d}") for i in range(movies)],
+        [(f"show{i // 100:04d}.s{i // 10 % 10 + 1:02d}e{i % 10 + 1:02d}.mkv",
+          f"Show {i // 100:04d}", i // 10 % 10 + 1, i % 10 + 1) for i in range(episodes)],
+    )
+    database.close_connections()
+
+
+def child(db_path, fast_start):
+    """Runs in the measured process; prints one JSON line."""
+    start = time.perf_counter()
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.chdir(ROOT)
+
+    from PyQt6.QtCore import QObject, QEvent, QTimer
+    from PyQt6.QtWidgets import QApplication
+    import database
+    import main
+    imported = time.perf_counter()
+
+    database.DB_NAME = db_path
+    app = QApplication(sys.argv[:1])
+    marks = {}
+
+    class PaintSpy(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and "paint" not in marks:
+                marks["paint"] = time.perf_counter()
+            return False
+
+    spy = PaintSpy()
+    app.installEventFilter(spy)
+
+    window = main.MainWindow(fast_start=fast_start)
+    if window.started:
+        marks["interactive"] = time.perf_counter()
+    window.interactive.connect(lambda: marks.setdefault("interactive", time.perf_counter()))
+    window.show()
+
+    def check():
+        if "paint" in marks and "interactive" in marks:
+            app.quit()
+    timer = QTimer()
+    timer.timeout.connect(check)
+    timer.start(1)
+    QTimer.singleShot(30000, app.quit)
+    app.exec()
+
+    print(json.dumps({
+        "import_ms": (imported - start) * 1000,
+        "first_paint_ms": (marks["paint"] - start) * 1000,
+        # Usable only once it has also been painted
+        "interactive_ms": (max(marks["interactive"], marks["paint"]) - start) * 1000,
+    }))
+
+
+def summarise(samples):
+    return {
+        key: {
+            "median": round(statistics.median(s[key] for s in samples), 1),
+            "min": round(min(s[key] for s in samples), 1),
+            "max": round(max(s[key] for s in samples), 1),
+        }
+        for key in samples[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--movies", type=int, default=5000)
+    parser.add_argument("--episodes", type=int, default=20000)
+    parser.add_argument("--child", choices=["fast", "eager"], help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.db, args.child == "fast")
+        return
+
+    db_path = os.path.join(tempfile.mkdtemp(), "startup.db")
+    seed(db_path, args.movies, args.episodes)
+
+    results = {"movies": args.movies, "episodes": args.episodes, "runs": args.runs}
+    for mode in ("fast", "eager"):
+        samples = []
+        for _ in range(args.runs):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, "--db", db_path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            samples.append(json.loads(out.strip().splitlines()[-1]))
+        results[mode] = summarise(samples)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""In-process cache of the MovieEntry and TVEntry tables.
+
+Both tables are read once into small __slots__ records keyed by filename
+(episodes are also grouped by series) and served from memory afterwards.
+Sorted views (all movies, series names and counts) are built on first
+use and kept until the next write.
+
+database.py reports every catalogue write once it commits. The cache
+then re-reads just those filenames, updates its records in place and
+tells its listeners which filenames really changed, so views move,
+insert or remove only those rows. Nothing is loaded until the first
+read, and the cache reloads itself if database.DB_NAME changes.
+"""
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+import database
+
+TABLES = ("MovieEntry", "TVEntry")
+
+
+def _sort_key(value):
+    """Orders like SQLite's ORDER BY: NULLs first."""
+    return (value is not None, value)
+
+
+class MovieRecord:
+    __slots__ = ("filename", "movieName")
+
+    def __init__(self, filename, movieName):
+        self.filename = filename
+        self.movieName = movieName
+
+    def row(self):
+        return (self.filename, self.movieName)
+
+
+class EpisodeRecord:
+    __slots__ = ("filename", "seriesName", "season", "episode")
+
+    def __init__(self, filename, seriesName, season, episode):
+        self.filename = filename
+        self.seriesName = seriesName
+        self.season = season
+        self.episode = episode
+
+    def row(self):
+        return (self.filename, self.seriesName, self.season, self.episode)
+
+
+# -----------------------------------------------------------
+# CACHE (Qt-free)
+# -----------------------------------------------------------
+class Catalogue:
+    """Records for both tables; every method is safe to call from any thread."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._db_name = None
+        self._movies = {}      # filename → MovieRecord
+        self._episodes = {}    # filename → EpisodeRecord
+        self._series = {}      # seriesName → {filename: EpisodeRecord}
+        self._listeners = []   # callables taking (table, [filenames changed])
+        self._clear_views()
+
+    def _clear_views(self):
+        self._movie_view = None      # [(filename, movieName)] in title order
+        self._series_view = None     # [(seriesName, count)] in name order
+        self._filenames_view = None  # frozenset of both tables' filenames
+
+    def _ensure(self):
+        if self._db_name != database.DB_NAME:
+            self._load()
+
+    def _load(self):
+        self._db_name = database.DB_NAME
+        self._movies = {f: MovieRecord(f, name) for f, name in database.get_all_movies()}
+        self._episodes = {}
+        self._series = {}
+        for row in database.get_all_tv_entries():
+            self._add_episode(EpisodeRecord(*row))
+        self._clear_views()
+
+    def reload(self):
+        """Re-read both tables, e.g. after the database was changed outside this process."""
+        with self._lock:
+            self._load()
+        for table in TABLES:
+            self._notify(table, None)
+
+    # ----- listeners -----
+    def add_listener(self, listener):
+        """`listener(table, filenames)` after each change; filenames is None after a reload."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def _notify(self, table, filenames):
+        for listener in list(self._listeners):
+            listener(table, filenames)
+
+    # ----- reads -----
+    def all_movies(self):
+        with self._lock:
+            self._ensure()
+            if self._movie_view is None:
+                self._movie_view = sorted(
+                    (record.row() for record in self._movies.values()),
+                    key=lambda row: (_sort_key(row[1]), row[0]))
+            return list(self._movie_view)
+
+    def movie(self, filename):
+        with self._lock:
+            self._ensure()
+            record = self._movies.get(filename)
+            return record.row() if record is not None else None
+
+    def series_names(self):
+        with self._lock:
+            self._ensure()
+            if self._series_view is None:
+                self._series_view = sorted(
+                    ((name, len(episodes)) for name, episodes in self._series.items()),
+                    key=lambda item: _sort_key(item[0]))
+            return list(self._series_view)
+
+    def episodes(self, seriesName):
+        with self._lock:
+            self._ensure()
+            records = self._series.get(seriesName, {}).values()
+            return sorted((record.row() for record in records),
+                          key=lambda row: (_sort_key(row[2]), _sort_key(row[3]), row[0]))
+
+    def all_episodes(self):
+        with self._lock:
+            self._ensure()
+            rows = []
+            for name, _ in self.series_names():
+                rows.extend(self.episodes(name))
+            return rows
+
+    def episode(self, filename):
+        with self._lock:
+            self._ensure()
+            record = self._episodes.get(filename)
+            return record.row() if record is not None else None
+
+    def filenames(self):
+        with self._lock:
+            self._ensure()
+            if self._filenames_view is None:
+                self._filenames_view = frozenset(self._movies).union(self._episodes)
+            return self._filenames_view
+
+    def count(self, table):
+        with self._lock:
+            self._ensure()
+            return len(self._movies if table == "MovieEntry" else self._episodes)
+
+    # ----- writes -----
+    def _add_episode(self, record):
+        self._episodes[record.filename] = record
+        self._series.setdefault(record.seriesName, {})[record.filename] = record
+
+    def _drop_episode(self, record):
+        del self._episodes[record.filename]
+        episodes = self._series[record.seriesName]
+        del episodes[record.filename]
+        if not episodes:
+            del self._series[record.seriesName]
+
+    def written(self, table, filenames):
+        """database.py change listener: re-read `filenames` from `table` and apply."""
+        if table not in TABLES:
+            return
+        with self._lock:
+            if self._db_name != database.DB_NAME:
+                return  # not loaded (or stale); the next read loads fresh rows
+            rows = {row[0]: row for row in database.get_entries(table, filenames)}
+            changed = []
+            for filename in dict.fromkeys(filenames):
+                row = rows.get(filename)
+                if table == "MovieEntry":
+                    if self._apply_movie(filename, row):
+                        changed.append(filename)
+                elif self._apply_episode(filename, row):
+                    changed.append(filename)
+            if changed:
+                self._clear_views()
+        if changed:
+            self._notify(table, changed)
+
+    def _apply_movie(self, filename, row):
+        record = self._movies.get(filename)
+        if row is None:
+            return self._movies.pop(filename, None) is not None
+        if record is None:
+            self._movies[filename] = MovieRecord(*row)
+            return True
+        if record.movieName == row[1]:
+            return False
+        record.movieName = row[1]
+        return True
+
+    def _apply_episode(self, filename, row):
+        record = self._episodes.get(filename)
+        if record is not None and row is not None and record.row() == row:
+            return False
+        if record is not None:
+            self._drop_episode(record)
+        if row is not None:
+            self._add_episode(EpisodeRecord(*row))
+        return record is not None or row is not None
+
+
+_catalogue = Catalogue()
+database.add_change_listener(_catalogue.written)
+
+# Read API in the shape of the database.py functions of the same names
+get_all_movies = _catalogue.all_movies
+get_movie_entry = _catalogue.movie
+get_all_tv_entries = _catalogue.all_episodes
+get_series_names = _catalogue.series_names
+get_tv_entries_for_series = _catalogue.episodes
+get_tv_entry = _catalogue.episode
+get_all_filenames = _catalogue.filenames
+count_rows = _catalogue.count
+reload = _catalogue.reload
+add_listener = _catalogue.add_listener
+remove_listener = _catalogue.remove_listener
+
+
+# -----------------------------------------------------------
+# QT SIDE
+# -----------------------------------------------------------
+class CatalogueNotifier(QObject):
+    """Re-emits cache changes as a signal, queued to this object's thread."""
+
+    changed = pyqtSignal(str, object)  # table, [filenames] or None after a reload
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        add_listener(self.changed.emit)
+
+
+_notifier = None
+
+
+def notifier():
+    """The shared CatalogueNotifier; first call it from the GUI thread."""
+    global _notifier
+    if _notifier is None:
+        _notifier = CatalogueNotifier()
+    return _notifier
@@ -0,0 +1,275 @@
+"""Paged table models behind the Data tab.
+
+Only the pages a view actually paints are read, using keyset pagination
+on the current sort order, and at most MAX_CACHED_PAGES of them are kept
+(least recently used pages are dropped). Clicking a header re-sorts in
+SQL rather than in Python.
+
+Edits go into an EditBuffer and are written in one transaction after a
+short pause (or on Save), followed by a single `flushed` notification.
+"""
+import sqlite3
+from collections import OrderedDict
+
+from PyQt6.QtCore import Qt, QObject, QTimer, QAbstractTableModel, QModelIndex, pyqtSignal
+
+import catalogue
+import database
+
+PAGE_SIZE = 200
+MAX_CACHED_PAGES = 16
+
+# Milliseconds without further edits before buffered rows are written
+FLUSH_DELAY_MS = 750
+
+
+class EditBuffer(QObject):
+    """Collect dirty rows per table and write them together.
+
+    `writers` maps a table name to a callable taking [(filename, values)],
+    run inside one shared transaction on flush.
+    """
+
+    changed = pyqtSignal(int)    # rows waiting to be written
+    flushed = pyqtSignal(dict)   # {table: [filenames written]}
+    failed = pyqtSignal(str)     # the batch was rolled back and is pending again
+
+    def __init__(self, writers, parent=None):
+        super().__init__(parent)
+        self.writers = writers
+        self._dirty = {table: {} for table in writers}
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(FLUSH_DELAY_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def stage(self, table, filename, values):
+        self._dirty[table][filename] = dict(values)
+        self._timer.start()  # restarts, so a burst of edits is one write
+        self.changed.emit(self.pending_count())
+
+    def pending(self, table, filename):
+        """Unwritten values for a row, or None."""
+        return self._dirty[table].get(filename)
+
+    def pending_count(self):
+        return sum(len(rows) for rows in self._dirty.values())
+
+    def flush(self):
+        self._timer.stop()
+        if not self.pending_count():
+            return
+
+        dirty = self._dirty
+        self._dirty = {table: {} for table in self.writers}
+        try:
+            with database.transaction():
+                for table, rows in dirty.items():
+                    if rows:
+                        self.writers[table](list(rows.items()))
+        except sqlite3.Error as exc:
+            # e.g. two rows edited into the same series/season/episode, or a
+            # locked database; the whole batch is rolled back and kept, with
+            # edits staged since then winning over the failed values
+            for table, rows in dirty.items():
+                rows.update(self._dirty[table])
+                self._dirty[table] = rows
+            self.changed.emit(self.pending_count())
+            self.failed.emit(str(exc))
+            return
+
+        self.changed.emit(0)
+        self.flushed.emit({table: list(rows) for table, rows in dirty.items() if rows})
+
+
+class SqlTableModel(QAbstractTableModel):
+    """Read-through view of one catalogue table.
+
+    `columns` is [(column, header, type)]; the first column is the unique
+    filename key. `default_order` is the sort used before any header is
+    clicked. Edits are staged in `edit_buffer` and shown from there until
+    it flushes.
+    """
+
+    def __init__(self, table, columns, default_order, edit_buffer, parent=None):
+        super().__init__(parent)
+        self.table = table
+        self.columns = [c[0] for c in columns]
+        self.headers = [c[1] for c in columns]
+        self.types = [c[2] for c in columns]
+        self.key_column = self.columns[0]
+        self.default_order = list(default_order)
+        self.edit_buffer = edit_buffer
+
+        self._order_by = self._order_for(self.default_order)
+        self._descending = False
+        self._row_count = 0
+        self._pages = OrderedDict()  # page number → [row tuples]
+        self._after = {0: None}      # page number → key of the last row before it
+
+        edit_buffer.flushed.connect(self._on_flushed)
+
+    def _on_flushed(self, written):
+        if self.table in written:
+            self.invalidate()
+
+    def _order_for(self, leading):
+        order = list(leading)
+        for col in self.default_order + [self.key_column]:
+            if col not in order:
+                order.append(col)
+        return order
+
+    def reload(self):
+        """Drop cached pages and re-count; rows are read again as they're painted."""
+        self.beginResetModel()
+        self._row_count = catalogue.count_rows(self.table)
+        self._pages.clear()
+        self._after = {0: None}
+        self.endResetModel()
+
+    def invalidate(self):
+        """Forget cached pages after a write; rows are re-read in their new order."""
+        self._pages.clear()
+        self._after = {0: None}
+        if self._row_count:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(self._row_count - 1, len(self.columns) - 1))
+
+    def rows_changed(self, filenames):
+        """The catalogue changed these rows: reset if the row count moved, else re-read pages."""
+        if catalogue.count_rows(self.table) != self._row_count:
+            self.reload()
+        else:
+            self.invalidate()
+
+    # ----- paging -----
+    def _row_key(self, row):
+        return tuple(row[self.columns.index(col)] for col in self._order_by)
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is not None:
+            self._pages.move_to_end(number)
+            return page
+
+        # Start from the nearest page boundary we know, skipping whole pages past it
+        known = max(n for n in self._after if n <= number)
+        page = database.fetch_page(
+            self.table, self.columns, self._order_by,
+            after=self._after[known], limit=PAGE_SIZE,
+            offset=(number - known) * PAGE_SIZE,
+            descending=self._descending,
+        )
+        if page:
+            self._after[number + 1] = self._row_key(page[-1])
+
+        self._pages[number] = page
+        if len(self._pages) > MAX_CACHED_PAGES:
+            self._pages.popitem(last=False)
+        return page
+
+    def row_values(self, row):
+        page = self._page(row // PAGE_SIZE)
+        offset = row % PAGE_SIZE
+        if offset >= len(page):
+            return None
+        values = page[offset]
+        pending = self.edit_buffer.pending(self.table, values[0])
+        if pending is not None:
+            values = (values[0],) + tuple(pending[col] for col in self.columns[1:])
+        return values
+
+    def filename_at(self, row):
+        values = self.row_values(row)
+        return values[0] if values is not None else None
+
+    # ----- Qt model interface -----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole,
+                                               Qt.ItemDataRole.EditRole):
+            return None
+        values = self.row_values(index.row())
+        if values is None:
+            return None
+        value = values[index.column()]
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return section + 1
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() > 0:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.EditRole or not index.isValid() or index.column() == 0:
+            return False
+
+        try:
+            value = self.types[index.column()](value)
+        except (TypeError, ValueError):
+            return False
+
+        current = self.row_values(index.row())
+        if current is None:
+            return False
+
+        row = list(current)
+        row[index.column()] = value
+
+        self.edit_buffer.stage(self.table, row[0], dict(zip(self.columns[1:], row[1:])))
+        self.dataChanged.emit(index, index)
+        return True
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.beginResetModel()
+        leading = [self.columns[column]] if 0 <= column < len(self.columns) else []
+        self._order_by = self._order_for(leading)
+        self._descending = order == Qt.SortOrder.DescendingOrder
+        self._pages.clear()
+        self._after = {0: None}
+        self.endResetModel()
+
+
+def catalogue_edit_buffer(parent=None):
+    return EditBuffer({
+        "MovieEntry": lambda rows: database.update_movie_entries(
+            (filename, v["movieName"]) for filename, v in rows),
+        "TVEntry": lambda rows: database.update_tv_entries(
+            (filename, v["seriesName"], v["season"], v["episode"]) for filename, v in rows),
+    }, parent)
+
+
+def movie_table_model(edit_buffer, parent=None):
+    return SqlTableModel(
+        "MovieEntry",
+        [("filename", "Filename", str), ("movieName", "Movie Name", str)],
+        ["movieName"],
+        edit_buffer,
+        parent,
+    )
+
+
+def tv_table_model(edit_buffer, parent=None):
+    return SqlTableModel(
+        "TVEntry",
+        [("filename", "Filename", str), ("seriesName", "Series Name", str),
+         ("season", "Season", int), ("episode", "Episode", int)],
+        ["seriesName", "season", "episode"],
+        edit_buffer,
+        parent,
+    )
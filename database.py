@@ -1,19 +1,205 @@
 import sqlite3
 import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 
 DB_NAME = "qurupeco.db"
 
+# Tuning applied to every connection the manager opens.
+# WAL lets the GUI thread keep reading while a worker thread writes.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA cache_size=-65536;",       # 64 MiB page cache
+    "PRAGMA mmap_size=268435456;",     # 256 MiB memory-mapped reads
+    "PRAGMA temp_store=MEMORY;",
+)
+
+# trigram (SQLite 3.34+) matches substrings, so "ncep" finds "Inception"
+SEARCH_TOKENIZER = "trigram" if sqlite3.sqlite_version_info >= (3, 34) else "unicode61"
+
+# sqlite3 keeps this many compiled statements per connection, so the
+# constant SQL strings below are only prepared once per thread.
+STATEMENT_CACHE_SIZE = 256
+
+
+class _ThreadToken:
+    """Held only in a thread's locals, so it's freed when the thread ends."""
+    __slots__ = ("__weakref__",)
+
+
+class ConnectionManager:
+    """Keep one long-lived connection per thread instead of reconnecting per call.
+
+    A connection is closed when its thread ends and the thread's locals
+    (with their token) are freed, so short-lived walker and pool threads
+    don't leave connections behind.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def _open(self, db_name):
+        conn = sqlite3.connect(
+            db_name,
+            isolation_level=None,          # autocommit; transactions are explicit
+            check_same_thread=False,       # close_all() may run on another thread
+            timeout=30,                    # scan workers may write concurrently
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def connection(self):
+        """Return this thread's connection, opening it on first use."""
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is None or local.db_name != DB_NAME:
+            if conn is not None:
+                self.release()
+            conn = self._open(DB_NAME)
+            local.conn = conn
+            local.db_name = DB_NAME
+            local.depth = 0
+            local.written = []
+            local.token = _ThreadToken()
+            local.closer = weakref.finalize(local.token, self._discard, conn)
+        return conn
+
+    def release(self):
+        """Close the calling thread's connection now; the next call opens a new one."""
+        local = self._local
+        closer = getattr(local, "closer", None)
+        local.conn = local.token = local.closer = None
+        if closer is not None:
+            closer()
+
+    @contextmanager
+    def transaction(self):
+        """Group writes into one commit. Nested blocks become savepoints."""
+        conn = self.connection()
+        local = self._local
+        depth = local.depth
+
+        if depth == 0:
+            conn.execute("BEGIN;")
+            local.written = []
+        else:
+            conn.execute(f"SAVEPOINT sp{depth};")
+        local.depth = depth + 1
+        mark = len(local.written)
+
+        try:
+            yield conn
+        except BaseException:
+            local.depth = depth
+            del local.written[mark:]  # rolled back, so nothing to report
+            if depth == 0:
+                conn.execute("ROLLBACK;")
+            else:
+                conn.execute(f"ROLLBACK TO sp{depth};")
+                conn.execute(f"RELEASE sp{depth};")
+            raise
+        else:
+            local.depth = depth
+            if depth == 0:
+                conn.execute("COMMIT;")
+                written, local.written = local.written, []
+                for table, filenames in written:
+                    _deliver(table, filenames)
+            else:
+                conn.execute(f"RELEASE sp{depth};")
+
+    def report_written(self, table, filenames):
+        """Queue a change notice until the outermost transaction commits (now if none)."""
+        if self.in_transaction():
+            self._local.written.append((table, filenames))
+        else:
+            _deliver(table, filenames)
+
+    def in_transaction(self):
+        return getattr(self._local, "depth", 0) > 0
+
+    def _discard(self, conn):
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            pass  # closed from another thread while in use; it's going anyway
+
+    def close_all(self):
+        """Close every connection opened by any thread (e.g. on app exit)."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._local = threading.local()
+
+
+_manager = ConnectionManager()
+
 
 def get_connection():
-    """Open a connection to the SQLite database."""
-    return sqlite3.connect(DB_NAME)
+    """Return the calling thread's persistent connection to the SQLite database."""
+    return _manager.connection()
 
 
-def initialize_database():
-    """Create the database and required tables if they don't exist."""
-    conn = get_connection()
-    cursor = conn.cursor()
+def transaction():
+    """Context manager that commits every write inside it in a single transaction.
+
+        with database.transaction():
+            for f in files:
+                database.add_movie_entry(f, name)
+    """
+    return _manager.transaction()
+
+
+def close_connections():
+    """Close all pooled connections."""
+    _manager.close_all()
+
+
+# -----------------------------------------------------------
+# CATALOGUE CHANGE NOTICES
+# -----------------------------------------------------------
+# Callables taking (table, [filenames]), run in the writing thread once
+# the write has committed. catalogue.py keeps its cache current with this.
+_change_listeners = []
 
+
+def add_change_listener(listener):
+    _change_listeners.append(listener)
+
+
+def remove_change_listener(listener):
+    _change_listeners.remove(listener)
+
+
+def _deliver(table, filenames):
+    for listener in list(_change_listeners):
+        listener(table, filenames)
+
+
+def _written(table, filenames):
+    """Writers call this with the MovieEntry/TVEntry keys they may have changed."""
+    if _change_listeners:
+        _manager.report_written(table, list(filenames))
+
+
+def _migrate_base_tables(cursor):
+    """v1: the catalogue tables plus the file index."""
     # Table: Pathlist
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS Pathlist (
@@ -39,187 +225,917 @@ def initialize_database():
         );
     """)
 
-    conn.commit()
-    conn.close()
+    # Table: DirIndex (every directory seen under a Pathlist root)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS DirIndex (
+            path TEXT PRIMARY KEY,
+            parent TEXT,
+            mtime REAL
+        );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dirindex_parent ON DirIndex (parent);")
+
+    # Table: FileIndex (every file seen, with the stat taken at listing time)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS FileIndex (
+            path TEXT PRIMARY KEY,
+            dir TEXT,
+            filename TEXT,
+            size INTEGER,
+            mtime REAL,
+            dir_mtime REAL
+        );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fileindex_dir ON FileIndex (dir);")
+
+
+def _migrate_catalogue_indexes(cursor):
+    """v2: covering indexes for the Watch/Data tab orderings, one row per episode."""
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_movieentry_name
+        ON MovieEntry (movieName, filename);
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tventry_order
+        ON TVEntry (seriesName, season, episode, filename);
+    """)
+    try:
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_tventry_episode
+            ON TVEntry (seriesName, season, episode);
+        """)
+    except sqlite3.IntegrityError:
+        # Older catalogues may already hold the same episode twice; keep
+        # working without the constraint rather than refusing to start.
+        # ensure_episode_index() retries it on every start.
+        pass
+
+
+def _migrate_search_index(cursor):
+    """v3: FTS5 index over movie titles, series names and filenames.
+
+    FTS rowids are derived from the source rowids (movies even, TV odd) so
+    the triggers touch one FTS row by rowid instead of searching for it.
+    """
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS CatalogueSearch USING fts5(
+            kind UNINDEXED,
+            filename,
+            title,
+            tokenize='{SEARCH_TOKENIZER}'
+        );
+    """)
+    cursor.execute("DELETE FROM CatalogueSearch;")
+    cursor.execute("""
+        INSERT INTO CatalogueSearch (rowid, kind, filename, title)
+        SELECT rowid * 2, 'movie', filename, movieName FROM MovieEntry;
+    """)
+    cursor.execute("""
+        INSERT INTO CatalogueSearch (rowid, kind, filename, title)
+        SELECT rowid * 2 + 1, 'tv', filename, seriesName FROM TVEntry;
+    """)
+
+    for table, kind, offset, title in (("MovieEntry", "movie", "", "movieName"),
+                                       ("TVEntry", "tv", " + 1", "seriesName")):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO CatalogueSearch (rowid, kind, filename, title)
+                VALUES (new.rowid * 2{offset}, '{kind}', new.filename, new.{title});
+            END;
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM CatalogueSearch WHERE rowid = old.rowid * 2{offset};
+            END;
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE ON {table} BEGIN
+                DELETE FROM CatalogueSearch WHERE rowid = old.rowid * 2{offset};
+                INSERT INTO CatalogueSearch (rowid, kind, filename, title)
+                VALUES (new.rowid * 2{offset}, '{kind}', new.filename, new.{title});
+            END;
+        """)
+
+
+def _migrate_file_identity(cursor):
+    """v4: size + partial content hash per catalogued file, for re-linking renames."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS FileIdentity (
+            filename TEXT PRIMARY KEY,
+            path TEXT,
+            size INTEGER,
+            mtime REAL,
+            hash TEXT
+        );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fileidentity_hash ON FileIdentity (size, hash);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fileindex_size ON FileIndex (size);")
+
+    for table in ("MovieEntry", "TVEntry"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_identity_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM FileIdentity WHERE filename = old.filename;
+            END;
+        """)
+
+
+def _migrate_filemap_cache(cursor):
+    """v5: last known path of each catalogued file, with when it was last seen."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS FileMap (
+            filename TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            verified REAL
+        );
+    """)
+    for table in ("MovieEntry", "TVEntry"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_filemap_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM FileMap WHERE filename = old.filename;
+            END;
+        """)
+
+
+def _migrate_media_info(cursor):
+    """v6: probed duration/resolution/codecs per distinct file content."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS MediaInfo (
+            hash TEXT PRIMARY KEY,
+            probed_with TEXT,
+            probe_failed INTEGER NOT NULL DEFAULT 0,
+            duration REAL,
+            width INTEGER,
+            height INTEGER,
+            video_codec TEXT,
+            audio_codec TEXT,
+            bitrate INTEGER
+        );
+    """)
+
+
+def _migrate_scan_profiles(cursor):
+    """v7: per-root scan settings on Pathlist (NULL means the default)."""
+    for column in ("extensions TEXT", "excludes TEXT", "max_depth INTEGER",
+                   "follow_symlinks INTEGER NOT NULL DEFAULT 0"):
+        cursor.execute(f"ALTER TABLE Pathlist ADD COLUMN {column};")
+
+
+# Schema migrations, applied in order. PRAGMA user_version records how many
+# have run. Append new steps; never change one that has shipped.
+MIGRATIONS = [
+    _migrate_base_tables,
+    _migrate_catalogue_indexes,
+    _migrate_search_index,
+    _migrate_file_identity,
+    _migrate_filemap_cache,
+    _migrate_media_info,
+    _migrate_scan_profiles,
+]
+
+
+def schema_version():
+    return get_connection().execute("PRAGMA user_version;").fetchone()[0]
+
+
+def initialize_database():
+    """Create the database and bring its schema up to date."""
+    version = schema_version()
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        with transaction() as conn:
+            migration(conn.cursor())
+            conn.execute(f"PRAGMA user_version={number};")
+    ensure_episode_index()
+
+
+def episode_index_exists():
+    row = get_connection().execute(
+        "SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_tventry_episode';"
+    ).fetchone()
+    return row is not None
+
+
+def ensure_episode_index():
+    """Create the one-row-per-episode index if v2 had to skip it. True once it exists.
+
+    It can't be created while the same episode is catalogued twice; see
+    duplicate_episodes().
+    """
+    if episode_index_exists():
+        return True
+    try:
+        get_connection().execute("""
+            CREATE UNIQUE INDEX idx_tventry_episode
+            ON TVEntry (seriesName, season, episode);
+        """)
+    except sqlite3.IntegrityError:
+        return False
+    return True
+
+
+def duplicate_episodes():
+    """[(seriesName, season, episode, [filenames])] for episodes catalogued more than once."""
+    cursor = get_connection().cursor()
+    cursor.execute("""
+        SELECT seriesName, season, episode, group_concat(filename, char(31))
+        FROM TVEntry
+        WHERE seriesName IS NOT NULL AND season IS NOT NULL AND episode IS NOT NULL
+        GROUP BY seriesName, season, episode
+        HAVING COUNT(*) > 1
+        ORDER BY seriesName, season, episode;
+    """)
+    return [(series, season, episode, sorted(filenames.split("\x1f")))
+            for series, season, episode, filenames in cursor.fetchall()]
 
 
 # Optional helper: simple test insert/select (we'll use real logic later)
 def test_database():
     initialize_database()
-    conn = get_connection()
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
     print("Tables:", cursor.fetchall())
-    conn.close()
 
 def get_all_movies():
-    conn = get_connection()
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute("SELECT filename, movieName FROM MovieEntry ORDER BY movieName ASC;")
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    return cursor.fetchall()
 
 
 def get_all_tv_entries():
-    conn = get_connection()
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute("""
         SELECT filename, seriesName, season, episode
         FROM TVEntry
         ORDER BY seriesName ASC, season ASC, episode ASC;
     """)
-    rows = cursor.fetchall()
-    conn.close()
+    return cursor.fetchall()
+
+def get_series_names():
+    """Return [(seriesName, episode_count)] ordered by name, without loading episodes."""
+    cursor = get_connection().cursor()
+    cursor.execute("""
+        SELECT seriesName, COUNT(*)
+        FROM TVEntry
+        GROUP BY seriesName
+        ORDER BY seriesName ASC;
+    """)
+    return cursor.fetchall()
+
+
+def get_tv_entries_for_series(seriesName):
+    cursor = get_connection().cursor()
+    cursor.execute("""
+        SELECT filename, seriesName, season, episode
+        FROM TVEntry
+        WHERE seriesName IS ?
+        ORDER BY season ASC, episode ASC;
+    """, (seriesName,))
+    return cursor.fetchall()
+
+def get_entries(table, filenames):
+    """Rows of MovieEntry or TVEntry for `filenames`, as returned by get_movie_entry/get_tv_entry."""
+    columns = ("filename, movieName" if table == "MovieEntry"
+               else "filename, seriesName, season, episode")
+    names = list(set(filenames))
+    rows = []
+    cursor = get_connection().cursor()
+    for start in range(0, len(names), IN_CHUNK_SIZE):
+        chunk = names[start:start + IN_CHUNK_SIZE]
+        cursor.execute(f"SELECT {columns} FROM {table} WHERE filename IN ({','.join('?' * len(chunk))});",
+                       chunk)
+        rows.extend(cursor.fetchall())
     return rows
 
+
+def get_movie_entry(filename):
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT filename, movieName FROM MovieEntry WHERE filename=?;", (filename,))
+    return cursor.fetchone()
+
+
+def get_tv_entry(filename):
+    cursor = get_connection().cursor()
+    cursor.execute(
+        "SELECT filename, seriesName, season, episode FROM TVEntry WHERE filename=?;",
+        (filename,)
+    )
+    return cursor.fetchone()
+
+def count_rows(table):
+    cursor = get_connection().cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {table};")
+    return cursor.fetchone()[0]
+
+
+def _after_key(order_by, key, descending):
+    """WHERE clause and params for rows ordered after `key`, NULL-safe.
+
+    Rows compare column by column; NULL sorts before any value (as in
+    SQLite's ORDER BY), so a plain row-value comparison won't do: it is
+    never true once a NULL is involved.
+    """
+    def beyond(col, value):
+        if descending:
+            return (f"({col} < ? OR {col} IS NULL)", [value]) if value is not None else (None, [])
+        return (f"{col} > ?", [value]) if value is not None else (f"{col} IS NOT NULL", [])
+
+    terms = []
+    params = []
+    for i, (col, value) in enumerate(zip(order_by, key)):
+        test, test_params = beyond(col, value)
+        if test is None:
+            continue  # nothing sorts beyond NULL in this direction
+        terms.append(" AND ".join([f"{c} IS ?" for c in order_by[:i]] + [test]))
+        params.extend(key[:i])
+        params.extend(test_params)
+    if not terms:
+        return "0", []
+
+    # Redundant bound on the leading column lets SQLite seek in its index
+    lead, value = order_by[0], key[0]
+    if value is not None:
+        bound = f"({lead} <= ? OR {lead} IS NULL)" if descending else f"{lead} >= ?"
+        return f"{bound} AND ({' OR '.join(terms)})", [value] + params
+    return " OR ".join(terms), params
+
+
+def fetch_page(table, columns, order_by, after=None, limit=200, offset=0, descending=False):
+    """Keyset-paginated read of `table`.
+
+    `order_by` must end in a unique column so keys are total. `after` is
+    the order_by key of the last row already seen (None for the first
+    page); `offset` skips further rows past it when jumping ahead.
+    Table and column names come from code, never from user input.
+    """
+    direction = "DESC" if descending else "ASC"
+    order = ", ".join(f"{col} {direction}" for col in order_by)
+    select = ", ".join(columns)
+    sql = f"SELECT {select} FROM {table}"
+    params = []
+
+    if after is not None:
+        where, params = _after_key(order_by, tuple(after), descending)
+        sql += f" WHERE {where}"
+
+    sql += f" ORDER BY {order} LIMIT ? OFFSET ?;"
+    params.extend((limit, offset))
+
+    cursor = get_connection().cursor()
+    cursor.execute(sql, params)
+    return cursor.fetchall()
+
+# Fuzzy matches are only added when exact matching finds fewer rows than
+# this, and must share at least this fraction of the query's trigrams.
+FUZZY_BELOW = 5
+FUZZY_MIN_SHARED = 0.3
+
+
+def _fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def search_catalogue(query, limit=50):
+    """Search titles and filenames; returns [(kind, filename, title)] best first.
+
+    Every word must appear (as a substring with the trigram tokenizer, as
+    a prefix otherwise). If that finds almost nothing, rows sharing most
+    of the query's trigrams are added as fuzzy matches, which tolerates
+    typos.
+    """
+    words = query.split()
+    if not words:
+        return []
+
+    cursor = get_connection().cursor()
+
+    long_words = [w for w in words if len(w) >= 3]
+    short_words = [w for w in words if len(w) < 3]
+
+    sql = "SELECT kind, filename, title FROM CatalogueSearch"
+    clauses, params = [], []
+    if long_words:
+        clauses.append("CatalogueSearch MATCH ?")
+        suffix = "" if SEARCH_TOKENIZER == "trigram" else "*"
+        params.append(" AND ".join(_fts_phrase(w) + suffix for w in long_words))
+    for word in short_words:
+        # Too short for trigrams; fall back to a prefix match on either column
+        clauses.append("(title LIKE ? OR filename LIKE ?)")
+        params.extend((word + "%", word + "%"))
+    sql += " WHERE " + " AND ".join(clauses)
+    if long_words:
+        sql += " ORDER BY bm25(CatalogueSearch)"
+    sql += " LIMIT ?;"
+    cursor.execute(sql, params + [limit])
+    results = cursor.fetchall()
+
+    text = " ".join(words).lower()
+    if len(results) < FUZZY_BELOW and SEARCH_TOKENIZER == "trigram":
+        grams = {text[i:i + 3] for i in range(len(text) - 2)}
+        grams = {g for g in grams if " " not in g}
+        if grams:
+            seen = {row[1] for row in results}
+            cursor.execute("""
+                SELECT kind, filename, title FROM CatalogueSearch
+                WHERE CatalogueSearch MATCH ?
+                ORDER BY bm25(CatalogueSearch)
+                LIMIT ?;
+            """, (" OR ".join(_fts_phrase(g) for g in grams), limit * 4))
+            for row in cursor.fetchall():
+                haystack = f"{row[2] or ''} {row[1]}".lower()
+                shared = sum(g in haystack for g in grams)
+                if row[1] not in seen and shared >= FUZZY_MIN_SHARED * len(grams):
+                    seen.add(row[1])
+                    results.append(row)
+                    if len(results) >= limit:
+                        break
+
+    return results
+
 def insert_test_data():
-    conn = get_connection()
-    cursor = conn.cursor()
+    with transaction() as conn:
+        cursor = conn.cursor()
 
-    # ----- Movies -----
-    movies = [
-        ("avengers.mp4", "The Avengers"),
-        ("inception.mkv", "Inception"),
-        ("zootopia.mp4", "Zootopia")
-    ]
+        # ----- Movies -----
+        movies = [
+            ("avengers.mp4", "The Avengers"),
+            ("inception.mkv", "Inception"),
+            ("zootopia.mp4", "Zootopia")
+        ]
 
-    for filename, movieName in movies:
-        try:
-            cursor.execute("INSERT INTO MovieEntry (filename, movieName) VALUES (?, ?);",
-                           (filename, movieName))
-        except sqlite3.IntegrityError:
-            pass  # already exists
-
-    # ----- TV Shows -----
-    tv_entries = [
-        ("bb_s01e01.mkv", "Breaking Bad", 1, 1),
-        ("bb_s01e02.mkv", "Breaking Bad", 1, 2),
-        ("bb_s02e01.mkv", "Breaking Bad", 2, 1),
-        ("lost_s01e01.mp4", "Lost", 1, 1),
-        ("lost_s01e02.mp4", "Lost", 1, 2),
-        ("lost_s02e01.mp4", "Lost", 2, 1)
-    ]
-
-    for filename, seriesName, season, episode in tv_entries:
-        try:
-            cursor.execute(
-                "INSERT INTO TVEntry (filename, seriesName, season, episode) VALUES (?, ?, ?, ?);",
-                (filename, seriesName, season, episode)
-            )
-        except sqlite3.IntegrityError:
-            pass  # already exists
+        for filename, movieName in movies:
+            try:
+                cursor.execute("INSERT INTO MovieEntry (filename, movieName) VALUES (?, ?);",
+                               (filename, movieName))
+            except sqlite3.IntegrityError:
+                pass  # already exists
 
-    conn.commit()
-    conn.close()
+        # ----- TV Shows -----
+        tv_entries = [
+            ("bb_s01e01.mkv", "Breaking Bad", 1, 1),
+            ("bb_s01e02.mkv", "Breaking Bad", 1, 2),
+            ("bb_s02e01.mkv", "Breaking Bad", 2, 1),
+            ("lost_s01e01.mp4", "Lost", 1, 1),
+            ("lost_s01e02.mp4", "Lost", 1, 2),
+            ("lost_s02e01.mp4", "Lost", 2, 1)
+        ]
+
+        for filename, seriesName, season, episode in tv_entries:
+            try:
+                cursor.execute(
+                    "INSERT INTO TVEntry (filename, seriesName, season, episode) VALUES (?, ?, ?, ?);",
+                    (filename, seriesName, season, episode)
+                )
+            except sqlite3.IntegrityError:
+                pass  # already exists
+
+        _written("MovieEntry", [row[0] for row in movies])
+        _written("TVEntry", [row[0] for row in tv_entries])
 
     print("Test data inserted.")
 
 def get_paths():
-    conn = get_connection()
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute("SELECT path FROM Pathlist ORDER BY path ASC;")
-    rows = cursor.fetchall()
-    conn.close()
-    return [row[0] for row in rows]
+    return [row[0] for row in cursor.fetchall()]
 
 
 def add_path(path):
-    conn = get_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute("INSERT INTO Pathlist (path) VALUES (?);", (path,))
+        get_connection().execute("INSERT INTO Pathlist (path) VALUES (?);", (path,))
     except sqlite3.IntegrityError:
         pass  # already exists
-    conn.commit()
-    conn.close()
 
 
 def remove_path(path):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM Pathlist WHERE path=?;", (path,))
-    conn.commit()
-    conn.close()
+    get_connection().execute("DELETE FROM Pathlist WHERE path=?;", (path,))
 
 
 def update_path(old_path, new_path):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE Pathlist SET path=? WHERE path=?;", (new_path, old_path))
-    conn.commit()
-    conn.close()
+    get_connection().execute("UPDATE Pathlist SET path=? WHERE path=?;", (new_path, old_path))
+
+
+def get_scan_profiles():
+    """{path: (extensions, excludes, max_depth, follow_symlinks)} for every root.
+
+    Paths are normalised ("/media/" → "/media"), as walkers and the watcher
+    normalise the roots they look up.
+    """
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT path, extensions, excludes, max_depth, follow_symlinks FROM Pathlist;")
+    return {os.path.normpath(row[0]): row[1:] for row in cursor.fetchall()}
+
+
+def set_scan_profile(path, extensions, excludes, max_depth, follow_symlinks):
+    """Store a root's scan settings and drop its file index.
+
+    Cached listings only hold what the old settings walked into, so the
+    next walk lists the root afresh.
+    """
+    with transaction() as conn:
+        conn.execute("""
+            UPDATE Pathlist SET extensions=?, excludes=?, max_depth=?, follow_symlinks=?
+            WHERE path=?;
+        """, (extensions, excludes, max_depth, follow_symlinks, path))
+        root = os.path.normpath(path)
+        low, high = _subtree_bounds(root)
+        conn.execute("DELETE FROM DirIndex WHERE path=? OR (path >= ? AND path < ?);",
+                     (root, low, high))
+        conn.execute("DELETE FROM FileIndex WHERE dir=? OR (dir >= ? AND dir < ?);",
+                     (root, low, high))
 
 def add_movie_entry(filename, movieName):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT OR IGNORE INTO MovieEntry (filename, movieName) VALUES (?, ?);",
-                   (filename, movieName))
-    conn.commit()
-    conn.close()
+    """Raises sqlite3.IntegrityError if `filename` is already catalogued."""
+    get_connection().execute(
+        "INSERT INTO MovieEntry (filename, movieName) VALUES (?, ?);",
+        (filename, movieName)
+    )
+    _written("MovieEntry", [filename])
 
 
 def add_tv_entry(filename, seriesName, season, episode):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT OR IGNORE INTO TVEntry (filename, seriesName, season, episode) VALUES (?, ?, ?, ?);",
+    """Raises sqlite3.IntegrityError if `filename` or the episode is already catalogued."""
+    get_connection().execute(
+        "INSERT INTO TVEntry (filename, seriesName, season, episode) VALUES (?, ?, ?, ?);",
         (filename, seriesName, season, episode)
     )
-    conn.commit()
-    conn.close()
+    _written("TVEntry", [filename])
+
+
+def add_entries(movies, tv_entries):
+    """Insert many catalogue entries with one executemany per table, in one transaction.
+
+    movies:     (filename, movieName)
+    tv_entries: (filename, seriesName, season, episode)
+    Returns the filenames actually inserted. Rows whose filename is already
+    catalogued, or whose episode already is, are skipped.
+    """
+    movies = list(movies)
+    tv_entries = list(tv_entries)
+    inserted = []
+    with transaction() as conn:
+        for table, rows, sql in (
+            ("MovieEntry", movies,
+             "INSERT OR IGNORE INTO MovieEntry (filename, movieName) VALUES (?, ?);"),
+            ("TVEntry", tv_entries,
+             "INSERT OR IGNORE INTO TVEntry (filename, seriesName, season, episode) VALUES (?, ?, ?, ?);"),
+        ):
+            if not rows:
+                continue
+            # INSERT OR IGNORE doesn't say which rows it skipped: compare before and after
+            names = list(dict.fromkeys(row[0] for row in rows))
+            before = _existing_in(table, names)
+            conn.executemany(sql, rows)
+            new = _existing_in(table, names) - before
+            added = [name for name in names if name in new]
+            _written(table, added)
+            inserted.extend(added)
+    return inserted
 
 
 def filename_exists(filename):
-    conn = get_connection()
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
 
     # Check MovieEntry
     cursor.execute("SELECT 1 FROM MovieEntry WHERE filename=?;", (filename,))
     if cursor.fetchone():
-        conn.close()
         return True
 
     # Check TVEntry
     cursor.execute("SELECT 1 FROM TVEntry WHERE filename=?;", (filename,))
     if cursor.fetchone():
-        conn.close()
         return True
 
-    conn.close()
     return False
 
+# Stay under SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds (999).
+IN_CHUNK_SIZE = 900
+
+
+def _existing_in(table, filenames):
+    """Subset of `filenames` present in `table`."""
+    names = list(filenames)
+    found = set()
+    cursor = get_connection().cursor()
+    for start in range(0, len(names), IN_CHUNK_SIZE):
+        chunk = names[start:start + IN_CHUNK_SIZE]
+        cursor.execute(f"SELECT filename FROM {table} WHERE filename IN ({','.join('?' * len(chunk))});",
+                       chunk)
+        found.update(row[0] for row in cursor.fetchall())
+    return found
+
+
+def get_all_filenames():
+    """Return every catalogued filename (movies and TV) as a set."""
+    cursor = get_connection().cursor()
+    cursor.execute("""
+        SELECT filename FROM MovieEntry
+        UNION
+        SELECT filename FROM TVEntry;
+    """)
+    return {row[0] for row in cursor.fetchall()}
+
+def _subtree_bounds(root):
+    """Range covering every path strictly below `root` (for index-friendly scans)."""
+    prefix = root.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+def get_file_index(root):
+    """Load the stored index for everything under `root`.
+
+    Returns (dirs, files):
+      dirs:  {dir_path: (mtime, [child dir paths])}
+      files: {dir_path: [(filename, size, mtime)]}
+    """
+    low, high = _subtree_bounds(root)
+    cursor = get_connection().cursor()
+
+    dirs = {}
+    cursor.execute("""
+        SELECT path, parent, mtime FROM DirIndex
+        WHERE path=? OR (path >= ? AND path < ?);
+    """, (root, low, high))
+    rows = cursor.fetchall()
+    for path, parent, mtime in rows:
+        dirs[path] = (mtime, [])
+    for path, parent, mtime in rows:
+        if parent in dirs and path != root:
+            dirs[parent][1].append(path)
+
+    files = {}
+    cursor.execute("""
+        SELECT dir, filename, size, mtime FROM FileIndex
+        WHERE dir=? OR (dir >= ? AND dir < ?);
+    """, (root, low, high))
+    for dirpath, filename, size, mtime in cursor.fetchall():
+        files.setdefault(dirpath, []).append((filename, size, mtime))
+
+    return dirs, files
+
+
+def save_file_index(listed_dirs, removed_dirs=()):
+    """Write back directories that were re-listed during a walk.
+
+    listed_dirs:  [(dir_path, parent, dir_mtime, [(filename, size, mtime)])]
+    removed_dirs: directory paths that no longer exist
+    """
+    with transaction() as conn:
+        cursor = conn.cursor()
+        for path in removed_dirs:
+            cursor.execute("DELETE FROM DirIndex WHERE path=?;", (path,))
+            cursor.execute("DELETE FROM FileIndex WHERE dir=?;", (path,))
+
+        for path, parent, dir_mtime, entries in listed_dirs:
+            cursor.execute(
+                "INSERT OR REPLACE INTO DirIndex (path, parent, mtime) VALUES (?, ?, ?);",
+                (path, parent, dir_mtime)
+            )
+            cursor.execute("DELETE FROM FileIndex WHERE dir=?;", (path,))
+            cursor.executemany(
+                "INSERT OR REPLACE INTO FileIndex (path, dir, filename, size, mtime, dir_mtime) "
+                "VALUES (?, ?, ?, ?, ?, ?);",
+                [(os.path.join(path, name), path, name, size, mtime, dir_mtime)
+                 for name, size, mtime in entries]
+            )
+
+def get_file_identities(filenames):
+    """Stored fingerprints for `filenames`: {filename: (path, size, mtime, hash)}."""
+    names = list(set(filenames))
+    found = {}
+    cursor = get_connection().cursor()
+
+    for start in range(0, len(names), IN_CHUNK_SIZE):
+        chunk = names[start:start + IN_CHUNK_SIZE]
+        marks = ",".join("?" * len(chunk))
+        cursor.execute(f"""
+            SELECT filename, path, size, mtime, hash FROM FileIdentity
+            WHERE filename IN ({marks});
+        """, chunk)
+        for filename, path, size, mtime, digest in cursor.fetchall():
+            found[filename] = (path, size, mtime, digest)
+
+    return found
+
+
+def save_file_identities(rows):
+    """rows: (filename, path, size, mtime, hash)"""
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO FileIdentity (filename, path, size, mtime, hash) "
+            "VALUES (?, ?, ?, ?, ?);",
+            rows
+        )
+
+
+def get_indexed_stats(paths):
+    """(size, mtime) recorded by the last walk: {path: (size, mtime)}."""
+    paths = list(set(paths))
+    found = {}
+    cursor = get_connection().cursor()
+
+    for start in range(0, len(paths), IN_CHUNK_SIZE):
+        chunk = paths[start:start + IN_CHUNK_SIZE]
+        marks = ",".join("?" * len(chunk))
+        cursor.execute(f"SELECT path, size, mtime FROM FileIndex WHERE path IN ({marks});", chunk)
+        for path, size, mtime in cursor.fetchall():
+            found[path] = (size, mtime)
+
+    return found
+
+
+def get_uncatalogued_files_by_size(sizes):
+    """Indexed files of the given sizes whose name isn't catalogued: [(path, filename, size, mtime)]."""
+    sizes = list(set(sizes))
+    rows = []
+    cursor = get_connection().cursor()
+
+    for start in range(0, len(sizes), IN_CHUNK_SIZE):
+        chunk = sizes[start:start + IN_CHUNK_SIZE]
+        marks = ",".join("?" * len(chunk))
+        cursor.execute(f"""
+            SELECT path, filename, size, mtime FROM FileIndex
+            WHERE size IN ({marks})
+              AND filename NOT IN (SELECT filename FROM MovieEntry)
+              AND filename NOT IN (SELECT filename FROM TVEntry);
+        """, chunk)
+        rows.extend(cursor.fetchall())
+
+    return rows
+
+
+def get_indexed_files(roots, extensions=None):
+    """Every indexed file under `roots`: [(path, size)].
+
+    `extensions` filters by lowercase suffix. Nested roots don't repeat
+    files, since FileIndex is keyed by path.
+    """
+    cursor = get_connection().cursor()
+    rows = {}
+    for root in roots:
+        root = os.path.normpath(root)
+        low, high = _subtree_bounds(root)
+        cursor.execute("""
+            SELECT path, filename, size FROM FileIndex
+            WHERE dir=? OR (dir >= ? AND dir < ?);
+        """, (root, low, high))
+        for path, filename, size in cursor.fetchall():
+            if extensions is None or filename.lower().endswith(extensions):
+                rows[path] = size
+    return list(rows.items())
+
+
+def rename_entries(renames):
+    """Point catalogue entries at new filenames: rows of (old_filename, new_filename).
+
+    The entry keeps its title/season/episode; its stored fingerprint moves with it.
+    """
+    renames = list(renames)
+    with transaction() as conn:
+        for table in ("MovieEntry", "TVEntry", "FileIdentity"):
+            conn.executemany(
+                f"UPDATE OR IGNORE {table} SET filename=? WHERE filename=?;",
+                [(new, old) for old, new in renames]
+            )
+        names = [name for pair in renames for name in pair]
+        _written("MovieEntry", names)
+        _written("TVEntry", names)
+
+def get_filemap():
+    """The cached filename → path map: {filename: (path, verified)}."""
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT filename, path, verified FROM FileMap;")
+    return {filename: (path, verified) for filename, path, verified in cursor.fetchall()}
+
+
+def save_filemap(paths, removed=(), replace=False):
+    """Record {filename: path} as seen now and forget `removed` filenames.
+
+    With replace=True the cache becomes exactly `paths` (after a full load).
+    """
+    now = time.time()
+    with transaction() as conn:
+        if replace:
+            conn.execute("DELETE FROM FileMap;")
+        conn.executemany("DELETE FROM FileMap WHERE filename=?;", [(f,) for f in removed])
+        conn.executemany(
+            "INSERT OR REPLACE INTO FileMap (filename, path, verified) VALUES (?, ?, ?);",
+            [(filename, path, now) for filename, path in paths.items()]
+        )
+
+
+def confirm_filemap(seen, gone):
+    """Apply a background re-check of cached paths.
+
+    seen: {filename: path} still on disk; gone: [(filename, path)] not.
+    Each row is only touched if it still holds the path that was checked,
+    so a Load or the watcher re-pointing it meanwhile wins.
+    """
+    now = time.time()
+    with transaction() as conn:
+        conn.executemany("DELETE FROM FileMap WHERE filename=? AND path=?;", gone)
+        conn.executemany(
+            "UPDATE FileMap SET verified=? WHERE filename=? AND path=?;",
+            [(now, filename, path) for filename, path in seen.items()]
+        )
+
+
+def existing_media_info(hashes, with_ffprobe=False):
+    """The subset of fingerprint `hashes` that already have a MediaInfo row.
+
+    With `with_ffprobe`, rows ffprobe was never tried on don't count:
+    neither ffprobe read them nor did it fail on them (probe_failed).
+    """
+    hashes = list(set(hashes))
+    found = set()
+    cursor = get_connection().cursor()
+    retry = " AND (probed_with = 'ffprobe' OR probe_failed)"
+
+    for start in range(0, len(hashes), IN_CHUNK_SIZE):
+        chunk = hashes[start:start + IN_CHUNK_SIZE]
+        marks = ",".join("?" * len(chunk))
+        cursor.execute(f"SELECT hash FROM MediaInfo WHERE hash IN ({marks})"
+                       f"{retry if with_ffprobe else ''};", chunk)
+        found.update(row[0] for row in cursor.fetchall())
+
+    return found
+
+
+def save_media_info(rows):
+    """rows: (hash, probed_with, probe_failed, duration, width, height,
+    video_codec, audio_codec, bitrate)"""
+    with transaction() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO MediaInfo (hash, probed_with, probe_failed, duration, "
+            "width, height, video_codec, audio_codec, bitrate) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);",
+            rows
+        )
+
+
+def get_media_info(filenames):
+    """{filename: (duration, width, height, video_codec, audio_codec, bitrate)}"""
+    names = list(set(filenames))
+    found = {}
+    cursor = get_connection().cursor()
+
+    for start in range(0, len(names), IN_CHUNK_SIZE):
+        chunk = names[start:start + IN_CHUNK_SIZE]
+        marks = ",".join("?" * len(chunk))
+        cursor.execute(f"""
+            SELECT i.filename, m.duration, m.width, m.height,
+                   m.video_codec, m.audio_codec, m.bitrate
+            FROM FileIdentity i JOIN MediaInfo m ON m.hash = i.hash
+            WHERE i.filename IN ({marks});
+        """, chunk)
+        for filename, *info in cursor.fetchall():
+            found[filename] = tuple(info)
+
+    return found
+
+
 def update_movie_entry(filename, movieName):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE MovieEntry SET movieName=? WHERE filename=?;", (movieName, filename))
-    conn.commit()
-    conn.close()
+    get_connection().execute(
+        "UPDATE MovieEntry SET movieName=? WHERE filename=?;",
+        (movieName, filename)
+    )
+    _written("MovieEntry", [filename])
 
 def update_tv_entry(filename, seriesName, season, episode):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
+    get_connection().execute("""
         UPDATE TVEntry
         SET seriesName=?, season=?, episode=?
         WHERE filename=?;
     """, (seriesName, season, episode, filename))
-    conn.commit()
-    conn.close()
+    _written("TVEntry", [filename])
+
+def update_movie_entries(rows):
+    """Bulk form of update_movie_entry: rows of (filename, movieName)."""
+    rows = list(rows)
+    with transaction() as conn:
+        conn.executemany(
+            "UPDATE MovieEntry SET movieName=? WHERE filename=?;",
+            [(movieName, filename) for filename, movieName in rows]
+        )
+        _written("MovieEntry", [row[0] for row in rows])
+
+def update_tv_entries(rows):
+    """Bulk form of update_tv_entry: rows of (filename, seriesName, season, episode)."""
+    rows = list(rows)
+    with transaction() as conn:
+        conn.executemany("""
+            UPDATE TVEntry
+            SET seriesName=?, season=?, episode=?
+            WHERE filename=?;
+        """, [(seriesName, season, episode, filename)
+              for filename, seriesName, season, episode in rows])
+        _written("TVEntry", [row[0] for row in rows])
 
 def delete_movie_entry(filename):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM MovieEntry WHERE filename=?;", (filename,))
-    conn.commit()
-    conn.close()
+    get_connection().execute("DELETE FROM MovieEntry WHERE filename=?;", (filename,))
+    _written("MovieEntry", [filename])
 
 def delete_tv_entry(filename):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM TVEntry WHERE filename=?;", (filename,))
-    conn.commit()
-    conn.close()
+    get_connection().execute("DELETE FROM TVEntry WHERE filename=?;", (filename,))
+    _written("TVEntry", [filename])
 
 
 
@@ -227,4 +1143,3 @@ def delete_tv_entry(filename):
 if __name__ == "__main__":
     initialize_database()
     insert_test_data()
-
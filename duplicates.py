@@ -0,0 +1,94 @@
+"""Find the same video stored more than once across the Pathlist roots.
+
+Candidates are narrowed in stages, each only over what survived the last:
+  1. equal size (from the file index, no I/O); hard links to one inode
+     are collapsed since deleting them frees nothing
+  2. equal partial hash (head/middle/tail, see identity.py)
+  3. optionally, equal full streaming hash
+Hashing runs in identity's process pool. Qt-free.
+"""
+import os
+from collections import defaultdict, namedtuple
+
+import database
+import identity
+from scan_profile import load_profiles
+from scanner import ScanCancelled, iter_indexed_batches, relative_path
+
+# size in bytes; paths sorted
+DuplicateGroup = namedtuple("DuplicateGroup", "size paths")
+
+
+def reclaimable(group):
+    """Bytes freed by keeping one copy of `group`."""
+    return group.size * (len(group.paths) - 1)
+
+
+def _multi(groups):
+    return {key: paths for key, paths in groups.items() if len(paths) > 1}
+
+
+def _split_by_hash(groups, hasher):
+    """Regroup every path in `groups` by (size, digest)."""
+    paths = [path for members in groups.values() for path in members]
+    split = defaultdict(list)
+    for path, fingerprint in identity.hash_files(paths, hasher=hasher).items():
+        split[fingerprint].append(path)
+    return _multi(split)
+
+
+def find_duplicates(roots, full=False, cancel=None, progress=None):
+    """Return [DuplicateGroup], largest reclaimable space first.
+
+    The file index for each root is brought up to date first (cheap when
+    nothing changed). `progress(message)` is called between stages.
+    """
+    def check():
+        if cancel is not None and cancel.is_set():
+            raise ScanCancelled(", ".join(roots))
+
+    def report(message):
+        if progress is not None:
+            progress(message)
+
+    report("Indexing roots")
+    profiles = load_profiles(roots)
+    for root, profile in profiles.items():
+        if os.path.isdir(root):
+            for _ in iter_indexed_batches(root, profile.extensions, cancel=cancel,
+                                          profile=profile):
+                pass
+
+    check()
+    by_size = defaultdict(list)
+    for root, profile in profiles.items():
+        root = os.path.normpath(root)
+        for path, size in database.get_indexed_files([root], profile.extensions):
+            if size and profile.wants_file(relative_path(root, path)):
+                by_size[size].append(path)
+    groups = _multi(by_size)
+
+    # Hard links (or one file reached through two roots) aren't duplicates
+    for size, paths in list(groups.items()):
+        seen = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            seen.setdefault((st.st_dev, st.st_ino), path)
+        groups[size] = list(seen.values())
+    groups = _multi(groups)
+
+    check()
+    report(f"Comparing partial hashes of {sum(map(len, groups.values()))} files")
+    groups = _split_by_hash(groups, identity.partial_hash)
+
+    if full:
+        check()
+        report(f"Verifying {sum(map(len, groups.values()))} files with a full hash")
+        groups = _split_by_hash(groups, identity.full_hash)
+
+    result = [DuplicateGroup(key[0], sorted(paths)) for key, paths in groups.items()]
+    result.sort(key=lambda group: (-reclaimable(group), group.paths[0]))
+    return result
@@ -0,0 +1,95 @@
+"""Guess catalogue entries from media file paths.
+
+Recognises S01E02 / s1.e2, 1x02, and "Series/Season 1/Episode 02" folder
+layouts for TV, and "Title (Year)" / "Title.Year.1080p" for movies. All
+patterns are compiled once at import; parse_batch() runs over a whole
+scan result.
+"""
+import os
+import re
+from collections import namedtuple
+
+# kind is "movie" or "tv"; season/episode are None for movies
+ParsedEntry = namedtuple("ParsedEntry", "kind filename path title season episode")
+
+SXXEYY = re.compile(r"\bS(\d{1,2})[ ._-]?E(\d{1,3})(?!\d)", re.IGNORECASE)
+NXNN = re.compile(r"(?<![\dx])(\d{1,2})x(\d{2,3})(?!\d)", re.IGNORECASE)
+SEASON_DIR = re.compile(r"^(?:season|series|s)[ ._-]*(\d{1,2})$", re.IGNORECASE)
+EPISODE_NAME = re.compile(r"^(?:episode|ep|e)?[ ._-]*(\d{1,3})(?!\d)", re.IGNORECASE)
+YEAR = re.compile(r"[ ._(\[-]((?:19|20)\d{2})(?=[ ._)\]-]|$)")
+
+# Release tags that end a title when there is no year to cut at
+RELEASE_TAG = re.compile(
+    r"[ ._-](?:2160p|1080p|720p|480p|4k|uhd|hdr|bluray|blu-ray|brrip|bdrip|"
+    r"web-?dl|webrip|hdtv|dvdrip|x264|x265|h\.?264|h\.?265|hevc|aac|ac3|dts|"
+    r"proper|repack|extended|remastered)\b.*$",
+    re.IGNORECASE,
+)
+SEPARATORS = re.compile(r"[._]+")
+TRAILING_JUNK = re.compile(r"[\s\-\[\(]+$")
+
+
+def clean_title(text):
+    """Turn 'The.Office.US' into 'The Office US'."""
+    text = SEPARATORS.sub(" ", text)
+    text = TRAILING_JUNK.sub("", text)
+    return " ".join(text.split())
+
+
+def _release_year(stem):
+    """The year match a movie title ends at, or None.
+
+    Titles can contain year-like numbers ("Blade Runner 2049 (2017)",
+    "1917.2019.1080p"), so a year in brackets wins, else the last one
+    before the release tags.
+    """
+    tag = RELEASE_TAG.search(stem)
+    end = tag.start() if tag else len(stem)
+    years = [match for match in YEAR.finditer(stem, 0, end) if match.start() > 0]
+    bracketed = [match for match in years
+                 if stem[match.start()] in "([" and stem[match.end():match.end() + 1] in (")", "]")]
+    if bracketed:
+        return bracketed[-1]
+    return years[-1] if years else None
+
+
+def _series_from_dirs(path, skip_season_dir):
+    parent = os.path.dirname(path)
+    if skip_season_dir and SEASON_DIR.match(os.path.basename(parent)):
+        parent = os.path.dirname(parent)
+    return clean_title(os.path.basename(parent))
+
+
+def parse_path(path):
+    """Return a ParsedEntry guess for one file path."""
+    filename = os.path.basename(path)
+    stem = os.path.splitext(filename)[0]
+
+    # S01E02 and 1x02 in the filename itself
+    for pattern in (SXXEYY, NXNN):
+        match = pattern.search(stem)
+        if match:
+            title = clean_title(stem[:match.start()]) or _series_from_dirs(path, True)
+            return ParsedEntry("tv", filename, path, title,
+                               int(match.group(1)), int(match.group(2)))
+
+    # Series/Season 1/Episode 02.mkv
+    season_dir = os.path.basename(os.path.dirname(path))
+    season_match = SEASON_DIR.match(season_dir)
+    if season_match:
+        episode_match = EPISODE_NAME.match(stem)
+        if episode_match:
+            return ParsedEntry("tv", filename, path, _series_from_dirs(path, True),
+                               int(season_match.group(1)), int(episode_match.group(1)))
+
+    # Movies: cut at the year if there is one, else at the first release tag
+    year_match = _release_year(stem)
+    if year_match:
+        title = f"{clean_title(stem[:year_match.start()])} ({year_match.group(1)})"
+    else:
+        title = clean_title(RELEASE_TAG.sub("", stem)) or clean_title(stem)
+    return ParsedEntry("movie", filename, path, title, None, None)
+
+
+def parse_batch(paths):
+    return [parse_path(path) for path in paths]
@@ -0,0 +1,164 @@
+"""Model and delegate behind the Paths tab's Found Files list.
+
+Each found file is one string in a list model; the "Create Entry" button
+is painted by the delegate and its clicks are handled in editorEvent, so
+no widgets are created per row and memory grows only with the paths
+themselves. Scan batches are appended with one insert notification each.
+"""
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QEvent, QRect, QSize, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+BUTTON_TEXT = "Create Entry"
+BUTTON_MARGIN = 4
+
+
+class FoundFilesModel(QAbstractListModel):
+    """Full paths of files found on disk but not catalogued, in discovery order."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._paths = []
+        self._row_of = {}  # path → row
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._paths)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return self._paths[index.row()]
+        return None
+
+    def __contains__(self, path):
+        return path in self._row_of
+
+    def paths(self):
+        return list(self._paths)
+
+    def path_at(self, row):
+        return self._paths[row]
+
+    def append(self, paths):
+        """Add new paths at the end (duplicates are skipped) with one insert."""
+        new = []
+        seen = set()
+        for path in paths:
+            if path not in self._row_of and path not in seen:
+                seen.add(path)
+                new.append(path)
+        if not new:
+            return
+
+        first = len(self._paths)
+        self.beginInsertRows(QModelIndex(), first, first + len(new) - 1)
+        self._paths.extend(new)
+        for row, path in enumerate(new, start=first):
+            self._row_of[path] = row
+        self.endInsertRows()
+
+    def remove(self, paths):
+        """Remove paths, one notification per contiguous run of rows."""
+        rows = sorted({self._row_of[p] for p in paths if p in self._row_of}, reverse=True)
+        if not rows:
+            return
+
+        # Walk runs from the bottom so earlier row numbers stay valid
+        end = start = rows[0]
+        for row in rows[1:] + [None]:
+            if row is not None and row == start - 1:
+                start = row
+                continue
+            self.beginRemoveRows(QModelIndex(), start, end)
+            del self._paths[start:end + 1]
+            self.endRemoveRows()
+            if row is not None:
+                end = start = row
+
+        self._row_of = {path: row for row, path in enumerate(self._paths)}
+
+    def replace(self, old_path, new_path):
+        """A found file moved: update its row in place."""
+        row = self._row_of.pop(old_path, None)
+        if row is None:
+            return
+        if new_path in self._row_of:
+            self._row_of[old_path] = row
+            self.remove([old_path])
+            return
+        self._paths[row] = new_path
+        self._row_of[new_path] = row
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def clear(self):
+        self.beginResetModel()
+        self._paths = []
+        self._row_of = {}
+        self.endResetModel()
+
+
+class FoundFileDelegate(QStyledItemDelegate):
+    """Paints the path plus a "Create Entry" button; emits create_requested on click."""
+
+    create_requested = pyqtSignal(str)  # full path
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pressed = None  # row whose button is held down
+
+    def _button_rect(self, option):
+        metrics = option.fontMetrics
+        width = metrics.horizontalAdvance(BUTTON_TEXT) + 24
+        rect = option.rect
+        return QRect(rect.right() - width - BUTTON_MARGIN, rect.top() + BUTTON_MARGIN // 2,
+                     width, rect.height() - BUTTON_MARGIN)
+
+    def sizeHint(self, option, index):
+        height = option.fontMetrics.height() + 12 + BUTTON_MARGIN
+        return QSize(super().sizeHint(option, index).width(), height)
+
+    def paint(self, painter, option, index):
+        button_rect = self._button_rect(option)
+
+        # Text and selection background, kept clear of the button
+        self.initStyleOption(option, index)
+        option.rect = QRect(option.rect.left(), option.rect.top(),
+                            button_rect.left() - option.rect.left() - BUTTON_MARGIN,
+                            option.rect.height())
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, option, painter, option.widget)
+
+        button = QStyleOptionButton()
+        button.rect = button_rect
+        button.text = BUTTON_TEXT
+        button.state = QStyle.StateFlag.State_Enabled
+        if self._pressed == index.row():
+            button.state |= QStyle.StateFlag.State_Sunken
+        else:
+            button.state |= QStyle.StateFlag.State_Raised
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        kind = event.type()
+        if kind not in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease,
+                        QEvent.Type.MouseButtonDblClick):
+            return False
+        if event.button() != Qt.MouseButton.LeftButton:
+            return False
+
+        inside = self._button_rect(option).contains(event.position().toPoint())
+        if kind == QEvent.Type.MouseButtonRelease:
+            pressed, self._pressed = self._pressed, None
+            if pressed is not None and option.widget is not None:
+                option.widget.update(model.index(pressed, 0))  # redraw raised
+            if inside and pressed == index.row():
+                self.create_requested.emit(model.data(index))
+            return inside or pressed is not None
+        if inside:
+            # Swallow the press so clicking the button doesn't change the selection
+            self._pressed = index.row()
+            if option.widget is not None:
+                option.widget.update(index)
+            return True
+        return False
@@ -0,0 +1,131 @@
+"""Content fingerprints for catalogued files.
+
+A fingerprint is the file size plus a BLAKE2b hash of three CHUNK_SIZE
+windows (head, middle, tail) read through mmap, so a multi-GB video costs
+three small reads rather than a full pass. Files are hashed in a process
+pool; fingerprints are stored in FileIdentity and only recomputed when
+the size or mtime seen by the last walk changes.
+
+Qt-free: the GUI runs these functions from a worker thread.
+"""
+import hashlib
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import database
+from scan_profile import profile_for
+
+CHUNK_SIZE = 1024 * 1024
+
+# Read size for full_hash
+STREAM_BLOCK = 4 * 1024 * 1024
+
+# Worker processes for hashing; below POOL_THRESHOLD files it's done inline
+HASH_WORKERS = max(1, min(4, os.cpu_count() or 1))
+POOL_THRESHOLD = 16
+
+
+def partial_hash(path):
+    """Return (size, hex digest) for `path`, or None if it can't be read."""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+
+            if size <= 3 * CHUNK_SIZE:
+                digest.update(f.read())
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    middle = (size - CHUNK_SIZE) // 2
+                    for offset in (0, middle, size - CHUNK_SIZE):
+                        digest.update(mm[offset:offset + CHUNK_SIZE])
+    except (OSError, ValueError):
+        return None
+    return size, digest.hexdigest()
+
+
+def full_hash(path):
+    """Return (size, hex digest) over the whole file, streamed; None if unreadable."""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+            while block := f.read(STREAM_BLOCK):
+                digest.update(block)
+    except OSError:
+        return None
+    return size, digest.hexdigest()
+
+
+def hash_files(paths, workers=HASH_WORKERS, hasher=partial_hash):
+    """Run `hasher` over many files: {path: (size, digest)}; unreadable files are left out."""
+    paths = list(paths)
+    if len(paths) < POOL_THRESHOLD or workers <= 1:
+        results = map(hasher, paths)
+    else:
+        # spawn, not fork: the caller is usually a thread in a Qt process
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            results = list(pool.map(hasher, paths,
+                                    chunksize=max(1, len(paths) // (workers * 4))))
+
+    return {path: result for path, result in zip(paths, results) if result is not None}
+
+
+def refresh_identities(filemap):
+    """Store fingerprints for matched files that are new or changed since last time.
+
+    filemap: {filename: full path}. Returns the number of files hashed.
+    """
+    stored = database.get_file_identities(filemap)
+    stats = database.get_indexed_stats(filemap.values())
+
+    stale = {}
+    for filename, path in filemap.items():
+        stat = stats.get(path)
+        known = stored.get(filename)
+        if stat is None or known is None or known[:3] != (path, stat[0], stat[1]):
+            stale[path] = filename
+
+    hashed = hash_files(stale)
+    rows = []
+    for path, (size, digest) in hashed.items():
+        mtime = stats[path][1] if path in stats else os.path.getmtime(path)
+        rows.append((stale[path], path, size, mtime, digest))
+    if rows:
+        database.save_file_identities(rows)
+    return len(rows)
+
+
+def find_relinks(missing, profiles):
+    """Find where catalogued-but-missing files went.
+
+    Candidates are indexed, uncatalogued files whose size matches a stored
+    fingerprint and whose extension the profile of their root
+    (`profiles`: {root: ScanProfile}) accepts; only those are hashed.
+    Returns [(old_filename, new_filename, path)].
+    """
+    stored = {filename: identity
+              for filename, identity in database.get_file_identities(missing).items()
+              if identity[3] is not None}
+    if not stored:
+        return []
+
+    by_print = {(size, digest): filename for filename, (_, size, _, digest) in stored.items()}
+    candidates = []
+    for row in database.get_uncatalogued_files_by_size({i[1] for i in stored.values()}):
+        _, profile = profile_for(profiles, row[0])
+        if profile is not None and profile.has_extension(row[1]):
+            candidates.append(row)
+
+    relinks = []
+    taken = set()
+    for path, fingerprint in hash_files(row[0] for row in candidates).items():
+        old = by_print.get(fingerprint)
+        new = os.path.basename(path)
+        if old is not None and old not in taken and new not in taken:
+            taken.update((old, new))
+            relinks.append((old, new, path))
+    return relinks
@@ -0,0 +1,164 @@
+"""Review-and-import dialog for catalogue entries guessed from filenames."""
+import os
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableView,
+    QHeaderView
+)
+
+import database
+from filename_parser import parse_batch
+
+TYPE_LABELS = {"movie": "Movie", "tv": "TV"}
+
+
+class ProposalModel(QAbstractTableModel):
+    HEADERS = ["Import", "Type", "Title", "Season", "Episode", "File"]
+
+    def __init__(self, proposals, parent=None):
+        super().__init__(parent)
+        # [checked, kind, title, season, episode, path]
+        self.rows = [[True, p.kind, p.title, p.season, p.episode, p.path] for p in proposals]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == 0:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        elif index.column() < 5:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+
+        if column == 0:
+            if role == Qt.ItemDataRole.CheckStateRole:
+                return Qt.CheckState.Checked if row[0] else Qt.CheckState.Unchecked
+            return None
+        if role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return None
+        if column == 1:
+            return TYPE_LABELS[row[1]]
+        value = row[column]
+        return "" if value is None else str(value)
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        row = self.rows[index.row()]
+        column = index.column()
+
+        if column == 0 and role == Qt.ItemDataRole.CheckStateRole:
+            row[0] = Qt.CheckState(value) == Qt.CheckState.Checked
+        elif column == 1 and role == Qt.ItemDataRole.EditRole:
+            text = str(value).strip().lower()
+            if text.startswith("m"):
+                row[1] = "movie"
+            elif text.startswith("t"):
+                row[1] = "tv"
+            else:
+                return False
+        elif column in (3, 4) and role == Qt.ItemDataRole.EditRole:
+            text = str(value).strip()
+            if text and not text.isdigit():
+                return False
+            row[column] = int(text) if text else None
+        elif column == 2 and role == Qt.ItemDataRole.EditRole:
+            row[2] = str(value).strip()
+        else:
+            return False
+
+        self.dataChanged.emit(index, index)
+        return True
+
+    def set_all_checked(self, checked):
+        for row in self.rows:
+            row[0] = checked
+        if self.rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, 0))
+
+    def checked_entries(self):
+        """Split checked rows into (movies, tv_entries, paths, skipped)."""
+        movies, tv_entries, paths = [], [], []
+        skipped = 0
+        for checked, kind, title, season, episode, path in self.rows:
+            if not checked:
+                continue
+            filename = os.path.basename(path)
+            if not title or (kind == "tv" and (season is None or episode is None)):
+                skipped += 1
+                continue
+            if kind == "movie":
+                movies.append((filename, title))
+            else:
+                tv_entries.append((filename, title, season, episode))
+            paths.append(path)
+        return movies, tv_entries, paths, skipped
+
+
+class AutoImportDialog(QDialog):
+    """Show parsed guesses for `paths`; import the checked ones in one transaction."""
+
+    def __init__(self, paths, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Auto Import")
+        self.resize(900, 500)
+        self.imported_paths = []
+        self.imported_filenames = []
+        self.conflicts = []  # checked paths not imported: filename or episode already catalogued
+
+        self.model = ProposalModel(parse_batch(paths), self)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"{len(paths)} files. Review the guesses, then import."))
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.horizontalHeader().setSectionResizeMode(5, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        self.status = QLabel("")
+        layout.addWidget(self.status)
+
+        select_all = QPushButton("Select All")
+        select_none = QPushButton("Select None")
+        import_button = QPushButton("Import Selected")
+        cancel_button = QPushButton("Cancel")
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(select_all)
+        buttons.addWidget(select_none)
+        buttons.addStretch()
+        buttons.addWidget(import_button)
+        buttons.addWidget(cancel_button)
+        layout.addLayout(buttons)
+
+        select_all.clicked.connect(lambda: self.model.set_all_checked(True))
+        select_none.clicked.connect(lambda: self.model.set_all_checked(False))
+        import_button.clicked.connect(self.import_selected)
+        cancel_button.clicked.connect(self.reject)
+
+    def import_selected(self):
+        movies, tv_entries, paths, skipped = self.model.checked_entries()
+        if skipped:
+            self.status.setText(f"{skipped} checked rows need a title (and season/episode for TV).")
+            return
+
+        inserted = set(database.add_entries(movies, tv_entries))
+        self.imported_paths = [path for path in paths if os.path.basename(path) in inserted]
+        self.imported_filenames = [os.path.basename(path) for path in self.imported_paths]
+        self.conflicts = [path for path in paths if os.path.basename(path) not in inserted]
+        self.accept()
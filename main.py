@@ -2,100 +2,333 @@ import sys
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget,
     QTabWidget, QVBoxLayout, QLabel,
-    QListWidget, QTreeWidget, QTreeWidgetItem,
+    QListWidget, QListView, QTreeView,
     QPushButton, QHBoxLayout, QInputDialog,
-    QTableWidget, QTableWidgetItem, QMessageBox
+    QTableView, QMessageBox,
+    QProgressBar, QLineEdit,
+    QTreeWidget, QTreeWidgetItem, QCheckBox
 )
+from PyQt6.QtCore import Qt, QEvent, QTimer, pyqtSignal
 from PyQt6.QtGui import QIcon
-from database import initialize_database
+from database import (
+    initialize_database, close_connections, get_paths,
+    get_filemap, save_filemap
+)
+import catalogue
+from scan_worker import LibraryScanner, IdentityReconciler, DuplicateFinder, FilemapValidator
+from watcher import LibraryWatcher
+from watch_models import MovieListModel, SeriesTreeModel, SearchResultsModel, FILENAME_ROLE
+from search import CatalogueSearch
+from thumbnails import ThumbnailProvider, THUMB_SIZE
+from found_files import FoundFilesModel, FoundFileDelegate
+from data_models import catalogue_edit_buffer, movie_table_model, tv_table_model
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+# Tab order. Only Watch is built up front; the rest on first activation.
+WATCH_TAB, DATA_TAB, PATHS_TAB, DUPLICATES_TAB = range(4)
+
+# Start anyway if the window hasn't painted this long after being shown
+STARTUP_FALLBACK_MS = 500
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # Emitted once the schema is checked and the Watch tab holds data
+    interactive = pyqtSignal()
+
+    def __init__(self, fast_start=True):
+        """With fast_start, the window paints before the database is touched:
+        schema checks and loads run right after the first paint, and the
+        Data/Paths/Duplicates tabs are built when first opened.
+        """
         super().__init__()
         self.setWindowIcon(QIcon("assets/icon.png"))
         self.setWindowTitle("Qurupeco")
         self.resize(900, 600)
 
-        # Initialize DB when app opens
-        initialize_database()
+        self.started = False
+        self.filemap = {}  # filename → full path
+        self.identity_paths = {}  # filename → path recorded with its fingerprint
+        self.catalogued = frozenset()  # filenames the current load matches against
 
-        # Main tab widget
+        # Main tab widget; non-Watch pages start empty
         self.tabs = QTabWidget()
         self.setCentralWidget(self.tabs)
 
-        # -----------------------------------------------------------
-        # WATCH TAB
-        # -----------------------------------------------------------
         self.watch_tab = QWidget()
+        self.data_tab = QWidget()
+        self.paths_tab = QWidget()
+        self.duplicates_tab = QWidget()
+        self.build_watch_tab()
+        self.built_tabs = {WATCH_TAB}
+
+        self.tabs.addTab(self.watch_tab, "Watch")
+        self.tabs.addTab(self.data_tab, "Data")
+        self.tabs.addTab(self.paths_tab, "Paths")
+        self.tabs.addTab(self.duplicates_tab, "Duplicates")
+
+        # Files found by Scan/the watcher that aren't catalogued yet
+        self.found_model = FoundFilesModel(self)
+
+        # Cell edits are buffered and written together; the table models
+        # don't read anything until reloaded
+        self.edit_buffer = catalogue_edit_buffer(self)
+        self.movies_table_model = movie_table_model(self.edit_buffer, self)
+        self.tv_table_model = tv_table_model(self.edit_buffer, self)
+
+        # Background scanner shared by Load and Scan
+        self.scanner = LibraryScanner(self)
+        self.scanner.batch_ready.connect(self.on_scan_batch)
+        self.scanner.progress.connect(self.on_scan_progress)
+        self.scanner.finished.connect(self.on_scan_finished)
+        self.scanner.failed.connect(self.on_scan_failed)
+
+        # Fingerprints: re-link renamed files after a load
+        self.reconciler = IdentityReconciler(self)
+        self.reconciler.relinked.connect(self.on_files_relinked)
+        self.reconciler.finished.connect(self.on_identities_refreshed)
+        self.reconciler.failed.connect(self.on_background_failed)
+
+        self.duplicate_finder = DuplicateFinder(self)
+        self.duplicate_finder.finished.connect(self.on_duplicates_found)
+        self.duplicate_finder.failed.connect(self.on_duplicates_failed)
+
+        self.scan_progress = QProgressBar()
+        self.scan_progress.setRange(0, 0)  # busy indicator
+        self.scan_progress.setMaximumWidth(160)
+        self.cancel_scan_btn = QPushButton("Cancel")
+        self.cancel_scan_btn.clicked.connect(self.scanner.cancel)
+        self.statusBar().addPermanentWidget(self.scan_progress)
+        self.statusBar().addPermanentWidget(self.cancel_scan_btn)
+        self.scan_progress.hide()
+        self.cancel_scan_btn.hide()
+
+        # Live watcher keeps filemap and Found Files current between scans
+        self.watcher = LibraryWatcher(self)
+        self.watcher.files_changed.connect(self.on_files_changed)
+        self.watcher.failed.connect(self.on_background_failed)
+
+        # Cached paths are re-checked by stat in the background after startup
+        self.filemap_validator = FilemapValidator(self)
+        self.filemap_validator.gone.connect(self.on_cached_paths_gone)
+        self.filemap_validator.failed.connect(self.on_background_failed)
+
+        # Connect tab change
+        self.tabs.currentChanged.connect(self.on_tab_change)
+
+        self.edit_buffer.changed.connect(self.on_edits_pending)
+
+        # Every committed catalogue write arrives here, whoever made it
+        catalogue.notifier().changed.connect(self.on_catalogue_changed)
+        self.edit_buffer.failed.connect(self.on_edits_failed)
+
+        # Styles
+        self.setStyleSheet("""
+            QTabBar::tab {
+                background: #444;
+                color: white;
+                padding: 8px 12px;
+                margin: 2px;
+            }
+            QTabBar::tab:selected {
+                background: #d35400;
+                color: white;
+            }
+            QLabel {
+                font-size: 16px;
+                font-weight: bold;
+                color: #ddd;
+            }
+        """)
+
+        if not fast_start:
+            for index in (DATA_TAB, PATHS_TAB, DUPLICATES_TAB):
+                self.ensure_tab(index)
+            self.finish_startup()
+
+    # -----------------------------------------------------------
+    # STARTUP
+    # -----------------------------------------------------------
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.started:
+            # Normally started from the first paint (see eventFilter); this
+            # covers a window that is shown but never painted, e.g. minimised
+            self.tabs.installEventFilter(self)
+            QTimer.singleShot(STARTUP_FALLBACK_MS, self.finish_startup)
+
+    def eventFilter(self, obj, event):
+        if obj is self.tabs and event.type() == QEvent.Type.Paint and not self.started:
+            self.tabs.removeEventFilter(self)
+            QTimer.singleShot(0, self.finish_startup)  # after this paint completes
+        return super().eventFilter(obj, event)
+
+    def finish_startup(self):
+        """Check the schema and fill the Watch tab (once)."""
+        if self.started:
+            return
+        self.started = True
+
+        # Initialize DB when app opens
+        initialize_database()
+        self.check_episode_index()
+
+        # Start from the cached filemap so titles aren't MISSING until Load
+        cached = get_filemap()
+        self.filemap = {filename: path for filename, (path, _) in cached.items()}
+
+        # Load Watch tab immediately
+        self.load_watch_tab()
+        self.load_button.setEnabled(True)
+        self.sync_button.setEnabled(True)
+        self.search_box.setEnabled(True)
+        self.watch_paths()
+        self.filemap_validator.start(cached)
+
+        # A tab opened before startup finished still needs its data
+        if self.tabs.currentIndex() != WATCH_TAB:
+            self.on_tab_change(self.tabs.currentIndex())
+        self.interactive.emit()
+
+    def check_episode_index(self):
+        """Say so if duplicate episodes keep the one-row-per-episode index from being created."""
+        from database import duplicate_episodes, episode_index_exists
+
+        if episode_index_exists():
+            return
+        duplicates = duplicate_episodes()
+        if duplicates:
+            self.statusBar().showMessage(
+                f"{len(duplicates)} episodes are catalogued more than once; "
+                "fix them in the Data tab so new duplicates can be refused")
+
+    def ensure_tab(self, index):
+        """Build a tab's widgets the first time it's needed."""
+        if index in self.built_tabs:
+            return
+        self.built_tabs.add(index)
+        {
+            DATA_TAB: self.build_data_tab,
+            PATHS_TAB: self.build_paths_tab,
+            DUPLICATES_TAB: self.build_duplicates_tab,
+        }[index]()
+
+    # -----------------------------------------------------------
+    # WATCH TAB
+    # -----------------------------------------------------------
+    def build_watch_tab(self):
         self.watch_layout = QVBoxLayout(self.watch_tab)
-        
+
         self.load_button = QPushButton("Load")
-        self.watch_layout.addWidget(self.load_button)
+        self.load_button.setEnabled(False)  # until startup finishes
+        self.sync_button = QPushButton("Sync Library")
+        self.sync_button.setToolTip("Load and Scan in one pass")
+        self.sync_button.setEnabled(False)
+        load_layout = QHBoxLayout()
+        load_layout.addWidget(self.load_button)
+        load_layout.addWidget(self.sync_button)
+        self.watch_layout.addLayout(load_layout)
         self.load_button.clicked.connect(self.load_files)
+        self.sync_button.clicked.connect(self.sync_library)
+
+        # Search box; results replace the Movies/Series lists while it has text
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search titles and filenames…")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setEnabled(False)
+        self.search = CatalogueSearch(self)
+        self.search_model = SearchResultsModel(self.is_present, self)
+        self.search_results = QListView()
+        self.search_results.setUniformItemSizes(True)
+        self.search_results.setModel(self.search_model)
+        self.search_results.clicked.connect(self.on_movie_clicked)
+        self.search_results.hide()
+        self.search_box.textChanged.connect(self.search.set_query)
+        self.search.results_ready.connect(self.on_search_results)
+
+        # Thumbnails are extracted only for rows the views actually paint
+        self.thumbnails = ThumbnailProvider(self.filemap_path, parent=self)
+        self.thumbnails.thumbnail_ready.connect(self.refresh_watch_row)
+        icon_size = THUMB_SIZE / 2
 
         # Movies section
         self.movies_label = QLabel("Movies")
-        self.movies_list = QListWidget()
-        self.movies_list.itemClicked.connect(self.on_movie_clicked)
+        self.movie_model = MovieListModel(self.is_present, self, self.thumbnails.icon)
+        self.movies_list = QListView()
+        self.movies_list.setUniformItemSizes(True)
+        self.movies_list.setIconSize(icon_size)
+        self.movies_list.setModel(self.movie_model)
+        self.movies_list.clicked.connect(self.on_movie_clicked)
 
         # Series section
         self.series_label = QLabel("Series")
-        self.series_tree = QTreeWidget()
-        self.series_tree.setHeaderLabels(["Series / Episodes"])
-        self.series_tree.itemClicked.connect(self.on_tv_clicked)
-
+        self.series_model = SeriesTreeModel(self.is_present, self, self.thumbnails.icon)
+        self.series_tree = QTreeView()
+        self.series_tree.setUniformRowHeights(True)
+        self.series_tree.setIconSize(icon_size)
+        self.series_tree.setModel(self.series_model)
+        self.series_tree.clicked.connect(self.on_tv_clicked)
 
         # Add to Watch layout
+        self.watch_layout.addWidget(self.search_box)
+        self.watch_layout.addWidget(self.search_results)
         self.watch_layout.addWidget(self.movies_label)
         self.watch_layout.addWidget(self.movies_list)
         self.watch_layout.addWidget(self.series_label)
         self.watch_layout.addWidget(self.series_tree)
 
-        # -----------------------------------------------------------
-        # DATA TAB (blank for now)
-        # -----------------------------------------------------------
-        # -----------------------------------------------------------
-        # DATA TAB (Movies + TV)
-        # -----------------------------------------------------------
-        self.data_tab = QWidget()
+    # -----------------------------------------------------------
+    # DATA TAB (Movies + TV)
+    # -----------------------------------------------------------
+    def build_data_tab(self):
         self.data_layout = QVBoxLayout(self.data_tab)
 
         self.data_tabs = QTabWidget()  # inner tab widget
 
-        # Movies table
-        self.movies_table = QTableWidget()
-        self.movies_table.setColumnCount(2)
-        self.movies_table.setHorizontalHeaderLabels(["Filename", "Movie Name"])
+        # Movies table (paged SQL model, sorted by Movie Name)
+        self.movies_table = QTableView()
+        self.movies_table.setModel(self.movies_table_model)
+        self.movies_table.horizontalHeader().setSortIndicator(1, Qt.SortOrder.AscendingOrder)
+        self.movies_table.setSortingEnabled(True)
 
-        # TV table
-        self.tv_table = QTableWidget()
-        self.tv_table.setColumnCount(4)
-        self.tv_table.setHorizontalHeaderLabels(["Filename", "Series Name", "Season", "Episode"])
+        # TV table (paged SQL model, sorted by Series Name / Season / Episode)
+        self.tv_table = QTableView()
+        self.tv_table.setModel(self.tv_table_model)
+        self.tv_table.horizontalHeader().setSortIndicator(1, Qt.SortOrder.AscendingOrder)
+        self.tv_table.setSortingEnabled(True)
 
         self.data_tabs.addTab(self.movies_table, "Movies")
         self.data_tabs.addTab(self.tv_table, "TV Shows")
 
         self.data_layout.addWidget(self.data_tabs)
 
+        self.save_edits_btn = QPushButton("Save Edits")
+        self.save_edits_btn.setEnabled(self.edit_buffer.pending_count() > 0)
         self.delete_movie_btn = QPushButton("Delete Selected Movie")
         self.delete_tv_btn = QPushButton("Delete Selected TV Entry")
 
         btn_data_layout = QHBoxLayout()
+        btn_data_layout.addWidget(self.save_edits_btn)
         btn_data_layout.addWidget(self.delete_movie_btn)
         btn_data_layout.addWidget(self.delete_tv_btn)
 
         self.data_layout.addLayout(btn_data_layout)
 
+        self.save_edits_btn.clicked.connect(self.edit_buffer.flush)
         self.delete_movie_btn.clicked.connect(self.delete_selected_movie)
         self.delete_tv_btn.clicked.connect(self.delete_selected_tv)
 
-
-
-        # -----------------------------------------------------------
-        # PATHS TAB
-        # -----------------------------------------------------------
-        self.paths_tab = QWidget()
+    # -----------------------------------------------------------
+    # PATHS TAB
+    # -----------------------------------------------------------
+    def build_paths_tab(self):
         self.paths_layout = QVBoxLayout(self.paths_tab)
 
         self.paths_list = QListWidget()
@@ -104,115 +337,133 @@ class MainWindow(QMainWindow):
         self.add_path_btn = QPushButton("Add Path")
         self.edit_path_btn = QPushButton("Edit Selected Path")
         self.remove_path_btn = QPushButton("Remove Selected Path")
+        self.scan_settings_btn = QPushButton("Scan Settings")
         self.scan_btn = QPushButton("Scan")
+        self.auto_import_btn = QPushButton("Auto Import")
+        self.import_selected_btn = QPushButton("Import Selected")
+        self.dismiss_selected_btn = QPushButton("Dismiss Selected")
 
         # Layout for buttons
         btn_layout = QHBoxLayout()
         btn_layout.addWidget(self.add_path_btn)
         btn_layout.addWidget(self.edit_path_btn)
         btn_layout.addWidget(self.remove_path_btn)
+        btn_layout.addWidget(self.scan_settings_btn)
         btn_layout.addWidget(self.scan_btn)
+        btn_layout.addWidget(self.auto_import_btn)
 
         self.paths_layout.addWidget(self.paths_list)
         self.paths_layout.addLayout(btn_layout)
 
-        # Found files label + list
+        # Found files label + list (one painted row per file, no row widgets)
         self.found_label = QLabel("Found Files:")
-        self.found_files_list = QListWidget()
-        self.found_files_list.setSpacing(4)
+        self.found_files_list = QListView()
+        self.found_files_list.setModel(self.found_model)
+        self.found_files_list.setUniformItemSizes(True)
+        self.found_files_list.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
+        self.found_delegate = FoundFileDelegate(self.found_files_list)
+        self.found_delegate.create_requested.connect(self.create_entry_dialog)
+        self.found_files_list.setItemDelegate(self.found_delegate)
+
+        found_btn_layout = QHBoxLayout()
+        found_btn_layout.addWidget(self.import_selected_btn)
+        found_btn_layout.addWidget(self.dismiss_selected_btn)
+        found_btn_layout.addStretch()
 
         self.paths_layout.addWidget(self.found_label)
         self.paths_layout.addWidget(self.found_files_list)
-
-        # Add tabs
-        self.tabs.addTab(self.watch_tab, "Watch")
-        self.tabs.addTab(self.data_tab, "Data")
-        self.tabs.addTab(self.paths_tab, "Paths")
-
-        self.filemap = {}  # filename → full path
-        # Load Watch tab immediately
-        self.load_watch_tab()
-
-        # Connect tab change
-        self.tabs.currentChanged.connect(self.on_tab_change)
+        self.paths_layout.addLayout(found_btn_layout)
 
         # Connect buttons
         self.add_path_btn.clicked.connect(self.add_path_clicked)
         self.edit_path_btn.clicked.connect(self.edit_path_clicked)
         self.remove_path_btn.clicked.connect(self.remove_path_clicked)
+        self.scan_settings_btn.clicked.connect(self.scan_settings_clicked)
         self.scan_btn.clicked.connect(self.scan_paths)
-        self.movies_table.cellChanged.connect(self.movie_cell_changed)
-        self.tv_table.cellChanged.connect(self.tv_cell_changed)
-
-        
-
-
-        # Styles
-        self.setStyleSheet("""
-            QTabBar::tab {
-                background: #444;
-                color: white;
-                padding: 8px 12px;
-                margin: 2px;
-            }
-            QTabBar::tab:selected {
-                background: #d35400;
-                color: white;
-            }
-            QLabel {
-                font-size: 16px;
-                font-weight: bold;
-                color: #ddd;
-            }
-        """)
+        self.auto_import_btn.clicked.connect(self.auto_import_clicked)
+        self.import_selected_btn.clicked.connect(self.import_selected_clicked)
+        self.dismiss_selected_btn.clicked.connect(self.dismiss_selected_clicked)
 
     # -----------------------------------------------------------
-    # WATCH TAB DATA LOADING
+    # DUPLICATES TAB
     # -----------------------------------------------------------
-    def load_watch_tab(self):
-        """Load movies and series from database into the Watch tab."""
-        from database import get_all_movies, get_all_tv_entries
+    def build_duplicates_tab(self):
+        self.duplicates_layout = QVBoxLayout(self.duplicates_tab)
 
-        # Clear current lists
-        self.movies_list.clear()
-        self.series_tree.clear()
+        self.find_duplicates_btn = QPushButton("Find Duplicates")
+        self.full_hash_check = QCheckBox("Verify with full hash (slow)")
+        self.duplicates_label = QLabel("Same-size files are compared by partial hash.")
 
-        # ----- Load Movies -----
-        movies = get_all_movies()
-        for filename, movieName in movies:
-            label = movieName
-            if filename not in self.filemap:
-                label += "   (MISSING)"
-            self.movies_list.addItem(label)
+        btn_dup_layout = QHBoxLayout()
+        btn_dup_layout.addWidget(self.find_duplicates_btn)
+        btn_dup_layout.addWidget(self.full_hash_check)
+        btn_dup_layout.addStretch()
 
+        self.duplicates_tree = QTreeWidget()
+        self.duplicates_tree.setHeaderLabels(["File", "Size"])
+        self.duplicates_tree.setColumnWidth(0, 640)
 
-        # ----- Load TV entries -----
-        tv_entries = get_all_tv_entries()
+        self.duplicates_layout.addLayout(btn_dup_layout)
+        self.duplicates_layout.addWidget(self.duplicates_label)
+        self.duplicates_layout.addWidget(self.duplicates_tree)
 
-        # Build a dict: seriesName → list of (season, episode, filename)
-        series_dict = {}
-        for filename, seriesName, season, episode in tv_entries:
-            if seriesName not in series_dict:
-                series_dict[seriesName] = []
-            series_dict[seriesName].append((season, episode, filename))
+        self.duplicate_finder.progress.connect(self.duplicates_label.setText)
+        self.find_duplicates_btn.clicked.connect(self.find_duplicates)
 
-        # Create series/episode tree
-        for seriesName, episodes in series_dict.items():
-            series_item = QTreeWidgetItem([seriesName])
-            self.series_tree.addTopLevelItem(series_item)
-
-            for season, episode, filename in episodes:
-                episode_text = f"S{season:02d}E{episode:02d}"
-                if filename not in self.filemap:
-                    episode_text += "   (MISSING)"
-                QTreeWidgetItem(series_item, [episode_text])
+    # -----------------------------------------------------------
+    # WATCH TAB DATA LOADING
+    # -----------------------------------------------------------
+    def load_watch_tab(self):
+        """Reload movies and series from the database into the Watch tab models."""
+        self.movie_model.reload()
+        self.series_model.reload()
+
+    def is_present(self, filename):
+        return filename in self.filemap
+
+    def filemap_path(self, filename):
+        return self.filemap.get(filename)
+
+    def update_filemap(self, paths, removed=()):
+        """Apply {filename: path} and removals to filemap and its on-disk cache."""
+        for filename in removed:
+            self.filemap.pop(filename, None)
+            self.refresh_watch_row(filename)
+        for filename, path in paths.items():
+            self.filemap[filename] = path
+            self.refresh_watch_row(filename)
+        if paths or removed:
+            save_filemap(paths, removed)
+
+    def on_cached_paths_gone(self, gone):
+        # Skip entries a load or the watcher has already re-pointed
+        self.update_filemap({}, [f for f, path in gone if self.filemap.get(f) == path])
+
+    def refresh_watch_row(self, filename):
+        """Repaint the Watch tab rows for `filename` after its filemap entry changed."""
+        self.movie_model.refresh_filename(filename)
+        self.series_model.refresh_filename(filename)
+        self.search_model.refresh_filename(filename)
+
+    def on_search_results(self, query, rows):
+        searching = bool(query)
+        self.search_model.set_results(rows)
+        self.search_results.setVisible(searching)
+        for widget in (self.movies_label, self.movies_list, self.series_label, self.series_tree):
+            widget.setVisible(not searching)
+
+    def find_movie(self, movieName):
+        """Filenames catalogued under `movieName` (several if titles repeat)."""
+        return self.movie_model.find(movieName)
+
+    def find_episode(self, seriesName, season, episode):
+        return self.series_model.find(seriesName, season, episode)
 
 
     # -----------------------------------------------------------
     # PATHS TAB LOGIC
     # -----------------------------------------------------------
     def load_paths(self):
-        from database import get_paths
         self.paths_list.clear()
         for p in get_paths():
             self.paths_list.addItem(p)
@@ -223,6 +474,7 @@ class MainWindow(QMainWindow):
         if ok and path.strip():
             add_path(path.strip())
             self.load_paths()
+            self.watch_paths()
 
     def edit_path_clicked(self):
         from database import update_path
@@ -235,6 +487,7 @@ class MainWindow(QMainWindow):
         if ok and new_path.strip():
             update_path(old_path, new_path.strip())
             self.load_paths()
+            self.watch_paths()
 
     def remove_path_clicked(self):
         from database import remove_path
@@ -244,81 +497,292 @@ class MainWindow(QMainWindow):
 
         remove_path(item.text())
         self.load_paths()
+        self.watch_paths()
+
+    def scan_settings_clicked(self):
+        """Edit the selected root's extensions, exclude rules, depth and symlink policy."""
+        from PyQt6.QtWidgets import (QDialog, QDialogButtonBox, QFormLayout,
+                                     QPlainTextEdit, QSpinBox)
+        from database import set_scan_profile
+        from scan_profile import ScanProfile, load_profile, parse_extensions
+
+        item = self.paths_list.currentItem()
+        if not item:
+            return
+        root = item.text()
+        profile = load_profile(root)
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"Scan Settings: {root}")
+        form = QFormLayout(dialog)
+
+        extensions_input = QLineEdit(" ".join(profile.extensions))
+        excludes_input = QPlainTextEdit("\n".join(profile.excludes))
+        excludes_input.setPlaceholderText("gitignore-style rules, one per line")
+        depth_input = QSpinBox()
+        depth_input.setRange(-1, 999)
+        depth_input.setSpecialValueText("Unlimited")
+        depth_input.setValue(-1 if profile.max_depth is None else profile.max_depth)
+        symlinks_check = QCheckBox("Follow symlinked folders")
+        symlinks_check.setChecked(profile.follow_symlinks)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Save
+                                   | QDialogButtonBox.StandardButton.Cancel)
+
+        form.addRow("Extensions:", extensions_input)
+        form.addRow("Exclude:", excludes_input)
+        form.addRow("Max depth:", depth_input)
+        form.addRow(symlinks_check)
+        form.addRow(buttons)
+
+        def save():
+            try:
+                updated = ScanProfile(
+                    parse_extensions(extensions_input.text()),
+                    excludes_input.toPlainText().splitlines(),
+                    None if depth_input.value() < 0 else depth_input.value(),
+                    symlinks_check.isChecked(),
+                )
+            except ValueError as e:
+                QMessageBox.warning(dialog, "Scan Settings", str(e))
+                return
+            if not updated.extensions:
+                QMessageBox.warning(dialog, "Scan Settings", "Enter at least one extension.")
+                return
+            set_scan_profile(root, *updated.to_row())
+            dialog.accept()
+
+        buttons.accepted.connect(save)
+        buttons.rejected.connect(dialog.reject)
+        if dialog.exec():
+            self.watch_paths()
 
     # -----------------------------------------------------------
     # TAB SWITCH EVENT
     # -----------------------------------------------------------
     def on_tab_change(self, index):
-        # Watch tab = 0
-        if index == 0:
-            self.load_watch_tab()
+        self.ensure_tab(index)
+        if not self.started:
+            return  # finish_startup() calls back once the schema is ready
+
+        # Watch tab is kept current by its models
 
-        # Data tab = 1 (unused for now)
-        if index == 1:  # Data tab
+        if index == DATA_TAB:
             self.load_movies_table()
             self.load_tv_table()
 
-
-        # Paths tab = 2
-        if index == 2:
+        if index == PATHS_TAB:
             self.load_paths()
 
     def scan_paths(self):
-        """Scan all paths in the database for .mp4 and .mkv files."""
-        import os
-        from database import get_paths
+        """Scan all paths in the database for uncatalogued media files in the background."""
+        self.found_model.clear()
+        self.start_walk("scan")
+
+    def start_walk(self, mode):
+        """Start a library walk; a scan and a load asked for together share one."""
+        running = self.scanner.mode()
+        if running is not None and running != mode:
+            mode = "both"
+        # A scan on its own reads the current catalogue in the worker
+        catalogued = self.catalogued if mode != "scan" else None
+        self.scanner.start(get_paths(), mode, catalogued)
 
-        self.found_files_list.clear()
+    # -----------------------------------------------------------
+    # BACKGROUND SCAN RESULTS
+    # -----------------------------------------------------------
+    def on_scan_batch(self, mode, batch):
+        if mode == "scan":
+            self.found_model.append(full_path for _, full_path in batch)
+        else:
+            for filename, full_path in batch:
+                # Same name under two roots: keep the copy that was fingerprinted
+                current = self.filemap.get(filename)
+                if current is not None and current == self.identity_paths.get(filename):
+                    continue
+                self.filemap[filename] = full_path
+                self.refresh_watch_row(filename)
+
+    def on_scan_progress(self, mode, dirs_visited, files_seen):
+        verb = {"scan": "Scanning", "load": "Loading"}.get(mode, "Scanning and loading")
+        self.statusBar().showMessage(
+            f"{verb}: {dirs_visited} folders, {files_seen} files"
+        )
+        self.scan_progress.show()
+        self.cancel_scan_btn.show()
 
-        paths = get_paths()
-        video_extensions = (".mp4", ".mkv")
+    def on_scan_finished(self, mode, cancelled):
+        self.scan_progress.hide()
+        self.cancel_scan_btn.hide()
 
-        found = []
+        if cancelled:
+            self.statusBar().showMessage("Scan cancelled", 5000)
+            return
 
-        for path in paths:
-            if not os.path.isdir(path):
-                continue
+        # The walk refreshed the file index; re-seed the watcher from it
+        self.watch_paths()
+
+        messages = []
+        if mode in ("scan", "both"):
+            messages.append(f"Scan finished: {self.found_model.rowCount()} new files")
+        if mode in ("load", "both"):
+            missing = sum(1 for filename in self.catalogued if filename not in self.filemap)
+            messages.append(f"Load finished: {len(self.filemap)} files matched, {missing} missing")
+        self.statusBar().showMessage("; ".join(messages), 5000)
+
+        if mode in ("load", "both"):
+            save_filemap(self.filemap, replace=True)
+            missing = set(self.identity_paths) - set(self.filemap)
+            self.reconciler.start(self.filemap, missing)
+
+    def on_scan_failed(self, mode, message):
+        """The walk stopped on an error; its partial results are not saved."""
+        self.scan_progress.hide()
+        self.cancel_scan_btn.hide()
+        what = {"scan": "Scan", "load": "Load", "both": "Sync"}[mode]
+        self.statusBar().showMessage(f"{what} failed: {message}")
+
+    def on_background_failed(self, message):
+        self.statusBar().showMessage(f"Background task failed: {message}", 10000)
+
+    def on_identities_refreshed(self, hashed, probed):
+        if probed:
+            self.statusBar().showMessage(f"Read media info for {probed} new files", 5000)
+
+    def on_files_relinked(self, relinks):
+        """Catalogue entries were renamed to follow files that moved or were renamed."""
+        for old, _, _ in relinks:
+            self.identity_paths.pop(old, None)
+        self.found_model.remove(path for _, _, path in relinks)
+        self.update_filemap({new: path for _, new, path in relinks},
+                            [old for old, _, _ in relinks])
+
+        self.statusBar().showMessage(f"Re-linked {len(relinks)} renamed files", 5000)
 
-            # Walk the directory
-            for root, dirs, files in os.walk(path):
-                for file in files:
-                    if file.lower().endswith(video_extensions):
-                        from database import filename_exists
+    # -----------------------------------------------------------
+    # DUPLICATES
+    # -----------------------------------------------------------
+    def find_duplicates(self):
+        if self.duplicate_finder.is_running():
+            self.duplicate_finder.cancel()
+            return
+        self.duplicates_tree.clear()
+        self.find_duplicates_btn.setText("Cancel")
+        self.duplicate_finder.start(get_paths(), self.full_hash_check.isChecked())
 
-                        full_path = os.path.join(root, file)
+    def on_duplicates_failed(self, message):
+        self.find_duplicates_btn.setText("Find Duplicates")
+        self.duplicates_label.setText(f"Failed: {message}")
 
-                        # don’t include files already in DB
-                        if not filename_exists(file):
-                            found.append(full_path)
+    def on_duplicates_found(self, groups, cancelled):
+        from duplicates import reclaimable
 
-        # Display results
-        for f in found:
-            self.add_found_file_item(f)
+        self.find_duplicates_btn.setText("Find Duplicates")
+        if cancelled:
+            self.duplicates_label.setText("Cancelled")
+            return
 
-    def add_found_file_item(self, filepath):
-        """Add a found file with a 'Create Entry' button."""
-        from PyQt6.QtWidgets import QWidget, QLabel, QPushButton, QHBoxLayout, QListWidgetItem
+        self.duplicates_tree.clear()
+        total = 0
+        for group in groups:
+            saved = reclaimable(group)
+            total += saved
+            item = QTreeWidgetItem([
+                f"{len(group.paths)} copies — {format_size(saved)} reclaimable",
+                format_size(group.size),
+            ])
+            for path in group.paths:
+                item.addChild(QTreeWidgetItem([path, format_size(group.size)]))
+            self.duplicates_tree.addTopLevelItem(item)
+
+        self.duplicates_label.setText(
+            f"{len(groups)} duplicate groups, {format_size(total)} reclaimable"
+        )
 
-        # Container widget for the row
-        row_widget = QWidget()
-        layout = QHBoxLayout(row_widget)
-        layout.setContentsMargins(4, 2, 4, 2)
+    # -----------------------------------------------------------
+    # LIVE WATCHER
+    # -----------------------------------------------------------
+    def watch_paths(self):
+        self.watcher.watch(get_paths())
 
-        label = QLabel(filepath)
-        button = QPushButton("Create Entry")
+    def on_files_changed(self, created, deleted, moved):
+        """Apply coalesced filesystem events to filemap and Found Files."""
+        catalogued = catalogue.get_all_filenames()
 
-        layout.addWidget(label)
-        layout.addWidget(button)
+        updates = {}
+        removed = []
 
-        # Add to the list widget
-        item = QListWidgetItem()
-        item.setSizeHint(row_widget.sizeHint())
+        found = []
 
-        self.found_files_list.addItem(item)
-        self.found_files_list.setItemWidget(item, row_widget)
+        for filename, path in deleted:
+            if self.filemap.get(filename) == path:
+                removed.append(filename)
+        self.found_model.remove(path for _, path in deleted)
+
+        for filename, old_path, new_path in moved:
+            if filename in catalogued:
+                updates[filename] = new_path
+            else:
+                self.found_model.replace(old_path, new_path)
+
+        for filename, path in created:
+            if filename in catalogued:
+                updates[filename] = path
+            elif self.watcher.is_media(path):
+                found.append(path)
+        self.found_model.append(found)
+
+        self.update_filemap(updates, [f for f in removed if f not in updates])
+
+    def closeEvent(self, event):
+        self.edit_buffer.flush()
+        self.search.wait()
+        self.thumbnails.wait()
+        self.watcher.stop()
+        self.watcher.wait()
+        self.scanner.cancel()
+        self.scanner.wait()
+        self.reconciler.wait()
+        self.filemap_validator.wait()
+        self.duplicate_finder.cancel()
+        self.duplicate_finder.wait()
+        super().closeEvent(event)
+
+    def auto_import_clicked(self):
+        """Guess entries for every file in Found Files and import the reviewed ones."""
+        self.import_found_files(self.found_model.paths())
+
+    def selected_found_paths(self):
+        rows = sorted(index.row() for index in self.found_files_list.selectionModel().selectedRows())
+        return [self.found_model.path_at(row) for row in rows]
+
+    def import_selected_clicked(self):
+        self.import_found_files(self.selected_found_paths())
+
+    def dismiss_selected_clicked(self):
+        """Drop the selected files from Found Files (until the next Scan)."""
+        self.found_model.remove(self.selected_found_paths())
+
+    def import_found_files(self, paths):
+        import os
+        from import_dialog import AutoImportDialog
 
-        # Connect button
-        button.clicked.connect(lambda: self.create_entry_dialog(filepath))
+        if not paths:
+            return
+
+        dialog = AutoImportDialog(paths, self)
+        if not dialog.exec():
+            return
+
+        self.update_filemap({os.path.basename(path): path for path in dialog.imported_paths})
+        self.found_model.remove(dialog.imported_paths)
+        self.statusBar().showMessage(f"Imported {len(dialog.imported_paths)} entries", 5000)
+        if dialog.conflicts:
+            names = "\n".join(os.path.basename(path) for path in dialog.conflicts[:10])
+            more = f"\n… and {len(dialog.conflicts) - 10} more" if len(dialog.conflicts) > 10 else ""
+            QMessageBox.information(
+                self, "Some files not imported",
+                f"{len(dialog.conflicts)} files were not imported because the file or its "
+                f"episode is already in the catalogue. They stay in Found Files.\n\n{names}{more}")
 
     def create_entry_dialog(self, filepath):
         """Dialog to create a Movie or TV entry from a file."""
@@ -402,142 +866,108 @@ class MainWindow(QMainWindow):
 
         # Handle save click
         def save():
+            import sqlite3
             filename = os.path.basename(filepath)
 
-            if type_select.currentIndex() == 0:  # Movie
-                from database import add_movie_entry
-                add_movie_entry(filename, movie_name_input.text().strip())
-            else:  # TV
-                from database import add_tv_entry
-                add_tv_entry(
-                    filename,
-                    series_name_input.text().strip(),
-                    int(season_input.text()),
-                    int(episode_input.text())
-                )
-
+            try:
+                if type_select.currentIndex() == 0:  # Movie
+                    from database import add_movie_entry
+                    add_movie_entry(filename, movie_name_input.text().strip())
+                else:  # TV
+                    from database import add_tv_entry
+                    add_tv_entry(
+                        filename,
+                        series_name_input.text().strip(),
+                        int(season_input.text()),
+                        int(episode_input.text())
+                    )
+            except sqlite3.IntegrityError:
+                QMessageBox.warning(dialog, "Entry not created",
+                                    f"{filename} or this episode is already in the catalogue.")
+                return
+
+            self.found_model.remove([filepath])
             dialog.accept()
-            self.load_watch_tab()  # Refresh the Watch tab
 
         save_button.clicked.connect(save)
 
         dialog.exec()
 
     def load_movies_table(self):
-        from database import get_all_movies
-        movies = get_all_movies()
-
-        self.movies_table.setRowCount(len(movies))
-        for row, (filename, movieName) in enumerate(movies):
-            self.movies_table.setItem(row, 0, QTableWidgetItem(filename))
-            self.movies_table.setItem(row, 1, QTableWidgetItem(movieName))
+        self.movies_table_model.reload()
 
     def load_tv_table(self):
-        from database import get_all_tv_entries
-        tv_entries = get_all_tv_entries()
-
-        self.tv_table.setRowCount(len(tv_entries))
-        for row, (filename, seriesName, season, episode) in enumerate(tv_entries):
-            self.tv_table.setItem(row, 0, QTableWidgetItem(filename))
-            self.tv_table.setItem(row, 1, QTableWidgetItem(seriesName))
-            self.tv_table.setItem(row, 2, QTableWidgetItem(str(season)))
-            self.tv_table.setItem(row, 3, QTableWidgetItem(str(episode)))
+        self.tv_table_model.reload()
 
-    def movie_cell_changed(self, row, column):
-        from database import update_movie_entry
-
-        filename_item = self.movies_table.item(row, 0)
-        movie_item = self.movies_table.item(row, 1)
-
-        if not filename_item or not movie_item:
+    def on_edits_pending(self, count):
+        if DATA_TAB not in self.built_tabs:
             return
-
-        filename = filename_item.text()
-        movieName = movie_item.text()
-
-        update_movie_entry(filename, movieName)
-        self.load_watch_tab()
-
-    def tv_cell_changed(self, row, column):
-        from database import update_tv_entry
-
-        f = self.tv_table.item(row, 0)
-        sname = self.tv_table.item(row, 1)
-        season = self.tv_table.item(row, 2)
-        episode = self.tv_table.item(row, 3)
-
-        if not f or not sname or not season or not episode:
-            return
-
-        update_tv_entry(
-            f.text(),
-            sname.text(),
-            int(season.text()),
-            int(episode.text())
-        )
-        self.load_watch_tab()
+        self.save_edits_btn.setEnabled(count > 0)
+        self.save_edits_btn.setText(f"Save Edits ({count})" if count else "Save Edits")
+
+    def on_edits_failed(self, message):
+        QMessageBox.warning(self, "Edits not saved",
+                            f"Your edits could not be written and are still pending:\n{message}")
+
+    def on_catalogue_changed(self, table, filenames):
+        """Refresh only the rows a catalogue write touched (None: everything reloaded)."""
+        if table == "MovieEntry":
+            watch_model, data_model = self.movie_model, self.movies_table_model
+        else:
+            watch_model, data_model = self.series_model, self.tv_table_model
+
+        if filenames is None:
+            watch_model.reload()
+            data_model.reload()
+        else:
+            watch_model.entries_changed(filenames)
+            data_model.rows_changed(filenames)
 
     def delete_selected_movie(self):
         from database import delete_movie_entry
 
-        row = self.movies_table.currentRow()
+        row = self.movies_table.currentIndex().row()
         if row < 0:
             return
 
-        filename = self.movies_table.item(row, 0).text()
+        self.edit_buffer.flush()
+        filename = self.movies_table_model.filename_at(row)
         delete_movie_entry(filename)
-        self.load_movies_table()
-        self.load_watch_tab()
 
     def delete_selected_tv(self):
         from database import delete_tv_entry
 
-        row = self.tv_table.currentRow()
+        row = self.tv_table.currentIndex().row()
         if row < 0:
             return
 
-        filename = self.tv_table.item(row, 0).text()
+        self.edit_buffer.flush()
+        filename = self.tv_table_model.filename_at(row)
         delete_tv_entry(filename)
-        self.load_tv_table()
-        self.load_watch_tab()
 
     def load_files(self):
-        """Match database filenames to real file paths in Pathlist."""
-        import os
-        from database import get_paths, get_all_movies, get_all_tv_entries
+        """Match database filenames to real file paths in Pathlist, in the background."""
+        self.prepare_load()
+        self.start_walk("load")
 
-        self.filemap = {}  # reset
-
-        paths = get_paths()
-        all_entries = []
-
-        # Get all filenames from movies
-        for filename, movieName in get_all_movies():
-            all_entries.append(filename)
-
-        # Get all filenames from TV
-        for filename, seriesName, season, episode in get_all_tv_entries():
-            all_entries.append(filename)
-
-        # Build a fast lookup table: filename → full path
-        found_map = {}
+    def sync_library(self):
+        """Load and Scan in one walk: paths, new files and missing entries together."""
+        self.found_model.clear()
+        self.prepare_load()
+        self.start_walk("both")
 
-        # Scan all paths
-        for base in paths:
-            if not os.path.isdir(base):
-                continue
+    def prepare_load(self):
+        from database import get_file_identities
 
-            for root, dirs, files in os.walk(base):
-                for f in files:
-                    if f in all_entries:
-                        full_path = os.path.join(root, f)
-                        found_map[f] = full_path
+        self.filemap = {}  # reset
 
-        # Store results
-        self.filemap = found_map
+        # Everything starts MISSING and is cleared as batches arrive
+        self.movie_model.refresh_all()
+        self.series_model.refresh_all()
 
-        # Refresh Watch tab to apply missing markers
-        self.load_watch_tab()
+        self.catalogued = catalogue.get_all_filenames()
+        self.identity_paths = {filename: identity[0]
+                               for filename, identity in get_file_identities(self.catalogued).items()}
 
     def open_video(self, filename):
         """Open the video file using the system's default media player."""
@@ -558,34 +988,16 @@ class MainWindow(QMainWindow):
             subprocess.call(["xdg-open", path])
 
 
-    def on_movie_clicked(self, item):
-        name = item.text().replace("   (MISSING)", "")
-        
-        # Find the filename for this movie
-        from database import get_all_movies
-        for filename, movieName in get_all_movies():
-            if movieName == name:
-                self.open_video(filename)
-                break
-    def on_tv_clicked(self, item, column):
-        text = item.text(0).replace("   (MISSING)", "")
-
-        # Skip top-level series names
-        parent = item.parent()
-        if parent is None:
-            return
-
-        seriesName = parent.text(0)
-
-        # Parse "S01E02"
-        season = int(text[1:3])
-        episode = int(text[4:6])
+    def on_movie_clicked(self, index):
+        filename = index.data(FILENAME_ROLE)
+        if filename is not None:
+            self.open_video(filename)
 
-        from database import get_all_tv_entries
-        for filename, sname, s, e in get_all_tv_entries():
-            if sname == seriesName and s == season and e == episode:
-                self.open_video(filename)
-                break
+    def on_tv_clicked(self, index):
+        # Top-level series names carry no filename
+        filename = index.data(FILENAME_ROLE)
+        if filename is not None:
+            self.open_video(filename)
 
 
 
@@ -599,6 +1011,7 @@ class MainWindow(QMainWindow):
 # -----------------------------------------------------------
 def main():
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(close_connections)
     window = MainWindow()
     window.show()
     sys.exit(app.exec())
@@ -0,0 +1,392 @@
+"""Duration, resolution, codecs and bitrate for catalogued files.
+
+ffprobe is used when it's on PATH. Otherwise a small header parser reads
+just the `moov` box of MP4 files or the Info/Tracks elements of Matroska
+files, never the media data. Probing runs in a bounded process pool;
+results are stored in MediaInfo keyed by the file's fingerprint hash
+(see identity.py), so a file is probed again only when its content
+fingerprint changes, which only happens when its size or mtime does.
+
+Qt-free.
+"""
+import json
+import multiprocessing
+import os
+import shutil
+import struct
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import database
+
+PROBE_WORKERS = max(1, min(4, os.cpu_count() or 1))
+POOL_THRESHOLD = 8
+PROBE_TIMEOUT = 30
+
+# Rows written per transaction while probing
+PROBE_BATCH = 200
+
+# Never read more than this much header looking for metadata
+MAX_HEADER_BYTES = 64 * 1024 * 1024
+
+# Field order of a probe result and of the MediaInfo columns after the key
+FIELDS = ("duration", "width", "height", "video_codec", "audio_codec", "bitrate")
+
+# MediaInfo.probed_with: the probe that produced the row ("ffprobe" or
+# "header"), or "none" if nothing could be read. MediaInfo.probe_failed
+# is set when ffprobe was tried first and failed; rows read by neither
+# are probed again once ffprobe is available.
+
+
+def _result(size, duration=None, width=None, height=None,
+            video_codec=None, audio_codec=None, bitrate=None):
+    if bitrate is None and duration:
+        bitrate = int(size * 8 / duration)
+    return {"duration": duration, "width": width, "height": height,
+            "video_codec": video_codec, "audio_codec": audio_codec, "bitrate": bitrate}
+
+
+# -----------------------------------------------------------
+# FFPROBE
+# -----------------------------------------------------------
+def probe_ffprobe(path, ffprobe):
+    try:
+        result = subprocess.run(
+            [ffprobe, "-v", "error", "-print_format", "json",
+             "-show_format", "-show_streams", path],
+            capture_output=True, text=True, timeout=PROBE_TIMEOUT,
+        )
+        info = json.loads(result.stdout or "{}")
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
+
+    fmt = info.get("format") or {}
+    streams = info.get("streams") or []
+    if not fmt and not streams:
+        return None
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+
+    def number(value, kind=float):
+        try:
+            return kind(value)
+        except (TypeError, ValueError):
+            return None
+
+    return _result(
+        number(fmt.get("size"), int) or os.path.getsize(path),
+        duration=number(fmt.get("duration")),
+        width=number(video.get("width"), int),
+        height=number(video.get("height"), int),
+        video_codec=video.get("codec_name"),
+        audio_codec=audio.get("codec_name"),
+        bitrate=number(fmt.get("bit_rate"), int),
+    )
+
+
+# -----------------------------------------------------------
+# MP4 / MOV
+# -----------------------------------------------------------
+MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+
+def _mp4_boxes(data, start=0, end=None):
+    """Yield (type, payload start, payload end) for boxes in data[start:end]."""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            return
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _find_moov(f, file_size):
+    """Seek over top-level boxes (skipping mdat unread) and return moov's bytes."""
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        head = f.read(16)
+        if len(head) < 8:
+            return None
+        size, kind = struct.unpack_from(">I4s", head)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", head, 8)[0]
+            header = 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header:
+            return None
+        if kind == b"moov":
+            if size > MAX_HEADER_BYTES:
+                return None
+            f.seek(pos)
+            return f.read(size)
+        pos += size
+    return None
+
+
+def probe_mp4(path):
+    with open(path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        moov = _find_moov(f, file_size)
+    if moov is None:
+        return None
+
+    found = {}
+
+    def walk(start, end, track):
+        for kind, body, stop in _mp4_boxes(moov, start, end):
+            if kind == b"mvhd":
+                version = moov[body]
+                if version == 1:
+                    timescale, duration = struct.unpack_from(">IQ", moov, body + 20)
+                else:
+                    timescale, duration = struct.unpack_from(">II", moov, body + 12)
+                if timescale:
+                    found["duration"] = duration / timescale
+            elif kind == b"trak":
+                track = {}
+                walk(body, stop, track)
+                handler = track.get("handler")
+                if handler == b"vide" and "video_codec" not in found:
+                    found["video_codec"] = track.get("codec")
+                    found["width"] = track.get("width")
+                    found["height"] = track.get("height")
+                elif handler == b"soun" and "audio_codec" not in found:
+                    found["audio_codec"] = track.get("codec")
+            elif kind == b"tkhd" and track is not None:
+                # width/height are the last two 16.16 fixed-point fields
+                width, height = struct.unpack_from(">II", moov, stop - 8)
+                track["width"], track["height"] = width >> 16, height >> 16
+            elif kind == b"hdlr" and track is not None:
+                track["handler"] = moov[body + 8:body + 12]
+            elif kind == b"stsd" and track is not None and stop - body >= 16:
+                # version/flags, entry count, then the first sample entry's size and fourcc
+                track["codec"] = moov[body + 12:body + 16].decode("latin-1").strip()
+            elif kind in MP4_CONTAINERS:
+                walk(body, stop, track)
+
+    try:
+        for kind, body, stop in _mp4_boxes(moov):
+            walk(body, stop, None)
+    except struct.error:
+        pass
+    if not found:
+        return None
+    return _result(file_size, **found)
+
+
+# -----------------------------------------------------------
+# MATROSKA / WEBM
+# -----------------------------------------------------------
+EBML_SEGMENT = 0x18538067
+EBML_INFO = 0x1549A966
+EBML_TRACKS = 0x1654AE6B
+EBML_CLUSTER = 0x1F43B675
+EBML_TRACK_ENTRY = 0xAE
+EBML_VIDEO = 0xE0
+EBML_TIMECODE_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+EBML_TRACK_TYPE = 0x83
+EBML_CODEC_ID = 0x86
+EBML_PIXEL_WIDTH = 0xB0
+EBML_PIXEL_HEIGHT = 0xBA
+
+
+def _vint(f, keep_marker):
+    """Read an EBML variable-length integer; returns (value, length) or (None, 0)."""
+    first = f.read(1)
+    if not first:
+        return None, 0
+    byte = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not byte & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        return None, 0
+    value = byte if keep_marker else byte & (mask - 1)
+    rest = f.read(length - 1)
+    if len(rest) < length - 1:
+        return None, 0
+    for b in rest:
+        value = (value << 8) | b
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        value = -1  # unknown size
+    return value, length
+
+
+def _ebml_elements(f, end):
+    """Yield (id, payload start, payload size) until `end`; size -1 means unknown."""
+    while f.tell() < end:
+        element_id, _ = _vint(f, keep_marker=True)
+        if element_id is None:
+            return
+        size, _ = _vint(f, keep_marker=False)
+        if size is None:
+            return
+        start = f.tell()
+        yield element_id, start, size
+        if size >= 0:
+            f.seek(start + size)
+
+
+def _ebml_uint(f, size):
+    return int.from_bytes(f.read(size), "big")
+
+
+def probe_mkv(path):
+    with open(path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if f.read(4) != b"\x1a\x45\xdf\xa3":
+            return None
+        f.seek(0)
+
+        found = {}
+        scale = 1000000
+        duration = None
+
+        def read_track(end):
+            track = {}
+            for eid, start, size in _ebml_elements(f, end):
+                if eid == EBML_TRACK_TYPE:
+                    track["type"] = _ebml_uint(f, size)
+                elif eid == EBML_CODEC_ID:
+                    track["codec"] = f.read(size).decode("latin-1").rstrip("\0")
+                elif eid == EBML_VIDEO:
+                    for vid, _, vsize in _ebml_elements(f, start + size):
+                        if vid == EBML_PIXEL_WIDTH:
+                            track["width"] = _ebml_uint(f, vsize)
+                        elif vid == EBML_PIXEL_HEIGHT:
+                            track["height"] = _ebml_uint(f, vsize)
+                    f.seek(start + size)
+            return track
+
+        # Top level: EBML header, then the Segment (whose size may be unknown)
+        for eid, start, size in _ebml_elements(f, file_size):
+            if eid != EBML_SEGMENT:
+                continue
+            segment_end = file_size if size < 0 else start + size
+            for sid, sstart, ssize in _ebml_elements(f, segment_end):
+                if sid == EBML_CLUSTER or ssize < 0:
+                    break  # media data; Info and Tracks come before it
+                if sstart > MAX_HEADER_BYTES:
+                    break
+                if sid == EBML_INFO:
+                    for iid, _, isize in _ebml_elements(f, sstart + ssize):
+                        if iid == EBML_TIMECODE_SCALE:
+                            scale = _ebml_uint(f, isize)
+                        elif iid == EBML_DURATION:
+                            raw = f.read(isize)
+                            duration = struct.unpack(">f" if isize == 4 else ">d", raw)[0]
+                    f.seek(sstart + ssize)
+                elif sid == EBML_TRACKS:
+                    for tid, tstart, tsize in _ebml_elements(f, sstart + ssize):
+                        if tid != EBML_TRACK_ENTRY:
+                            continue
+                        track = read_track(tstart + tsize)
+                        f.seek(tstart + tsize)
+                        if track.get("type") == 1 and "video_codec" not in found:
+                            found["video_codec"] = track.get("codec")
+                            found["width"] = track.get("width")
+                            found["height"] = track.get("height")
+                        elif track.get("type") == 2 and "audio_codec" not in found:
+                            found["audio_codec"] = track.get("codec")
+                    f.seek(sstart + ssize)
+            break
+
+    if duration is not None:
+        found["duration"] = duration * scale / 1e9
+    if not found:
+        return None
+    return _result(file_size, **found)
+
+
+# -----------------------------------------------------------
+# PIPELINE
+# -----------------------------------------------------------
+def probe(path, ffprobe=None):
+    """Return (probed_with, probe_failed, FIELDS dict or None) for `path`.
+
+    probe_failed is True when ffprobe was given but couldn't read the file.
+    """
+    if ffprobe:
+        result = probe_ffprobe(path, ffprobe)
+        if result is not None:
+            return "ffprobe", False, result
+    try:
+        if path.lower().endswith((".mkv", ".webm")):
+            result = probe_mkv(path)
+        else:
+            result = probe_mp4(path)
+    except (OSError, ValueError, struct.error, UnicodeDecodeError):
+        result = None
+    return ("header" if result is not None else "none"), bool(ffprobe), result
+
+
+def _probe_task(item):
+    path, ffprobe = item
+    return probe(path, ffprobe)
+
+
+def probe_files(paths, ffprobe=None, workers=PROBE_WORKERS):
+    """Yield (path, (probed_with, probe_failed, result or None)) for each path,
+    probing in a process pool."""
+    paths = list(paths)
+    items = [(path, ffprobe) for path in paths]
+    if len(paths) < POOL_THRESHOLD or workers <= 1:
+        yield from zip(paths, map(_probe_task, items))
+        return
+
+    # spawn, not fork: the caller is usually a thread in a Qt process
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        yield from zip(paths, pool.map(_probe_task, items,
+                                       chunksize=max(1, len(paths) // (workers * 4))))
+
+
+def probe_missing(filemap, cancel=None):
+    """Probe matched files whose fingerprint has no MediaInfo row yet.
+
+    filemap: {filename: path}; fingerprints must already be stored (see
+    identity.refresh_identities). Returns the number of rows written.
+    """
+    identities = database.get_file_identities(filemap)
+    wanted = {}  # hash → path (one path per distinct content)
+    for filename, (path, size, mtime, digest) in identities.items():
+        if digest and filemap.get(filename) == path:
+            wanted.setdefault(digest, path)
+
+    ffprobe = shutil.which("ffprobe")
+    known = database.existing_media_info(wanted, with_ffprobe=bool(ffprobe))
+    todo = {path: digest for digest, path in wanted.items() if digest not in known}
+
+    written = 0
+    batch = []
+    for path, (probed_with, failed, result) in probe_files(todo, ffprobe):
+        if cancel is not None and cancel.is_set():
+            break
+        # Unreadable headers are recorded too, so they aren't retried every load
+        result = result or {}
+        batch.append((todo[path], probed_with, failed,
+                      *(result.get(field) for field in FIELDS)))
+        if len(batch) >= PROBE_BATCH:
+            database.save_media_info(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        database.save_media_info(batch)
+        written += len(batch)
+    return written
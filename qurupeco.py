@@ -0,0 +1,391 @@
+"""Headless command line for batch work on a catalogue, no Qt needed.
+
+    python -m qurupeco scan   [ROOT ...]         uncatalogued video files
+    python -m qurupeco load                      catalogued files → paths (refreshes the filemap cache)
+    python -m qurupeco sync                      load + scan in one walk, plus missing entries
+    python -m qurupeco import [FILE]             add entries from JSONL/CSV (stdin by default)
+    python -m qurupeco export [--table T]        stream entries as JSONL/CSV
+    python -m qurupeco stats                     table counts and schema version
+    python -m qurupeco profile ROOT [options]    show or change a root's scan settings
+
+Records are JSONL by default, or CSV with --format csv (also picked from a
+.csv file name). Import accepts the export format (kind, filename, title,
+season, episode); a record with only a `path`, as written by `scan`, is
+guessed from its file name, so `scan | import` catalogues a library.
+
+A JSON line with timings and counts is written to stderr when each
+command finishes.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+
+import database
+from walker import MOUNT_THREADS, split_batch, sync_library, walk_roots
+
+CSV_FIELDS = ["kind", "filename", "title", "season", "episode", "path"]
+SYNC_FIELDS = ["status", "filename", "path"]
+
+# Entries per add_entries() transaction during import
+IMPORT_BATCH = 1000
+
+# Rows per page while exporting
+EXPORT_PAGE = 1000
+
+TABLES = {
+    "movies": ("MovieEntry", ["filename", "movieName"], ["movieName", "filename"]),
+    "tv": ("TVEntry", ["filename", "seriesName", "season", "episode"],
+           ["seriesName", "season", "episode", "filename"]),
+}
+
+
+# -----------------------------------------------------------
+# RECORD STREAMS
+# -----------------------------------------------------------
+class RecordWriter:
+    def __init__(self, stream, fmt, fields=CSV_FIELDS):
+        self.stream = stream
+        self.fmt = fmt
+        self.count = 0
+        if fmt == "csv":
+            self._csv = csv.DictWriter(stream, fields, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, record):
+        if self.fmt == "csv":
+            self._csv.writerow(record)
+        else:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+
+
+def read_records(stream, fmt):
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield {key: value for key, value in row.items() if value not in (None, "")}
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _format_for(args, path):
+    if args.format:
+        return args.format
+    return "csv" if path and path.lower().endswith(".csv") else "jsonl"
+
+
+def _open(path, mode):
+    if path in (None, "-"):
+        return sys.stdin if "r" in mode else sys.stdout
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+# -----------------------------------------------------------
+# COMMANDS
+# -----------------------------------------------------------
+def cmd_scan(args, stats):
+    roots = args.roots or database.get_paths()
+    cancel = threading.Event()
+
+    catalogued = frozenset() if args.all else frozenset(database.get_all_filenames())
+
+    out = _open(args.output, "w")
+    writer = RecordWriter(out, _format_for(args, args.output))
+    try:
+        for _, batch in walk_roots(roots, cancel, mount_threads=args.mount_threads):
+            for filename, path in split_batch(batch, catalogued)[1]:
+                writer.write({"filename": filename, "path": path})
+    finally:
+        cancel.set()
+        if out is not sys.stdout:
+            out.close()
+    stats.update(roots=len(roots), files=writer.count)
+
+
+def cmd_load(args, stats):
+    catalogued = frozenset(database.get_all_filenames())
+    cancel = threading.Event()
+
+    filemap = {}
+    start = time.perf_counter()
+    for _, batch in walk_roots(database.get_paths(), cancel, media_only=False,
+                               mount_threads=args.mount_threads):
+        for filename, path, _ in batch:
+            if filename in catalogued:
+                filemap.setdefault(filename, path)
+    stats["walk_seconds"] = round(time.perf_counter() - start, 4)
+
+    database.save_filemap(filemap, replace=True)
+
+    if args.fingerprint:
+        import identity
+        start = time.perf_counter()
+        stats["hashed"] = identity.refresh_identities(filemap)
+        stats["hash_seconds"] = round(time.perf_counter() - start, 4)
+
+    out = _open(args.output, "w")
+    writer = RecordWriter(out, _format_for(args, args.output))
+    try:
+        for filename in sorted(filemap):
+            writer.write({"filename": filename, "path": filemap[filename]})
+        if args.missing:
+            for filename in sorted(catalogued - filemap.keys()):
+                writer.write({"filename": filename, "path": None})
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    stats.update(catalogued=len(catalogued), matched=len(filemap),
+                 missing=len(catalogued) - len(filemap))
+
+
+def cmd_sync(args, stats):
+    catalogued = frozenset(database.get_all_filenames())
+    start = time.perf_counter()
+    result = sync_library(database.get_paths(), catalogued, mount_threads=args.mount_threads)
+    stats["walk_seconds"] = round(time.perf_counter() - start, 4)
+
+    database.save_filemap(result.filemap, replace=True)
+
+    out = _open(args.output, "w")
+    writer = RecordWriter(out, _format_for(args, args.output), SYNC_FIELDS)
+    try:
+        for filename in sorted(result.filemap):
+            writer.write({"status": "matched", "filename": filename,
+                          "path": result.filemap[filename]})
+        for filename, path in result.uncatalogued:
+            writer.write({"status": "new", "filename": filename, "path": path})
+        for filename in result.missing:
+            writer.write({"status": "missing", "filename": filename, "path": None})
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    stats.update(catalogued=len(catalogued), matched=len(result.filemap),
+                 new=len(result.uncatalogued), missing=len(result.missing))
+
+
+def _entry_from_record(record):
+    """(kind, entry tuple) for add_entries, or None if the record can't be used."""
+    from filename_parser import parse_path
+
+    if "title" not in record and record.get("path"):
+        parsed = parse_path(record["path"])
+        record = dict(parsed._asdict(), **{k: v for k, v in record.items() if v is not None})
+    kind = record.get("kind")
+    filename = record.get("filename") or os.path.basename(record.get("path") or "")
+    title = record.get("title")
+    if not filename or not title:
+        return None
+    if kind == "movie":
+        return "movie", (filename, title)
+    if kind == "tv":
+        try:
+            return "tv", (filename, title, int(record["season"]), int(record["episode"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+    return None
+
+
+def cmd_import(args, stats):
+    stream = _open(args.input, "r")
+    movies, tv_entries = [], []
+    read = skipped = inserted = 0
+
+    def flush():
+        nonlocal inserted
+        inserted += len(database.add_entries(movies, tv_entries))
+        movies.clear()
+        tv_entries.clear()
+
+    try:
+        for record in read_records(stream, _format_for(args, args.input)):
+            read += 1
+            entry = _entry_from_record(record)
+            if entry is None:
+                skipped += 1
+                continue
+            (movies if entry[0] == "movie" else tv_entries).append(entry[1])
+            if len(movies) + len(tv_entries) >= IMPORT_BATCH:
+                flush()
+        flush()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    stats.update(read=read, inserted=inserted, skipped=skipped,
+                 existing=read - skipped - inserted)
+
+
+def cmd_export(args, stats):
+    out = _open(args.output, "w")
+    writer = RecordWriter(out, _format_for(args, args.output))
+    tables = ["movies", "tv"] if args.table == "all" else [args.table]
+    try:
+        for name in tables:
+            table, columns, order = TABLES[name]
+            after = None
+            while True:
+                page = database.fetch_page(table, columns, order, after=after, limit=EXPORT_PAGE)
+                for row in page:
+                    if name == "movies":
+                        writer.write({"kind": "movie", "filename": row[0], "title": row[1]})
+                    else:
+                        writer.write({"kind": "tv", "filename": row[0], "title": row[1],
+                                      "season": row[2], "episode": row[3]})
+                if len(page) < EXPORT_PAGE:
+                    break
+                after = tuple(row[columns.index(col)] for col in order)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    stats["records"] = writer.count
+
+
+def cmd_profile(args, stats):
+    from scan_profile import ScanProfile, load_profile, parse_extensions
+
+    # Match Pathlist however either spells the root, then use its stored spelling
+    stored = {os.path.normpath(path): path for path in database.get_paths()}
+    root = stored.get(os.path.normpath(args.root))
+    if root is None:
+        raise SystemExit(f"not in Pathlist: {args.root}")
+    profile = load_profile(root)
+
+    if args.reset:
+        profile = ScanProfile()
+    changed = args.reset
+    if args.extensions is not None:
+        profile.extensions = parse_extensions(args.extensions)
+        changed = True
+    if args.exclude is not None:
+        try:
+            profile = ScanProfile(profile.extensions, args.exclude, profile.max_depth,
+                                  profile.follow_symlinks)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        changed = True
+    if args.max_depth is not None:
+        profile.max_depth = None if args.max_depth < 0 else args.max_depth
+        changed = True
+    if args.follow_symlinks is not None:
+        profile.follow_symlinks = args.follow_symlinks
+        changed = True
+    if changed:
+        database.set_scan_profile(root, *profile.to_row())
+
+    json.dump({"root": root, "extensions": list(profile.extensions),
+               "excludes": list(profile.excludes), "max_depth": profile.max_depth,
+               "follow_symlinks": profile.follow_symlinks}, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    stats["changed"] = changed
+
+
+def cmd_stats(args, stats):
+    conn = database.get_connection()
+    counts = {}
+    for table in ("MovieEntry", "TVEntry", "Pathlist", "DirIndex", "FileIndex",
+                  "FileIdentity", "FileMap", "MediaInfo"):
+        counts[table] = database.count_rows(table)
+    size = os.path.getsize(database.DB_NAME) if os.path.exists(database.DB_NAME) else 0
+    json.dump({
+        "database": os.path.abspath(database.DB_NAME),
+        "schema_version": database.schema_version(),
+        "bytes": size,
+        "rows": counts,
+        "series": conn.execute("SELECT COUNT(DISTINCT seriesName) FROM TVEntry;").fetchone()[0],
+    }, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+COMMANDS = {
+    "scan": cmd_scan,
+    "load": cmd_load,
+    "sync": cmd_sync,
+    "import": cmd_import,
+    "export": cmd_export,
+    "stats": cmd_stats,
+    "profile": cmd_profile,
+}
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", help=f"database file (default: {database.DB_NAME})")
+    common.add_argument("--quiet", action="store_true", help="no timings on stderr")
+    records = argparse.ArgumentParser(add_help=False, parents=[common])
+    records.add_argument("--format", choices=["jsonl", "csv"], help="record format")
+
+    parser = argparse.ArgumentParser(prog="qurupeco", description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    walking = argparse.ArgumentParser(add_help=False)
+    walking.add_argument("--mount-threads", type=int, default=MOUNT_THREADS,
+                         help=f"roots walked at once per device (default: {MOUNT_THREADS})")
+
+    scan = sub.add_parser("scan", parents=[records, walking],
+                          help="list video files not yet catalogued")
+    scan.add_argument("roots", nargs="*", help="roots to walk (default: Pathlist)")
+    scan.add_argument("--all", action="store_true", help="include catalogued files")
+    scan.add_argument("-o", "--output")
+
+    load = sub.add_parser("load", parents=[records, walking],
+                          help="match catalogued filenames to paths")
+    load.add_argument("--fingerprint", action="store_true", help="also refresh content hashes")
+    load.add_argument("--missing", action="store_true", help="also list unmatched entries")
+    load.add_argument("-o", "--output")
+
+    sync = sub.add_parser("sync", parents=[records, walking],
+                          help="one walk: matched paths, new files and missing entries")
+    sync.add_argument("-o", "--output")
+
+    imp = sub.add_parser("import", parents=[records], help="add entries from JSONL/CSV records")
+    imp.add_argument("input", nargs="?", default="-")
+
+    exp = sub.add_parser("export", parents=[records], help="write entries as JSONL/CSV records")
+    exp.add_argument("--table", choices=["movies", "tv", "all"], default="all")
+    exp.add_argument("-o", "--output")
+
+    sub.add_parser("stats", parents=[common], help="row counts and schema version")
+
+    prof = sub.add_parser("profile", parents=[common], help="show or change a root's scan settings")
+    prof.add_argument("root")
+    prof.add_argument("--extensions", help='e.g. ".mkv .mp4 .avi"')
+    prof.add_argument("--exclude", action="append", metavar="RULE",
+                      help="gitignore-style rule; repeat for several (replaces the list)")
+    prof.add_argument("--max-depth", type=int, help="levels below the root; -1 for unlimited")
+    prof.add_argument("--follow-symlinks", action=argparse.BooleanOptionalAction)
+    prof.add_argument("--reset", action="store_true", help="back to the defaults first")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        database.DB_NAME = args.db
+
+    stats = {"command": args.command}
+    start = time.perf_counter()
+    try:
+        database.initialize_database()
+        COMMANDS[args.command](args, stats)
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # e.g. piped into `head`; stop quietly
+        sys.stderr.close()
+        return 0
+    finally:
+        database.close_connections()
+
+    stats["seconds"] = round(time.perf_counter() - start, 4)
+    if not args.quiet:
+        sys.stderr.write(json.dumps(stats) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""Per-root scan settings: which files count and which subtrees are skipped.
+
+A profile is stored with its Pathlist row. Exclude rules use gitignore
+syntax and are compiled once into a single regular expression, checked
+against each path relative to the root (directories with a trailing
+"/"). Walkers call wants_dir() before descending, so an excluded subtree
+is never listed.
+
+Supported rule syntax: `*`, `?`, `[...]`, `**`, a leading "/" to anchor
+at the root, a trailing "/" for directories only, and `#` comments.
+Negation (`!rule`) isn't supported. Matching ignores case.
+"""
+import os
+import re
+
+import database
+from scanner import VIDEO_EXTENSIONS
+
+DEFAULT_EXCLUDES = (
+    ".*/",                      # .git, .thumbnails, .Trash-1000, ...
+    "@eaDir/",                  # Synology thumbnails
+    "#recycle/",
+    "$RECYCLE.BIN/",
+    "System Volume Information/",
+    "sample/",
+)
+
+
+def _translate(rule):
+    """Regex source for one gitignore-style rule."""
+    dir_only = rule.endswith("/")
+    rule = rule.rstrip("/")
+    anchored = "/" in rule
+    rule = rule.lstrip("/")
+
+    out = []
+    i = 0
+    while i < len(rule):
+        c = rule[i]
+        if rule.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if rule.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = rule.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = rule[i + 1:end]
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+
+    prefix = "" if anchored else "(?:.*/)?"
+    return prefix + "".join(out) + ("/" if dir_only else "/?")
+
+
+def compile_excludes(rules):
+    """One compiled pattern for all `rules`, or None if there are none."""
+    sources = []
+    for rule in rules:
+        rule = rule.strip()
+        if not rule or rule.startswith("#"):
+            continue
+        if rule.startswith("!"):
+            raise ValueError(f"Negated rules aren't supported: {rule}")
+        source = _translate(rule)
+        try:
+            re.compile(source)
+        except re.error as e:
+            raise ValueError(f"Bad exclude rule {rule!r}: {e}") from None
+        sources.append(source)
+    if not sources:
+        return None
+    return re.compile("(?:" + "|".join(sources) + r")\Z", re.IGNORECASE)
+
+
+def parse_extensions(text):
+    """'.mp4, mkv avi' → ('.mp4', '.mkv', '.avi')"""
+    extensions = []
+    for ext in re.split(r"[\s,;]+", text.strip().lower()):
+        if ext:
+            ext = ext if ext.startswith(".") else "." + ext
+            if ext not in extensions:
+                extensions.append(ext)
+    return tuple(extensions)
+
+
+class ScanProfile:
+    """What a walk of one root matches, and where it doesn't go.
+
+    `max_depth` counts directory levels below the root (0 = the root's own
+    files only; None = unlimited). With `follow_symlinks` off, symlinked
+    directories are not entered.
+    """
+
+    def __init__(self, extensions=VIDEO_EXTENSIONS, excludes=DEFAULT_EXCLUDES,
+                 max_depth=None, follow_symlinks=False):
+        self.extensions = tuple(extensions)
+        self.excludes = tuple(excludes)
+        self.max_depth = max_depth
+        self.follow_symlinks = follow_symlinks
+        self._matcher = compile_excludes(self.excludes)
+
+    @classmethod
+    def from_row(cls, row):
+        """From get_scan_profiles() columns; NULLs fall back to the defaults."""
+        extensions, excludes, max_depth, follow_symlinks = row
+        return cls(
+            VIDEO_EXTENSIONS if extensions is None else parse_extensions(extensions),
+            DEFAULT_EXCLUDES if excludes is None else excludes.splitlines(),
+            max_depth,
+            bool(follow_symlinks),
+        )
+
+    def to_row(self):
+        return (" ".join(self.extensions), "\n".join(self.excludes),
+                self.max_depth, int(self.follow_symlinks))
+
+    def wants_dir(self, relpath, depth):
+        """Whether to descend into the directory at `relpath` ("a/b"), `depth` levels down."""
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        return self._matcher is None or not self._matcher.match(relpath + "/")
+
+    def wants_file(self, relpath):
+        """False for files matched by an exclude rule (extensions aren't checked)."""
+        return self._matcher is None or not self._matcher.match(relpath)
+
+    def has_extension(self, filename):
+        return filename.lower().endswith(self.extensions)
+
+
+def load_profiles(roots):
+    """{root: ScanProfile} for `roots`, matched to Pathlist however either spells the path.
+
+    Roots not in Pathlist get the default.
+    """
+    rows = database.get_scan_profiles()
+    profiles = {}
+    for root in roots:
+        row = rows.get(os.path.normpath(root))
+        profiles[root] = ScanProfile.from_row(row) if row is not None else ScanProfile()
+    return profiles
+
+
+def load_profile(root):
+    return load_profiles([root])[root]
+
+
+def profile_for(profiles, path):
+    """(root, ScanProfile) of the innermost root in `profiles` holding `path`, or (None, None)."""
+    best = None
+    for root in profiles:
+        top = os.path.normpath(root)
+        if path == top or path.startswith(top.rstrip(os.sep) + os.sep):
+            if best is None or len(top) > len(os.path.normpath(best)):
+                best = root
+    return best, profiles.get(best)
@@ -0,0 +1,402 @@
+"""Background library scanning on a QThreadPool.
+
+One QRunnable drives walker.walk_roots, which walks the Pathlist roots
+concurrently (a few threads per device). Results come back to the GUI
+thread in batches through queued signals, so the window stays responsive
+while large or network-mounted libraries are walked.
+"""
+import os
+import threading
+import time
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+import catalogue
+import database
+from scanner import ScanCancelled
+from walker import split_batch, walk_roots
+
+# Minimum seconds between progress signals from one walk
+PROGRESS_INTERVAL = 0.1
+
+# Cached paths verified more recently than this (seconds) aren't re-checked
+REVALIDATE_AFTER = 300
+STAT_THREADS = 8
+
+
+def _describe(error):
+    """One-line message for an exception caught in a worker."""
+    return f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+
+
+class ScanSignals(QObject):
+    batch = pyqtSignal(int, str, list)    # run id, mode, [(filename, full_path)]
+    progress = pyqtSignal(int, int, int)  # run id, dirs visited, files seen
+    done = pyqtSignal(int, bool)          # run id, cancelled
+    failed = pyqtSignal(int, str)         # run id, message; done follows
+
+
+class LibraryWalkTask(QRunnable):
+    """Walk every root once and sort each batch into the requested results.
+
+    mode "scan": media files not yet catalogued
+    mode "load": files whose name is in `catalogued`, whatever the extension
+    mode "both": both of the above from the same walk
+
+    Each file is checked against the `catalogued` set; without one, the
+    task reads the catalogue's filenames once before walking.
+    """
+
+    def __init__(self, run_id, roots, mode, signals, cancel, catalogued=None):
+        super().__init__()
+        self.run_id = run_id
+        self.roots = roots
+        self.mode = mode
+        self.signals = signals
+        self.cancel = cancel
+        self.catalogued = catalogued
+        self._lock = threading.Lock()
+        self._root_progress = {}
+        self._last_progress = 0.0
+
+    def _report(self, root, dirs_visited, files_seen):
+        # Called from the walker threads
+        with self._lock:
+            self._root_progress[root] = (dirs_visited, files_seen)
+            now = time.monotonic()
+            if now - self._last_progress < PROGRESS_INTERVAL:
+                return
+            self._last_progress = now
+            dirs = sum(p[0] for p in self._root_progress.values())
+            files = sum(p[1] for p in self._root_progress.values())
+        self.signals.progress.emit(self.run_id, dirs, files)
+
+    def run(self):
+        cancelled = False
+        scan = self.mode in ("scan", "both")
+        load = self.mode in ("load", "both")
+        try:
+            catalogued = self.catalogued
+            if catalogued is None:
+                catalogued = catalogue.get_all_filenames()
+            for root, batch in walk_roots(self.roots, self.cancel, media_only=not load,
+                                          progress=self._report):
+                matched, new = split_batch(batch, catalogued)
+                if scan and new:
+                    self.signals.batch.emit(self.run_id, "scan", new)
+                if load and matched:
+                    self.signals.batch.emit(self.run_id, "load", matched)
+        except ScanCancelled:
+            cancelled = True
+        except Exception as e:
+            # An exception escaping QRunnable.run() aborts the process
+            self.signals.failed.emit(self.run_id, _describe(e))
+        finally:
+            self.signals.done.emit(self.run_id, cancelled)
+
+
+class LibraryScanner(QObject):
+    """Run one library walk at a time and forward results from the current run only."""
+
+    batch_ready = pyqtSignal(str, list)    # "scan" or "load", [(filename, full_path)]
+    progress = pyqtSignal(str, int, int)   # mode, dirs visited, files seen
+    finished = pyqtSignal(str, bool)       # mode, cancelled
+    failed = pyqtSignal(str, str)          # mode, message; instead of finished
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = ScanSignals()
+        self.signals.batch.connect(self._on_batch)
+        self.signals.progress.connect(self._on_progress)
+        self.signals.done.connect(self._on_done)
+        self.signals.failed.connect(self._on_failed)
+
+        self._run_id = 0
+        self._mode = None
+        self._running = False
+        self._cancel = threading.Event()
+
+    def is_running(self):
+        return self._running
+
+    def mode(self):
+        """Mode of the walk in flight, or None."""
+        return self._mode if self._running else None
+
+    def start(self, roots, mode, catalogued=None):
+        """Cancel any walk in flight and start walking `roots` ("scan", "load" or "both")."""
+        self.cancel()
+
+        self._run_id += 1
+        self._mode = mode
+        self._cancel = threading.Event()
+
+        if not roots:
+            self.finished.emit(mode, False)
+            return
+
+        self._running = True
+        self.pool.start(LibraryWalkTask(self._run_id, list(roots), mode, self.signals,
+                                        self._cancel, catalogued))
+        self.progress.emit(mode, 0, 0)
+
+    def cancel(self):
+        """Stop the current run. Late signals from it are dropped."""
+        if not self._running:
+            return
+        self._cancel.set()
+        self._running = False
+        self.finished.emit(self._mode, True)
+
+    def wait(self):
+        """Block until the walk has returned (used on shutdown)."""
+        self.pool.waitForDone()
+
+    def _on_batch(self, run_id, mode, batch):
+        if run_id == self._run_id and self._running:
+            self.batch_ready.emit(mode, batch)
+
+    def _on_progress(self, run_id, dirs_visited, files_seen):
+        if run_id == self._run_id and self._running:
+            self.progress.emit(self._mode, dirs_visited, files_seen)
+
+    def _on_done(self, run_id, cancelled):
+        if run_id != self._run_id or not self._running:
+            return
+        self._running = False
+        self.finished.emit(self._mode, cancelled)
+
+    def _on_failed(self, run_id, message):
+        # Partial results mustn't be taken as a finished walk
+        if run_id != self._run_id or not self._running:
+            return
+        self._running = False
+        self.failed.emit(self._mode, message)
+
+
+class _IdentitySignals(QObject):
+    relinked = pyqtSignal(int, list)  # run id, [(old_filename, new_filename, path)]
+    done = pyqtSignal(int, int, int)  # run id, files hashed, files probed
+    failed = pyqtSignal(int, str)     # run id, message
+
+
+class _IdentityTask(QRunnable):
+    def __init__(self, run_id, filemap, missing, signals):
+        super().__init__()
+        self.run_id = run_id
+        self.filemap = filemap
+        self.missing = missing
+        self.signals = signals
+
+    def run(self):
+        # Both pull in multiprocessing; not needed until after a load
+        import identity
+        import mediainfo
+        from scan_profile import load_profiles
+
+        hashed = probed = 0
+        try:
+            relinks = []
+            if self.missing:
+                profiles = load_profiles(database.get_paths())
+                relinks = identity.find_relinks(self.missing, profiles)
+            if relinks:
+                database.rename_entries([(old, new) for old, new, _ in relinks])
+                self.signals.relinked.emit(self.run_id, relinks)
+                self.filemap.update({new: path for _, new, path in relinks})
+            hashed = identity.refresh_identities(self.filemap)
+            probed = mediainfo.probe_missing(self.filemap)
+        except Exception as e:
+            # e.g. BrokenProcessPool or a locked database; don't take the GUI down
+            self.signals.failed.emit(self.run_id, _describe(e))
+        finally:
+            self.signals.done.emit(self.run_id, hashed, probed)
+
+
+class IdentityReconciler(QObject):
+    """After a load: re-link missing entries by fingerprint, fingerprint matched
+    files, then probe media info for content not seen before."""
+
+    relinked = pyqtSignal(list)     # [(old_filename, new_filename, path)]
+    finished = pyqtSignal(int, int) # files hashed, files probed
+    failed = pyqtSignal(str)        # message; finished still follows
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _IdentitySignals()
+        self.signals.relinked.connect(self._on_relinked)
+        self.signals.done.connect(self._on_done)
+        self.signals.failed.connect(self._on_failed)
+        self._run_id = 0
+
+    def start(self, filemap, missing):
+        self._run_id += 1
+        self.pool.clear()
+        self.pool.start(_IdentityTask(self._run_id, dict(filemap), set(missing), self.signals))
+
+    def wait(self):
+        self.pool.clear()
+        self.pool.waitForDone()
+
+    def _on_relinked(self, run_id, relinks):
+        if run_id == self._run_id:
+            self.relinked.emit(relinks)
+
+    def _on_done(self, run_id, hashed, probed):
+        if run_id == self._run_id:
+            self.finished.emit(hashed, probed)
+
+    def _on_failed(self, run_id, message):
+        if run_id == self._run_id:
+            self.failed.emit(message)
+
+
+class _DuplicateSignals(QObject):
+    progress = pyqtSignal(int, str)   # run id, stage message
+    done = pyqtSignal(int, list)      # run id, [DuplicateGroup]
+    failed = pyqtSignal(int, str)     # run id, message; done follows
+
+
+class _DuplicateTask(QRunnable):
+    def __init__(self, run_id, roots, full, cancel, signals):
+        super().__init__()
+        self.run_id = run_id
+        self.roots = roots
+        self.full = full
+        self.cancel = cancel
+        self.signals = signals
+
+    def run(self):
+        import duplicates
+
+        groups = []
+        try:
+            groups = duplicates.find_duplicates(
+                self.roots, self.full, self.cancel,
+                lambda message: self.signals.progress.emit(self.run_id, message))
+        except ScanCancelled:
+            pass
+        except Exception as e:
+            self.signals.failed.emit(self.run_id, _describe(e))
+        finally:
+            self.signals.done.emit(self.run_id, groups)
+
+
+class DuplicateFinder(QObject):
+    """Run duplicates.find_duplicates off the GUI thread; one search at a time."""
+
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(list, bool)  # [DuplicateGroup], cancelled
+    failed = pyqtSignal(str)           # message; instead of finished
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _DuplicateSignals()
+        self.signals.progress.connect(self._on_progress)
+        self.signals.done.connect(self._on_done)
+        self.signals.failed.connect(self._on_failed)
+        self._run_id = 0
+        self._cancel = threading.Event()
+        self._running = False
+
+    def is_running(self):
+        return self._running
+
+    def start(self, roots, full=False):
+        self.cancel()
+        self._run_id += 1
+        self._cancel = threading.Event()
+        self._running = True
+        self.pool.start(_DuplicateTask(self._run_id, list(roots), full,
+                                       self._cancel, self.signals))
+
+    def cancel(self):
+        if not self._running:
+            return
+        self._cancel.set()
+        self._running = False
+        self.finished.emit([], True)
+
+    def wait(self):
+        self.pool.waitForDone()
+
+    def _on_progress(self, run_id, message):
+        if run_id == self._run_id and self._running:
+            self.progress.emit(message)
+
+    def _on_done(self, run_id, groups):
+        if run_id == self._run_id and self._running:
+            self._running = False
+            self.finished.emit(groups, False)
+
+    def _on_failed(self, run_id, message):
+        if run_id == self._run_id and self._running:
+            self._running = False
+            self.failed.emit(message)
+
+
+class _FilemapSignals(QObject):
+    gone = pyqtSignal(list)   # [(filename, path)] no longer on disk
+    done = pyqtSignal(int)    # entries checked
+    failed = pyqtSignal(str)  # message
+
+
+class _FilemapTask(QRunnable):
+    def __init__(self, cached, signals):
+        super().__init__()
+        self.cached = cached
+        self.signals = signals
+
+    def run(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        checked = 0
+        try:
+            cutoff = time.time() - REVALIDATE_AFTER
+            stale = [(f, path) for f, (path, verified) in self.cached.items()
+                     if verified is None or verified < cutoff]
+            checked = len(stale)
+
+            # stat() is mostly waiting on the disk or network, so threads overlap well
+            with ThreadPoolExecutor(STAT_THREADS) as executor:
+                present = list(executor.map(lambda item: os.path.isfile(item[1]), stale))
+
+            seen = {f: path for (f, path), ok in zip(stale, present) if ok}
+            gone = [item for item, ok in zip(stale, present) if not ok]
+            database.confirm_filemap(seen, gone)
+            if gone:
+                self.signals.gone.emit(gone)
+        except Exception as e:
+            self.signals.failed.emit(_describe(e))
+        finally:
+            self.signals.done.emit(checked)
+
+
+class FilemapValidator(QObject):
+    """Re-check cached paths in the background by stat, without walking the roots."""
+
+    gone = pyqtSignal(list)      # [(filename, path)]
+    finished = pyqtSignal(int)   # entries checked
+    failed = pyqtSignal(str)     # message
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _FilemapSignals()
+        self.signals.gone.connect(self.gone)
+        self.signals.done.connect(self.finished)
+        self.signals.failed.connect(self.failed)
+
+    def start(self, cached):
+        """cached: {filename: (path, verified)} as returned by database.get_filemap()."""
+        self.pool.start(_FilemapTask(dict(cached), self.signals))
+
+    def wait(self):
+        self.pool.waitForDone()
@@ -0,0 +1,142 @@
+"""Library walking that doesn't depend on Qt.
+
+The GUI drives these generators from worker threads (see scan_worker.py);
+anything headless can call them directly.
+"""
+import os
+
+import database
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv")
+
+# Files per batch handed back to the caller
+BATCH_SIZE = 500
+
+
+class ScanCancelled(Exception):
+    """Raised inside a walk when its cancel event is set."""
+
+
+def relative_path(root, path):
+    """"a/b" for root/a/b, "" for the root itself (as profile rules expect)."""
+    if path == root:
+        return ""
+    rel = path[len(root.rstrip(os.sep)) + 1:]
+    return rel if os.sep == "/" else rel.replace(os.sep, "/")
+
+
+def _child(rel, name):
+    return f"{rel}/{name}" if rel else name
+
+
+def list_dir(path, follow_symlinks=False):
+    """List `path` once, returning (subdirs, [(filename, size, mtime)])."""
+    subdirs = []
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=follow_symlinks):
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    st = entry.stat()
+                    entries.append((entry.name, st.st_size, st.st_mtime))
+            except OSError:
+                continue  # vanished or unreadable while listing
+    return subdirs, entries
+
+
+def iter_indexed_batches(root, extensions=VIDEO_EXTENSIONS, batch_size=BATCH_SIZE,
+                         cancel=None, progress=None, profile=None):
+    """Walk `root` and yield lists of (filename, full_path), driven by the
+    FileIndex/DirIndex tables.
+
+    `extensions` filters by lowercase suffix; pass None to yield every file.
+    `cancel` is an optional threading.Event checked once per directory.
+    `progress(dirs_visited, files_matched)` is called once per directory.
+    `profile` (a scan_profile.ScanProfile) prunes excluded subtrees before
+    they are listed and drops excluded files.
+
+    A directory whose mtime matches the index is not listed again and its
+    files are not stat'ed; the stored listing is reused. Directory mtimes
+    don't propagate to parents, so every directory still costs one stat.
+    Only re-listed directories are written back when the walk completes;
+    directories pruned by `profile` drop out of the index.
+    """
+    root = os.path.normpath(root)
+    known_dirs, known_files = database.get_file_index(root)
+    follow = profile is not None and profile.follow_symlinks
+
+    listed = []
+    visited = set()
+    inodes = set()  # (st_dev, st_ino) of entered dirs, against symlink loops
+    batch = []
+    dirs_visited = 0
+    files_matched = 0
+    stack = [(root, os.path.dirname(root), "")]
+
+    try:
+        while stack:
+            if cancel is not None and cancel.is_set():
+                raise ScanCancelled(root)
+
+            dirpath, parent, rel = stack.pop()
+            try:
+                st = os.stat(dirpath)
+            except OSError:
+                continue  # removed since it was indexed
+            dir_mtime = st.st_mtime
+            if follow:
+                if (st.st_dev, st.st_ino) in inodes:
+                    continue
+                inodes.add((st.st_dev, st.st_ino))
+
+            visited.add(dirpath)
+            known = known_dirs.get(dirpath)
+
+            if known is not None and known[0] == dir_mtime:
+                subdirs = known[1]
+                entries = known_files.get(dirpath, [])
+            else:
+                try:
+                    subdirs, entries = list_dir(dirpath, follow)
+                except OSError:
+                    continue
+                listed.append((dirpath, parent, dir_mtime, entries))
+
+            if profile is None:
+                stack.extend((sub, dirpath, None) for sub in subdirs)
+            else:
+                depth = rel.count("/") + 2 if rel else 1
+                for sub in subdirs:
+                    sub_rel = _child(rel, os.path.basename(sub))
+                    if profile.wants_dir(sub_rel, depth):
+                        stack.append((sub, dirpath, sub_rel))
+
+            for name, size, mtime in entries:
+                if extensions is None or name.lower().endswith(extensions):
+                    if profile is not None and not profile.wants_file(_child(rel, name)):
+                        continue
+                    batch.append((name, os.path.join(dirpath, name)))
+                    files_matched += 1
+
+            dirs_visited += 1
+            if progress is not None:
+                progress(dirs_visited, files_matched)
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    except ScanCancelled:
+        # Keep what was re-listed; removals are only known after a full walk
+        if listed:
+            database.save_file_index(listed)
+        raise
+
+    removed = [path for path in known_dirs if path not in visited]
+    if listed or removed:
+        database.save_file_index(listed, removed)
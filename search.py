@@ -0,0 +1,93 @@
+"""Search-as-you-type over the catalogue.
+
+Keystrokes are debounced, the query runs on a single background thread,
+and a newer query interrupts the SQLite statement of an older one.
+Results from stale queries are dropped by generation number.
+"""
+import sqlite3
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+import database
+
+SEARCH_DEBOUNCE_MS = 150
+SEARCH_LIMIT = 200
+
+
+class _SearchSignals(QObject):
+    done = pyqtSignal(int, str, list)  # generation, query, rows
+
+
+class _SearchTask(QRunnable):
+    def __init__(self, generation, query, owner):
+        super().__init__()
+        self.generation = generation
+        self.query = query
+        self.owner = owner
+
+    def run(self):
+        if self.generation != self.owner.generation:
+            return  # superseded while queued
+
+        conn = database.get_connection()
+        self.owner._set_running(conn)
+        try:
+            rows = database.search_catalogue(self.query, SEARCH_LIMIT)
+        except sqlite3.OperationalError:
+            return  # interrupted by a newer query
+        except Exception:
+            rows = []  # don't let it escape QRunnable.run(), which aborts the process
+        finally:
+            self.owner._set_running(None)
+        self.owner.signals.done.emit(self.generation, self.query, rows)
+
+
+class CatalogueSearch(QObject):
+    results_ready = pyqtSignal(str, list)  # query, [(kind, filename, title)]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _SearchSignals()
+        self.signals.done.connect(self._on_done)
+
+        self.generation = 0
+        self._query = ""
+        self._lock = threading.Lock()
+        self._running = None
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(SEARCH_DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._start)
+
+    def set_query(self, text):
+        self._query = text.strip()
+        self.generation += 1
+        self.pool.clear()
+        with self._lock:
+            if self._running is not None:
+                self._running.interrupt()
+
+        if not self._query:
+            self._debounce.stop()
+            self.results_ready.emit("", [])
+        else:
+            self._debounce.start()
+
+    def wait(self):
+        self.pool.clear()
+        self.pool.waitForDone()
+
+    def _set_running(self, conn):
+        with self._lock:
+            self._running = conn
+
+    def _start(self):
+        self.pool.start(_SearchTask(self.generation, self._query, self))
+
+    def _on_done(self, generation, query, rows):
+        if generation == self.generation:
+            self.results_ready.emit(query, rows)
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh, migrated catalogue in a temp dir."""
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "test.db"))
+    database.initialize_database()
+    yield database
+    database.close_connections()
@@ -0,0 +1,123 @@
+import sqlite3
+
+import pytest
+
+
+def page_through(db, table, columns, order_by, limit, descending=False):
+    rows = []
+    after = None
+    while True:
+        page = db.fetch_page(table, columns, order_by, after=after, limit=limit,
+                             descending=descending)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        after = tuple(page[-1][columns.index(col)] for col in order_by)
+
+
+def ordered(db, table, columns, order_by, descending=False):
+    direction = "DESC" if descending else "ASC"
+    sql = (f"SELECT {', '.join(columns)} FROM {table} "
+           f"ORDER BY {', '.join(f'{col} {direction}' for col in order_by)};")
+    return db.get_connection().execute(sql).fetchall()
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_fetch_page_crosses_null_titles(db, descending):
+    db.add_entries([(f"m{i:04d}.mkv", None if i % 2 else f"Title {i % 7}") for i in range(100)], [])
+    columns = ["filename", "movieName"]
+    order_by = ["movieName", "filename"]
+
+    rows = page_through(db, "MovieEntry", columns, order_by, limit=7, descending=descending)
+
+    assert len(rows) == 100
+    assert rows == ordered(db, "MovieEntry", columns, order_by, descending)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_fetch_page_crosses_nulls_in_every_tv_column(db, descending):
+    tv = []
+    for i in range(120):
+        series = None if i % 5 == 0 else f"Series {i % 3}"
+        season = None if i % 4 == 0 else i % 3
+        episode = None if i % 6 == 0 else i
+        tv.append((f"e{i:04d}.mkv", series, season, episode))
+    db.add_entries([], tv)
+    columns = ["filename", "seriesName", "season", "episode"]
+    order_by = ["seriesName", "season", "episode", "filename"]
+
+    rows = page_through(db, "TVEntry", columns, order_by, limit=9, descending=descending)
+
+    assert len(rows) == 120
+    assert rows == ordered(db, "TVEntry", columns, order_by, descending)
+
+
+def test_fetch_page_offset_after_null_key(db):
+    db.add_entries([(f"m{i}.mkv", None) for i in range(5)] + [("z.mkv", "Zed")], [])
+    page = db.fetch_page("MovieEntry", ["filename", "movieName"], ["movieName", "filename"],
+                         after=(None, "m1.mkv"), limit=10, offset=1)
+    assert page == [("m3.mkv", None), ("m4.mkv", None), ("z.mkv", "Zed")]
+
+
+def test_episode_index_retried_once_duplicates_are_gone(db):
+    conn = db.get_connection()
+    conn.execute("DROP INDEX idx_tventry_episode;")
+    db.add_entries([], [("a.mkv", "Show", 1, 1), ("b.mkv", "Show", 1, 1)])
+
+    db.initialize_database()
+    assert not db.episode_index_exists()
+    assert db.duplicate_episodes() == [("Show", 1, 1, ["a.mkv", "b.mkv"])]
+
+    db.delete_tv_entry("b.mkv")
+    db.initialize_database()
+    assert db.episode_index_exists()
+    assert db.duplicate_episodes() == []
+
+
+def test_add_tv_entry_refuses_a_second_copy_of_an_episode(db):
+    db.add_tv_entry("a.mkv", "Show", 1, 1)
+    with pytest.raises(sqlite3.IntegrityError):
+        db.add_tv_entry("a.1080p.mkv", "Show", 1, 1)
+    assert db.get_tv_entry("a.1080p.mkv") is None
+
+
+def test_add_movie_entry_refuses_a_catalogued_filename(db):
+    db.add_movie_entry("m.mkv", "Film")
+    with pytest.raises(sqlite3.IntegrityError):
+        db.add_movie_entry("m.mkv", "Other Film")
+    assert db.get_movie_entry("m.mkv") == ("m.mkv", "Film")
+
+
+def test_add_entries_returns_only_the_filenames_inserted(db):
+    db.add_entries([("old.mkv", "Old")], [("s01e01.mkv", "Show", 1, 1)])
+
+    inserted = db.add_entries(
+        [("old.mkv", "Old Again"), ("new.mkv", "New")],
+        [("s01e01.1080p.mkv", "Show", 1, 1), ("s01e02.mkv", "Show", 1, 2)],
+    )
+
+    assert inserted == ["new.mkv", "s01e02.mkv"]
+    assert db.get_movie_entry("old.mkv") == ("old.mkv", "Old")
+    assert db.get_tv_entry("s01e01.1080p.mkv") is None
+
+
+def test_confirm_filemap_leaves_rows_repointed_since_the_check(db):
+    db.save_filemap({"a.mkv": "/old/a.mkv", "b.mkv": "/old/b.mkv", "c.mkv": "/c.mkv"})
+    checked = db.get_filemap()
+    # A load re-points a and b while the check is running
+    db.save_filemap({"a.mkv": "/new/a.mkv", "b.mkv": "/new/b.mkv", "c.mkv": "/c.mkv"},
+                    replace=True)
+
+    db.confirm_filemap({"a.mkv": "/old/a.mkv", "c.mkv": "/c.mkv"},
+                       [("b.mkv", "/old/b.mkv")])
+
+    filemap = db.get_filemap()
+    assert {f: path for f, (path, _) in filemap.items()} == {
+        "a.mkv": "/new/a.mkv", "b.mkv": "/new/b.mkv", "c.mkv": "/c.mkv"}
+    assert filemap["c.mkv"][1] >= checked["c.mkv"][1]
+
+
+def test_confirm_filemap_drops_rows_still_pointing_at_a_gone_path(db):
+    db.save_filemap({"a.mkv": "/old/a.mkv"})
+    db.confirm_filemap({}, [("a.mkv", "/old/a.mkv")])
+    assert db.get_filemap() == {}
@@ -0,0 +1,32 @@
+import pytest
+
+from filename_parser import parse_path
+
+
+@pytest.mark.parametrize("path, title", [
+    ("/m/Blade Runner 2049 (2017).mkv", "Blade Runner 2049 (2017)"),
+    ("/m/Blade.Runner.2049.2017.1080p.BluRay.x264.mkv", "Blade Runner 2049 (2017)"),
+    ("/m/1917.2019.1080p.WEB-DL.mkv", "1917 (2019)"),
+    ("/m/2001.A.Space.Odyssey.1968.2160p.mkv", "2001 A Space Odyssey (1968)"),
+    ("/m/2012 (2009).mp4", "2012 (2009)"),
+    ("/m/Apollo 13 [1995].avi", "Apollo 13 (1995)"),
+    ("/m/Ocean's 11 (2001) 720p.mkv", "Ocean's 11 (2001)"),
+    ("/m/The.Matrix.1999.1080p.mkv", "The Matrix (1999)"),
+    ("/m/Inception.1080p.BluRay.mkv", "Inception"),
+    ("/m/Se7en.mkv", "Se7en"),
+])
+def test_movie_titles_containing_numbers(path, title):
+    entry = parse_path(path)
+    assert entry.kind == "movie"
+    assert entry.title == title
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/tv/The.Office.US.S02E03.720p.mkv", ("The Office US", 2, 3)),
+    ("/tv/Show/Season 2/Episode 05.mkv", ("Show", 2, 5)),
+    ("/tv/9-1-1.4x07.mkv", ("9-1-1", 4, 7)),
+])
+def test_episodes(path, expected):
+    entry = parse_path(path)
+    assert entry.kind == "tv"
+    assert (entry.title, entry.season, entry.episode) == expected
@@ -0,0 +1,26 @@
+import mediainfo
+
+
+def test_probe_says_which_probe_read_the_file(tmp_path):
+    junk = tmp_path / "junk.mp4"
+    junk.write_bytes(b"\0" * 64)
+
+    assert mediainfo.probe(str(junk)) == ("none", False, None)
+    # ffprobe is tried first; when it fails that's recorded beside the header parser's verdict
+    assert mediainfo.probe(str(junk), "/bin/false") == ("none", True, None)
+
+
+def test_rows_not_tried_with_ffprobe_are_probed_again(db):
+    empty = (None,) * len(mediainfo.FIELDS)
+    full = (60.0, 1920, 1080, "h264", "aac", 1000)
+    db.save_media_info([
+        ("a", "ffprobe", False, *full),
+        ("b", "header", False, *full),
+        ("c", "none", False, *empty),
+        ("d", "header", True, *full),
+        ("e", "none", True, *empty),
+    ])
+    hashes = ["a", "b", "c", "d", "e", "f"]
+
+    assert db.existing_media_info(hashes) == {"a", "b", "c", "d", "e"}
+    assert db.existing_media_info(hashes, with_ffprobe=True) == {"a", "d", "e"}
@@ -0,0 +1,29 @@
+from scan_profile import ScanProfile, load_profile, load_profiles, profile_for
+
+
+def test_profile_found_whatever_the_trailing_slash(db, tmp_path):
+    root = str(tmp_path / "media")
+    db.add_path(root + "/")
+    db.set_scan_profile(root + "/", ".mkv", "extras/", 2, 0)
+
+    for spelling in (root, root + "/", root + "//"):
+        profile = load_profile(spelling)
+        assert profile.extensions == (".mkv",)
+        assert profile.max_depth == 2
+
+    assert set(load_profiles([root, root + "/"])) == {root, root + "/"}
+
+
+def test_unknown_root_gets_the_default_profile(db, tmp_path):
+    profile = load_profile(str(tmp_path / "elsewhere"))
+    assert profile.max_depth is None
+    assert ".mkv" in profile.extensions
+
+
+def test_profile_for_picks_the_innermost_root():
+    outer, inner = ScanProfile(extensions=(".mkv",)), ScanProfile(extensions=(".avi",))
+    profiles = {"/media/": outer, "/media/tv": inner}
+
+    assert profile_for(profiles, "/media/tv/a.avi") == ("/media/tv", inner)
+    assert profile_for(profiles, "/media/tvx/a.mkv") == ("/media/", outer)
+    assert profile_for(profiles, "/other/a.mkv") == (None, None)
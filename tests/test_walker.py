@@ -0,0 +1,54 @@
+import sqlite3
+import threading
+
+import pytest
+
+import walker
+
+
+def make_roots(tmp_path, count):
+    roots = []
+    for i in range(count):
+        root = tmp_path / f"root{i}"
+        root.mkdir()
+        (root / f"film{i}.mkv").write_bytes(b"")
+        roots.append(str(root))
+    return roots
+
+
+def test_sync_library_matches_and_finds_new_files(db, tmp_path):
+    roots = make_roots(tmp_path, 3)
+    result = walker.sync_library(roots, {"film0.mkv", "gone.mkv"})
+    assert set(result.filemap) == {"film0.mkv"}
+    assert sorted(name for name, _ in result.uncatalogued) == ["film1.mkv", "film2.mkv"]
+    assert result.missing == ["gone.mkv"]
+
+
+@pytest.mark.parametrize("mount_threads", [1, 2])
+def test_walker_error_is_raised_not_reported_as_missing(db, tmp_path, monkeypatch, mount_threads):
+    roots = make_roots(tmp_path, 3)
+    real = walker.iter_indexed_batches
+
+    def failing(root, *args, **kwargs):
+        if root.endswith("root0"):
+            raise sqlite3.OperationalError("database is locked")
+        return real(root, *args, **kwargs)
+
+    monkeypatch.setattr(walker, "iter_indexed_batches", failing)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(
+        pytest.raises(sqlite3.OperationalError, walker.sync_library, roots, {"film0.mkv"},
+                      mount_threads=mount_threads)), daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive(), "walk hung after a walker thread failed"
+    assert result
+
+
+def test_closing_the_walk_early_leaves_the_callers_event_alone(db, tmp_path):
+    roots = make_roots(tmp_path, 3)
+    cancel = threading.Event()
+    walk = walker.walk_roots(roots, cancel)
+    next(walk)
+    walk.close()
+    assert not cancel.is_set()
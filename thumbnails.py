@@ -0,0 +1,281 @@
+"""Thumbnails for the Watch tab.
+
+A frame roughly 10% into each video is grabbed with ffmpeg in a small
+worker pool, scaled to THUMB_WIDTH and kept as JPEG in a content-addressed
+disk store (keyed by the file's partial hash, so renames and moves reuse
+it). The store is bounded by MAX_CACHE_BYTES and evicts least recently
+used images. Decoded pixmaps are kept in QPixmapCache. Without ffmpeg on
+PATH every file gets a drawn placeholder.
+
+Nothing is extracted until a view asks for a row's icon, i.e. only for
+rows that are actually painted.
+"""
+import os
+import shutil
+import subprocess
+import threading
+
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QPointF, QSize, pyqtSignal
+from PyQt6.QtGui import QColor, QIcon, QImage, QPainter, QPixmap, QPixmapCache, QPolygonF
+
+import database
+
+THUMBNAIL_DIR = ".thumbnails"
+THUMB_WIDTH = 160
+THUMB_SIZE = QSize(THUMB_WIDTH, THUMB_WIDTH * 9 // 16)
+
+# Disk store bound; eviction trims down to LOW_WATER of it
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+LOW_WATER = 0.9
+
+# In-memory pixmap tier (KB)
+PIXMAP_CACHE_KB = 32 * 1024
+
+THUMBNAIL_THREADS = 2
+EXTRACT_TIMEOUT = 20
+
+# Seek used when the duration is unknown (tried first, then 0 for short clips)
+DEFAULT_SEEK = 30.0
+
+
+# -----------------------------------------------------------
+# DISK STORE
+# -----------------------------------------------------------
+class ThumbnailStore:
+    """Size-bounded, content-addressed JPEG store with LRU eviction.
+
+    A file's mtime is its last use: reads touch it, eviction removes the
+    oldest first. Safe to use from several worker threads.
+    """
+
+    def __init__(self, directory=THUMBNAIL_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None  # bytes on disk, counted on first write
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".jpg")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._entries())
+            else:
+                self._total += len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """[(path, size, mtime)] for every stored image."""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".jpg"):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((entry.path, st.st_size, st.st_mtime))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * LOW_WATER
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._total = total
+
+
+# -----------------------------------------------------------
+# EXTRACTION (Qt-free)
+# -----------------------------------------------------------
+def probe_duration(path, ffprobe):
+    try:
+        result = subprocess.run(
+            [ffprobe, "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", path],
+            capture_output=True, text=True, timeout=EXTRACT_TIMEOUT,
+        )
+        return float(result.stdout.strip())
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return None
+
+
+def extract_frame(path, ffmpeg, ffprobe=None, width=THUMB_WIDTH):
+    """Return JPEG bytes for a representative frame of `path`, or None."""
+    duration = probe_duration(path, ffprobe) if ffprobe else None
+    offsets = [duration * 0.1] if duration else [DEFAULT_SEEK, 0.0]
+
+    for offset in offsets:
+        try:
+            result = subprocess.run(
+                [ffmpeg, "-v", "error", "-ss", f"{offset:.2f}", "-i", path,
+                 "-frames:v", "1", "-vf", f"scale={width}:-2",
+                 "-f", "image2pipe", "-c:v", "mjpeg", "-q:v", "5", "-"],
+                capture_output=True, timeout=EXTRACT_TIMEOUT,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode == 0 and result.stdout:
+            return result.stdout
+    return None
+
+
+def content_key(filename, path):
+    """Cache key from the file's content fingerprint (stored one if still current)."""
+    import identity
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    known = database.get_file_identities([filename]).get(filename)
+    if known is not None and known[:3] == (path, st.st_size, st.st_mtime) and known[3]:
+        digest = known[3]
+    else:
+        fingerprint = identity.partial_hash(path)
+        if fingerprint is None:
+            return None
+        digest = fingerprint[1]
+    return f"{digest}-{THUMB_WIDTH}"
+
+
+# -----------------------------------------------------------
+# QT SIDE
+# -----------------------------------------------------------
+class _ThumbnailSignals(QObject):
+    done = pyqtSignal(str, str, object)  # filename, path, QImage or None
+
+
+class _ThumbnailTask(QRunnable):
+    def __init__(self, filename, path, store, ffmpeg, ffprobe, signals):
+        super().__init__()
+        self.filename = filename
+        self.path = path
+        self.store = store
+        self.ffmpeg = ffmpeg
+        self.ffprobe = ffprobe
+        self.signals = signals
+
+    def run(self):
+        image = None
+        try:
+            key = content_key(self.filename, self.path)
+            if key is not None:
+                data = self.store.get(key)
+                if data is None:
+                    data = extract_frame(self.path, self.ffmpeg, self.ffprobe)
+                    if data is not None:
+                        self.store.put(key, data)
+                if data is not None:
+                    image = QImage.fromData(data)  # QImage is fine off the GUI thread
+                    if image.isNull():
+                        image = None
+        except Exception:
+            # e.g. OSError from a full or read-only store; an exception
+            # escaping QRunnable.run() would abort the process
+            image = None
+        finally:
+            self.signals.done.emit(self.filename, self.path, image)
+
+
+class ThumbnailProvider(QObject):
+    """Hand out icons for catalogued files, extracting them on first request.
+
+    `path_for(filename)` returns the file's current path or None.
+    """
+
+    thumbnail_ready = pyqtSignal(str)  # filename
+
+    def __init__(self, path_for, store=None, parent=None):
+        super().__init__(parent)
+        self.path_for = path_for
+        self.store = store or ThumbnailStore()
+        self.ffmpeg = shutil.which("ffmpeg")
+        self.ffprobe = shutil.which("ffprobe")
+        QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), PIXMAP_CACHE_KB))
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(THUMBNAIL_THREADS)
+        self.signals = _ThumbnailSignals()
+        self.signals.done.connect(self._on_done)
+
+        self._pending = set()     # paths being extracted
+        self._failed = set()      # paths with no usable frame
+        self._requests = 0
+        self._placeholder = None
+
+    def placeholder(self):
+        if self._placeholder is None:
+            pixmap = QPixmap(THUMB_SIZE)
+            pixmap.fill(QColor("#333"))
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#777"))
+            w, h = THUMB_SIZE.width(), THUMB_SIZE.height()
+            painter.drawPolygon(QPolygonF([QPointF(w * 0.42, h * 0.3),
+                                           QPointF(w * 0.42, h * 0.7),
+                                           QPointF(w * 0.62, h * 0.5)]))
+            painter.end()
+            self._placeholder = QIcon(pixmap)
+        return self._placeholder
+
+    def icon(self, filename):
+        """Icon for a painted row: cached thumbnail, or placeholder while it's made."""
+        path = self.path_for(filename)
+        if path is None:
+            return None
+
+        pixmap = QPixmapCache.find(f"thumb:{path}")
+        if pixmap is not None:
+            return QIcon(pixmap)
+
+        if self.ffmpeg is not None and path not in self._pending and path not in self._failed:
+            self._pending.add(path)
+            # Newest requests first: those are the rows on screen now
+            self._requests += 1
+            self.pool.start(_ThumbnailTask(filename, path, self.store, self.ffmpeg,
+                                           self.ffprobe, self.signals), self._requests)
+        return self.placeholder()
+
+    def wait(self):
+        self.pool.clear()
+        self.pool.waitForDone()
+
+    def _on_done(self, filename, path, image):
+        self._pending.discard(path)
+        if image is None:
+            self._failed.add(path)
+            return
+        QPixmapCache.insert(f"thumb:{path}", QPixmap.fromImage(image))
+        self.thumbnail_ready.emit(filename)
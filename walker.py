@@ -0,0 +1,193 @@
+"""Walk several Pathlist roots at once, shared by the GUI scanner and the CLI.
+
+Roots are grouped by the device they live on and each device gets its
+own small set of walker threads, so a slow network share ties up only
+its own threads while a local disk keeps going. Batches from every root
+come back through one bounded queue as a generator; the caller decides
+per batch which files are new and which are catalogued, so one walk can
+serve both.
+
+Each root is walked with iter_indexed_batches and its scan profile, so
+directory listings come from os.scandir (type and stat data taken from
+the DirEntry) or, when unchanged, from the file index.
+
+sync_library() is that single pass done headlessly: every file is looked
+up once in a set of catalogued names, so the cost grows with files on
+disk plus entries, not their product.
+"""
+import os
+import queue
+import threading
+from collections import defaultdict, deque, namedtuple
+
+from scan_profile import load_profiles
+from scanner import ScanCancelled, iter_indexed_batches
+
+# Roots walked at the same time on one device
+MOUNT_THREADS = 2
+
+# Batches buffered between the walker threads and the consumer
+QUEUE_BATCHES = 64
+
+# filemap {filename: path}; uncatalogued [(filename, path)]; missing [filename], sorted
+SyncResult = namedtuple("SyncResult", "filemap uncatalogued missing")
+
+
+class _Failure:
+    """An exception from a walker thread, on its way to the consumer."""
+    __slots__ = ("error",)
+
+    def __init__(self, error):
+        self.error = error
+
+
+def group_by_mount(roots):
+    """{st_dev: [root]} for roots that are existing directories."""
+    groups = defaultdict(list)
+    for root in roots:
+        try:
+            if os.path.isdir(root):
+                groups[os.stat(root).st_dev].append(root)
+        except OSError:
+            continue
+    return groups
+
+
+class _StopEvent:
+    """The walker threads' stop flag: set by walk_roots itself, and also
+    reads as set once the caller's `cancel` is, without ever setting it."""
+
+    def __init__(self, cancel):
+        self._cancel = cancel
+        self._stop = threading.Event()
+
+    def is_set(self):
+        return self._stop.is_set() or self._cancel.is_set()
+
+    def set(self):
+        self._stop.set()
+
+
+def walk_roots(roots, cancel, media_only=True, progress=None, mount_threads=MOUNT_THREADS):
+    """Walk `roots` concurrently; yield (root, [(filename, path, is_media)]).
+
+    `is_media` is whether the file has one of its root's profile
+    extensions; with `media_only` other files aren't yielded at all.
+    `progress(root, dirs_visited, files_seen)` is called from the walker
+    threads. Setting `cancel` (a threading.Event) stops every walker and
+    makes the generator raise ScanCancelled; closing the generator early
+    stops the walkers too but leaves `cancel` alone. An exception in a walker thread (e.g. sqlite3.Error from the
+    file index) stops the others and is re-raised from the generator, so
+    a failed walk never looks like a complete one.
+    """
+    profiles = load_profiles(roots)
+    results = queue.Queue(maxsize=QUEUE_BATCHES)
+    done = object()
+    stop = _StopEvent(cancel)
+
+    def put(item):
+        # Give up if the consumer has gone away (stop set) rather than block forever
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def walk(root):
+        profile = profiles[root]
+        report = None
+        if progress is not None:
+            def report(dirs_visited, files_seen):
+                progress(root, dirs_visited, files_seen)
+
+        extensions = profile.extensions if media_only else None
+        for batch in iter_indexed_batches(root, extensions, cancel=stop,
+                                          progress=report, profile=profile):
+            if media_only:
+                put((root, [(name, path, True) for name, path in batch]))
+            else:
+                put((root, [(name, path, profile.has_extension(name)) for name, path in batch]))
+
+    def lane(pending):
+        # One of a device's threads: take that device's roots until none are left.
+        # `done` is posted once per lane, however it ends, so the consumer
+        # never waits on roots no lane got to.
+        try:
+            while not stop.is_set():
+                try:
+                    root = pending.popleft()
+                except IndexError:
+                    return
+                walk(root)
+        except ScanCancelled:
+            pass
+        except Exception as e:
+            put(_Failure(e))
+        finally:
+            put(done)
+
+    groups = group_by_mount(roots)
+    threads = []
+    for group in groups.values():
+        pending = deque(group)
+        for _ in range(max(1, min(len(group), mount_threads))):
+            thread = threading.Thread(target=lane, args=(pending,), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+    try:
+        remaining = len(threads)
+        while remaining:
+            try:
+                item = results.get(timeout=0.1)
+            except queue.Empty:
+                item = None
+            if cancel.is_set():
+                raise ScanCancelled(", ".join(roots))
+            if item is None:
+                continue
+            if item is done:
+                remaining -= 1
+            elif isinstance(item, _Failure):
+                raise item.error
+            else:
+                yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def split_batch(batch, catalogued):
+    """([(filename, path)] catalogued, [(filename, path)] uncatalogued media).
+
+    `catalogued` is a set/frozenset (or dict) of filenames: one O(1)
+    lookup per file.
+    """
+    matched = []
+    new = []
+    for name, path, is_media in batch:
+        if name in catalogued:
+            matched.append((name, path))
+        elif is_media:
+            new.append((name, path))
+    return matched, new
+
+
+def sync_library(roots, catalogued, cancel=None, progress=None, mount_threads=MOUNT_THREADS):
+    """Walk `roots` once and return a SyncResult against `catalogued`.
+
+    A filename found under several roots keeps its first path.
+    """
+    cancel = cancel or threading.Event()
+    filemap = {}
+    uncatalogued = []
+    for _, batch in walk_roots(roots, cancel, media_only=False, progress=progress,
+                               mount_threads=mount_threads):
+        matched, new = split_batch(batch, catalogued)
+        for name, path in matched:
+            filemap.setdefault(name, path)
+        uncatalogued.extend(new)
+    missing = sorted(name for name in catalogued if name not in filemap)
+    return SyncResult(filemap, uncatalogued, missing)
@@ -0,0 +1,511 @@
+"""Item models behind the Watch tab.
+
+Rows are plain tuples read from the catalogue cache; nothing is turned
+into a Qt item until a view asks for it. Movies are exposed in fetchMore()
+chunks, and a series' episodes are only queried when it is expanded.
+After a write, entry_changed(filename) moves, inserts or removes just
+the affected row instead of rebuilding the views.
+"""
+from bisect import bisect_left
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QAbstractItemModel, QModelIndex
+
+import catalogue
+
+MISSING_SUFFIX = "   (MISSING)"
+
+# Watch tab rows expose their catalogue filename under this role
+FILENAME_ROLE = Qt.ItemDataRole.UserRole
+
+# Rows handed to the view per fetchMore()
+FETCH_BATCH = 500
+
+# Above this many changed entries a full reload is cheaper than row updates
+RELOAD_THRESHOLD = 1000
+
+
+def _name_key(name):
+    """Sort key matching SQLite's ORDER BY on a TEXT column (NULLs first)."""
+    return (name is not None, name or "")
+
+
+def _episode_key(item):
+    """Sort key for a (filename, season, episode) item, NULLs first like the catalogue."""
+    _, season, episode = item
+    return (season is not None, season or 0), (episode is not None, episode or 0)
+
+
+class MovieListModel(QAbstractListModel):
+    def __init__(self, is_present, parent=None, icon_for=None):
+        super().__init__(parent)
+        self.is_present = is_present  # filename → bool (file found on disk)
+        self.icon_for = icon_for      # filename → QIcon or None, asked only for painted rows
+        self._rows = []               # [(filename, movieName)] in title order
+        self._keys = []               # sort keys parallel to _rows
+        self._loaded = 0              # rows exposed to the view so far
+        self._row_of = {}             # filename → row
+        self._by_title = {}           # movieName → [filenames], for find()
+
+    def reload(self):
+        self.beginResetModel()
+        self._rows = catalogue.get_all_movies()
+        self._keys = [(_name_key(name), filename) for filename, name in self._rows]
+        self._by_title = {}
+        for filename, name in self._rows:
+            self._by_title.setdefault(name, []).append(filename)
+        self._loaded = min(FETCH_BATCH, len(self._rows))
+        self._row_of = {}
+        self._reindex()
+        self.endResetModel()
+
+    def _reindex(self, start=0, stop=None):
+        """Refresh _row_of for rows[start:stop], the span whose positions moved."""
+        stop = len(self._rows) if stop is None else stop
+        for row in range(start, stop):
+            self._row_of[self._rows[row][0]] = row
+
+    # ----- Qt model interface -----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._loaded < len(self._rows)
+
+    def fetchMore(self, parent):
+        if not self.canFetchMore(parent):
+            return
+        count = min(FETCH_BATCH, len(self._rows) - self._loaded)
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        filename, movieName = self._rows[index.row()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            label = movieName or ""
+            if not self.is_present(filename):
+                label += MISSING_SUFFIX
+            return label
+        if role == Qt.ItemDataRole.DecorationRole and self.icon_for is not None:
+            return self.icon_for(filename)
+        if role == FILENAME_ROLE:
+            return filename
+        return None
+
+    # ----- targeted updates -----
+    def refresh_filename(self, filename):
+        """Repaint the row for `filename` (e.g. its MISSING marker changed)."""
+        row = self._row_of.get(filename)
+        if row is not None and row < self._loaded:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def refresh_all(self):
+        if self._loaded:
+            self.dataChanged.emit(self.index(0), self.index(self._loaded - 1))
+
+    def find(self, movieName):
+        """Filenames catalogued under `movieName` (several if titles repeat)."""
+        return list(self._by_title.get(movieName, ()))
+
+    def _index_title(self, entry):
+        self._by_title.setdefault(entry[1], []).append(entry[0])
+
+    def _unindex_title(self, entry):
+        filenames = self._by_title.get(entry[1])
+        if filenames is not None and entry[0] in filenames:
+            filenames.remove(entry[0])
+            if not filenames:
+                del self._by_title[entry[1]]
+
+    def entry_changed(self, filename):
+        """Re-read one MovieEntry and move, insert or remove its row to match."""
+        entry = catalogue.get_movie_entry(filename)
+        old_row = self._row_of.get(filename)
+
+        if entry is not None and old_row is not None:
+            key = (_name_key(entry[1]), filename)
+            before = self._keys[old_row - 1] if old_row > 0 else None
+            after = self._keys[old_row + 1] if old_row + 1 < len(self._keys) else None
+            # Stay in place if the neighbours still bracket the new key
+            if (before is None or before <= key) and (after is None or key <= after):
+                self._unindex_title(self._rows[old_row])
+                self._index_title(entry)
+                self._rows[old_row] = entry
+                self._keys[old_row] = key
+                self.refresh_filename(filename)
+                return
+
+        new_row = None
+        if old_row is not None:
+            self._remove_row(old_row)
+            del self._row_of[filename]
+        if entry is not None:
+            new_row = self._insert_row(entry)
+        if old_row is not None and new_row is not None:
+            self._reindex(min(old_row, new_row), max(old_row, new_row) + 1)
+        elif old_row is not None or new_row is not None:
+            self._reindex(old_row if new_row is None else new_row)
+
+    def entries_changed(self, filenames):
+        filenames = list(filenames)
+        if len(filenames) > RELOAD_THRESHOLD:
+            self.reload()
+            return
+        for filename in filenames:
+            self.entry_changed(filename)
+
+    def _remove_row(self, row):
+        visible = row < self._loaded
+        if visible:
+            self.beginRemoveRows(QModelIndex(), row, row)
+        self._unindex_title(self._rows[row])
+        del self._rows[row]
+        del self._keys[row]
+        if visible:
+            self._loaded -= 1
+            self.endRemoveRows()
+
+    def _insert_row(self, entry):
+        key = (_name_key(entry[1]), entry[0])
+        row = bisect_left(self._keys, key)
+        visible = row < self._loaded or self._loaded == len(self._rows)
+        if visible:
+            self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.insert(row, entry)
+        self._keys.insert(row, key)
+        self._index_title(entry)
+        if visible:
+            self._loaded += 1
+            self.endInsertRows()
+        return row
+
+
+class _Series:
+    __slots__ = ("uid", "name", "count", "episodes", "row_of")
+
+    def __init__(self, uid, name, count):
+        self.uid = uid
+        self.name = name
+        self.count = count
+        self.episodes = None  # [(filename, season, episode)] once fetched
+        self.row_of = {}      # filename → row in episodes
+
+    def reindex(self, start=0):
+        for row in range(start, len(self.episodes)):
+            self.row_of[self.episodes[row][0]] = row
+
+
+class SeriesTreeModel(QAbstractItemModel):
+    """Two-level tree: series names, then episodes fetched on expansion.
+
+    Series indexes have internalId 0. Episode indexes carry the uid of
+    their series, which stays valid when series rows shift around.
+    """
+
+    def __init__(self, is_present, parent=None, icon_for=None):
+        super().__init__(parent)
+        self.is_present = is_present
+        self.icon_for = icon_for
+        self._series = []         # [_Series] in name order
+        self._by_uid = {}         # uid → _Series
+        self._row_of = {}         # seriesName → row
+        self._episode_series = {} # filename → seriesName, for fetched series
+        self._key_of = {}         # filename → (seriesName, season, episode), every episode
+        self._by_key = {}         # (seriesName, season, episode) → [filenames], for find()
+        self._next_uid = 1
+
+    def reload(self):
+        self.beginResetModel()
+        self._series = []
+        self._by_uid = {}
+        self._episode_series = {}
+        self._key_of = {}
+        self._by_key = {}
+        for name, count in catalogue.get_series_names():
+            self._series.append(self._new_series(name, count))
+        for entry in catalogue.get_all_tv_entries():
+            self._index_key(entry)
+        self._reindex()
+        self.endResetModel()
+
+    def _index_key(self, entry):
+        filename, seriesName, season, episode = entry
+        key = (seriesName, season, episode)
+        self._key_of[filename] = key
+        self._by_key.setdefault(key, []).append(filename)
+
+    def _unindex_key(self, filename):
+        key = self._key_of.pop(filename, None)
+        filenames = self._by_key.get(key)
+        if filenames is not None and filename in filenames:
+            filenames.remove(filename)
+            if not filenames:
+                del self._by_key[key]
+
+    def _new_series(self, name, count):
+        series = _Series(self._next_uid, name, count)
+        self._next_uid += 1
+        self._by_uid[series.uid] = series
+        return series
+
+    def _reindex(self):
+        self._row_of = {series.name: row for row, series in enumerate(self._series)}
+
+    # ----- Qt model interface -----
+    def index(self, row, column, parent=QModelIndex()):
+        if column != 0 or row < 0:
+            return QModelIndex()
+        if not parent.isValid():
+            if row < len(self._series):
+                return self.createIndex(row, 0, 0)
+            return QModelIndex()
+        if parent.internalId() == 0:
+            series = self._series[parent.row()]
+            if series.episodes is not None and row < len(series.episodes):
+                return self.createIndex(row, 0, series.uid)
+        return QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() == 0:
+            return QModelIndex()
+        series = self._by_uid.get(index.internalId())
+        if series is None:
+            return QModelIndex()
+        row = self._row_of.get(series.name)
+        return self.createIndex(row, 0, 0) if row is not None else QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._series)
+        if parent.internalId() == 0:
+            episodes = self._series[parent.row()].episodes
+            return len(episodes) if episodes is not None else 0
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self._series)
+        if parent.internalId() == 0:
+            return self._series[parent.row()].count > 0
+        return False
+
+    def canFetchMore(self, parent):
+        return (parent.isValid() and parent.internalId() == 0
+                and self._series[parent.row()].episodes is None)
+
+    def fetchMore(self, parent):
+        if not self.canFetchMore(parent):
+            return
+        series = self._series[parent.row()]
+        rows = catalogue.get_tv_entries_for_series(series.name)
+        if not rows:
+            series.episodes = []
+            return
+        self.beginInsertRows(parent, 0, len(rows) - 1)
+        series.episodes = [(filename, season, episode) for filename, _, season, episode in rows]
+        series.count = len(rows)
+        series.reindex()
+        for filename, _, _, _ in rows:
+            self._episode_series[filename] = series.name
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if index.internalId() == 0:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return self._series[index.row()].name
+            return None
+
+        series = self._by_uid[index.internalId()]
+        filename, season, episode = series.episodes[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if season is None or episode is None:
+                text = filename  # not parsed into season/episode yet
+            else:
+                text = f"S{season:02d}E{episode:02d}"
+            if not self.is_present(filename):
+                text += MISSING_SUFFIX
+            return text
+        if role == Qt.ItemDataRole.DecorationRole and self.icon_for is not None:
+            return self.icon_for(filename)
+        if role == FILENAME_ROLE:
+            return filename
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return "Series / Episodes"
+        return None
+
+    # ----- targeted updates -----
+    def _episode_index(self, filename):
+        name = self._episode_series.get(filename)
+        if name is None:
+            return None
+        series = self._series[self._row_of[name]]
+        row = series.row_of.get(filename)
+        return self.createIndex(row, 0, series.uid) if row is not None else None
+
+    def refresh_filename(self, filename):
+        index = self._episode_index(filename)
+        if index is not None:
+            self.dataChanged.emit(index, index)
+
+    def refresh_all(self):
+        for row, series in enumerate(self._series):
+            if series.episodes:
+                parent = self.createIndex(row, 0, 0)
+                self.dataChanged.emit(self.index(0, 0, parent),
+                                      self.index(len(series.episodes) - 1, 0, parent))
+
+    def find(self, seriesName, season, episode):
+        """Filename catalogued as this episode (the first, if several are)."""
+        filenames = self._by_key.get((seriesName, season, episode))
+        return filenames[0] if filenames else None
+
+    def entry_changed(self, filename):
+        """Re-read one TVEntry and update only the rows it affects."""
+        self.entries_changed([filename])
+
+    def entries_changed(self, filenames):
+        filenames = list(filenames)
+        if len(filenames) > RELOAD_THRESHOLD:
+            self.reload()
+            return
+
+        to_insert = []
+        for filename in filenames:
+            entry = catalogue.get_tv_entry(filename)
+            self._unindex_key(filename)
+            if entry is not None:
+                self._index_key(entry)
+            if not self._update_in_place(filename, entry):
+                self._remove_episode(filename)
+                if entry is not None:
+                    to_insert.append(entry)
+
+        self._sync_series()
+
+        for entry in to_insert:
+            self._insert_episode(entry)
+
+    def _update_in_place(self, filename, entry):
+        """Rewrite a loaded episode whose position doesn't change. True if done."""
+        index = self._episode_index(filename)
+        if index is None or entry is None:
+            return False
+        series = self._by_uid[index.internalId()]
+        if entry[1] != series.name:
+            return False
+
+        episodes = series.episodes
+        row = index.row()
+        new_item = (filename, entry[2], entry[3])
+        key = _episode_key(new_item)
+        before = _episode_key(episodes[row - 1]) if row > 0 else None
+        after = _episode_key(episodes[row + 1]) if row + 1 < len(episodes) else None
+        if (before is not None and before > key) or \
+                (after is not None and key > after):
+            return False
+
+        episodes[row] = new_item
+        self.dataChanged.emit(index, index)
+        return True
+
+    def _remove_episode(self, filename):
+        index = self._episode_index(filename)
+        if index is None:
+            return
+        series = self._by_uid[index.internalId()]
+        parent = self.createIndex(self._row_of[series.name], 0, 0)
+        self.beginRemoveRows(parent, index.row(), index.row())
+        del series.episodes[index.row()]
+        del series.row_of[filename]
+        series.reindex(index.row())
+        del self._episode_series[filename]
+        self.endRemoveRows()
+
+    def _insert_episode(self, entry):
+        filename, seriesName, season, episode = entry
+        row = self._row_of.get(seriesName)
+        if row is None or self._series[row].episodes is None:
+            return  # not expanded yet; fetched with the rest when it is
+        series = self._series[row]
+        new_item = (filename, season, episode)
+        pos = bisect_left([_episode_key(item) for item in series.episodes], _episode_key(new_item))
+        self.beginInsertRows(self.createIndex(row, 0, 0), pos, pos)
+        series.episodes.insert(pos, new_item)
+        series.reindex(pos)
+        self._episode_series[filename] = seriesName
+        self.endInsertRows()
+
+    def _sync_series(self):
+        """Bring the top-level series rows and counts in line with the table."""
+        current = catalogue.get_series_names()
+        counts = dict(current)
+
+        for row in reversed(range(len(self._series))):
+            series = self._series[row]
+            if series.name not in counts:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._series[row]
+                del self._by_uid[series.uid]
+                for filename, _, _ in series.episodes or ():
+                    self._episode_series.pop(filename, None)
+                self._reindex()
+                self.endRemoveRows()
+
+        for row, (name, count) in enumerate(current):
+            if row < len(self._series) and self._series[row].name == name:
+                self._series[row].count = count
+                continue
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._series.insert(row, self._new_series(name, count))
+            self._reindex()
+            self.endInsertRows()
+
+
+class SearchResultsModel(QAbstractListModel):
+    """Flat list of (kind, filename, title) search hits."""
+
+    def __init__(self, is_present, parent=None):
+        super().__init__(parent)
+        self.is_present = is_present
+        self._rows = []
+
+    def set_results(self, rows):
+        self.beginResetModel()
+        self._rows = list(rows)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        kind, filename, title = self._rows[index.row()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            label = f"{title or ''}  [{'Movie' if kind == 'movie' else 'TV'}]  {filename}"
+            if not self.is_present(filename):
+                label += MISSING_SUFFIX
+            return label
+        if role == FILENAME_ROLE:
+            return filename
+        return None
+
+    def refresh_filename(self, filename):
+        for row, (_, f, _) in enumerate(self._rows):
+            if f == filename:
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
@@ -0,0 +1,336 @@
+"""Live filesystem watching for Pathlist roots.
+
+Every directory under a root is registered with QFileSystemWatcher
+(inotify on Linux). Directories the OS refuses to watch, e.g. once the
+inotify watch limit is reached, fall back to mtime polling. Change
+notifications are debounced; each dirty directory is then re-listed
+once and diffed against what we last saw, and the results are emitted
+as one coalesced batch of created / deleted / moved files.
+
+Seeding the listings (from the file index, or by walking a root that
+has none) and writing relisted directories back to the index happen on
+a one-thread pool, so neither blocks the GUI thread; the seeded
+listings come back through a queued signal.
+"""
+import os
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, QFileSystemWatcher, pyqtSignal
+
+import database
+from scan_profile import load_profiles, profile_for
+from scanner import list_dir, relative_path
+
+# Milliseconds of quiet before dirty directories are re-listed
+DEBOUNCE_MS = 500
+
+# Milliseconds between mtime checks on directories that couldn't be watched
+POLL_INTERVAL_MS = 5000
+
+
+# -----------------------------------------------------------
+# LISTING (Qt-free)
+# -----------------------------------------------------------
+def list_watched(path, roots, profiles):
+    """(mtime, subdirs, entries) for `path`, without subdirs its profile excludes."""
+    root, profile = profile_for(profiles, path)
+    follow = profile is not None and profile.follow_symlinks
+    mtime = os.stat(path).st_mtime
+    subdirs, entries = list_dir(path, follow)
+    if profile is not None:
+        kept = []
+        for sub in subdirs:
+            rel = relative_path(root, sub)
+            if profile.wants_dir(rel, rel.count("/") + 1):
+                kept.append(sub)
+        subdirs = kept
+    return mtime, subdirs, entries
+
+
+def list_tree(top, roots, profiles, listing, created=None):
+    """List `top` and everything below it into `listing`; returns the dirs listed.
+
+    Files found are appended to `created` when it's not None.
+    """
+    new_dirs = []
+    inodes = set()  # against symlink loops when profiles follow links
+    stack = [top]
+    while stack:
+        path = stack.pop()
+        try:
+            st = os.stat(path)
+            if (st.st_dev, st.st_ino) in inodes:
+                continue
+            inodes.add((st.st_dev, st.st_ino))
+            mtime, subdirs, entries = list_watched(path, roots, profiles)
+        except OSError:
+            continue
+        files = {name: (size, fmtime) for name, size, fmtime in entries}
+        listing[path] = (mtime, set(subdirs), files)
+        new_dirs.append(path)
+        stack.extend(subdirs)
+        if created is not None:
+            created.extend((name, os.path.join(path, name)) for name in files)
+    return new_dirs
+
+
+def seed_listings(roots, profiles):
+    """{dir: (mtime, subdirs, files)} for `roots`, from the file index where it has them."""
+    listing = {}
+    for root in roots:
+        known_dirs, known_files = database.get_file_index(root)
+        if root in known_dirs:
+            for path, (mtime, subdirs) in known_dirs.items():
+                files = {name: (size, fmtime)
+                         for name, size, fmtime in known_files.get(path, [])}
+                listing[path] = (mtime, set(subdirs), files)
+        else:
+            list_tree(root, roots, profiles, listing)
+    return listing
+
+
+# -----------------------------------------------------------
+# BACKGROUND TASKS
+# -----------------------------------------------------------
+class _WatcherSignals(QObject):
+    seeded = pyqtSignal(int, dict)  # run id, listing
+    failed = pyqtSignal(str)        # message
+
+
+class _SeedTask(QRunnable):
+    def __init__(self, run_id, roots, profiles, signals):
+        super().__init__()
+        self.run_id = run_id
+        self.roots = roots
+        self.profiles = profiles
+        self.signals = signals
+
+    def run(self):
+        try:
+            listing = seed_listings(self.roots, self.profiles)
+        except Exception as e:
+            # An exception escaping QRunnable.run() aborts the process
+            self.signals.failed.emit(f"Watching paths: {type(e).__name__}: {e}")
+            return
+        self.signals.seeded.emit(self.run_id, listing)
+
+
+class _IndexWriteTask(QRunnable):
+    def __init__(self, relisted, removed_dirs, signals):
+        super().__init__()
+        self.relisted = relisted
+        self.removed_dirs = removed_dirs
+        self.signals = signals
+
+    def run(self):
+        try:
+            database.save_file_index(self.relisted, self.removed_dirs)
+        except Exception as e:
+            self.signals.failed.emit(f"Updating the file index: {type(e).__name__}: {e}")
+
+
+# -----------------------------------------------------------
+# WATCHER
+# -----------------------------------------------------------
+class LibraryWatcher(QObject):
+    # [(filename, path)], [(filename, path)], [(filename, old_path, new_path)]
+    files_changed = pyqtSignal(list, list, list)
+    failed = pyqtSignal(str)  # message from seeding or an index write
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.fs_watcher = QFileSystemWatcher(self)
+        self.fs_watcher.directoryChanged.connect(self._on_directory_changed)
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._flush)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(POLL_INTERVAL_MS)
+        self._poll_timer.timeout.connect(self._poll)
+
+        # One thread, so index writes land in order after any seeding read
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _WatcherSignals()
+        self.signals.seeded.connect(self._on_seeded)
+        self.signals.failed.connect(self.failed)
+        self._run_id = 0
+
+        self._roots = []
+        self._profiles = {}  # root → ScanProfile
+        self._listing = {}   # dir → (mtime, set(subdirs), {filename: (size, mtime)})
+        self._polled = set()
+        self._dirty = set()
+
+    # -----------------------------------------------------------
+    # SETUP
+    # -----------------------------------------------------------
+    def watch(self, roots):
+        """Replace the watched roots. Listings are seeded in the background;
+        watching starts when they arrive."""
+        self.stop()
+        self._roots = [os.path.normpath(r) for r in roots if os.path.isdir(r)]
+        self._profiles = load_profiles(self._roots)
+        self.pool.start(_SeedTask(self._run_id, list(self._roots), dict(self._profiles),
+                                  self.signals))
+
+    def _on_seeded(self, run_id, listing):
+        if run_id != self._run_id:
+            return  # superseded by a later watch() or stop()
+        self._listing = listing
+        self._add_watches(list(listing))
+
+    def wait(self):
+        """Block until seeding and index writes have finished (used on shutdown)."""
+        self.pool.waitForDone()
+
+    def stop(self):
+        self._run_id += 1
+        watched = self.fs_watcher.directories()
+        if watched:
+            self.fs_watcher.removePaths(watched)
+        self._poll_timer.stop()
+        self._debounce.stop()
+        self._listing = {}
+        self._polled = set()
+        self._dirty = set()
+
+    def _add_watches(self, dirs):
+        if not dirs:
+            return
+        failed = self.fs_watcher.addPaths(dirs)
+        if failed:
+            self._polled.update(failed)
+            self._poll_timer.start()
+
+    def _remove_watches(self, dirs):
+        watched = [d for d in dirs if d not in self._polled]
+        if watched:
+            self.fs_watcher.removePaths(watched)
+        self._polled.difference_update(dirs)
+        if not self._polled:
+            self._poll_timer.stop()
+
+    def profile_for(self, path):
+        """(root, ScanProfile) of the innermost watched root holding `path`."""
+        return profile_for(self._profiles, path)
+
+    def is_media(self, path):
+        """Whether `path` is a file its root's scan profile would match."""
+        root, profile = self.profile_for(path)
+        if profile is None:
+            return False
+        return (profile.has_extension(os.path.basename(path))
+                and profile.wants_file(relative_path(root, path)))
+
+    def _list(self, path):
+        return list_watched(path, self._roots, self._profiles)
+
+    # -----------------------------------------------------------
+    # CHANGE DETECTION
+    # -----------------------------------------------------------
+    def _on_directory_changed(self, path):
+        self._dirty.add(path)
+        self._debounce.start()  # restarts, so bursts coalesce
+
+    def _poll(self):
+        for path in list(self._polled):
+            known = self._listing.get(path)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                mtime = None
+            if known is None or known[0] != mtime:
+                self._dirty.add(path)
+        if self._dirty:
+            self._debounce.start()
+
+    def _list_tree(self, top, created):
+        return list_tree(top, self._roots, self._profiles, self._listing, created)
+
+    def _forget_tree(self, top, deleted):
+        """Drop listings for `top` and below, recording their files as deleted."""
+        gone = []
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            known = self._listing.pop(path, None)
+            if known is None:
+                continue
+            gone.append(path)
+            stack.extend(known[1])
+            deleted.extend((name, os.path.join(path, name)) for name in known[2])
+        return gone
+
+    def _flush(self):
+        dirty, self._dirty = self._dirty, set()
+        created = []
+        deleted = []
+        relisted = []
+        removed_dirs = []
+
+        for path in dirty:
+            known = self._listing.get(path)
+            if known is None:
+                continue  # already handled as part of a removed parent
+            old_mtime, old_subdirs, old_files = known
+
+            try:
+                mtime, subdirs, entries = self._list(path)
+            except OSError:
+                gone = self._forget_tree(path, deleted)
+                self._remove_watches(gone)
+                removed_dirs.extend(gone)
+                continue
+
+            files = {name: (size, fmtime) for name, size, fmtime in entries}
+            subdirs = set(subdirs)
+            self._listing[path] = (mtime, subdirs, files)
+            relisted.append((path, os.path.dirname(path), mtime, entries))
+
+            for name in files.keys() - old_files.keys():
+                created.append((name, os.path.join(path, name)))
+            for name in old_files.keys() - files.keys():
+                deleted.append((name, os.path.join(path, name)))
+
+            for sub in subdirs - old_subdirs:
+                new_dirs = self._list_tree(sub, created)
+                self._add_watches(new_dirs)
+                relisted.extend(
+                    (d, os.path.dirname(d), self._listing[d][0],
+                     [(n, s, m) for n, (s, m) in self._listing[d][2].items()])
+                    for d in new_dirs
+                )
+            for sub in old_subdirs - subdirs:
+                gone = self._forget_tree(sub, deleted)
+                self._remove_watches(gone)
+                removed_dirs.extend(gone)
+
+        if relisted or removed_dirs:
+            self.pool.start(_IndexWriteTask(relisted, removed_dirs, self.signals))
+
+        created, deleted, moved = coalesce_events(created, deleted)
+        if created or deleted or moved:
+            self.files_changed.emit(created, deleted, moved)
+
+
+def coalesce_events(created, deleted):
+    """Fold a delete + create of the same filename into a single move."""
+    created_by_name = {}
+    for name, path in created:
+        created_by_name.setdefault(name, []).append(path)
+
+    moved = []
+    remaining_deleted = []
+    for name, old_path in deleted:
+        paths = created_by_name.get(name)
+        if paths:
+            moved.append((name, old_path, paths.pop()))
+        else:
+            remaining_deleted.append((name, old_path))
+
+    remaining_created = [(name, path)
+                         for name, paths in created_by_name.items() for path in paths]
+    return remaining_created, remaining_deleted, moved